@@ -0,0 +1,103 @@
+"""
+Archive query latency on the SQLite backend at a given size.
+
+Usage:
+    python benchmarks/bench_archive.py [records] [db_path]
+
+Fills a fresh database with synthetic analyses spread over the last
+year (saved in batches), then times listing pages with and without
+filters, a deep cursor page, search, suggestions, statistics and
+trends. Pass an existing db_path to rerun the queries without
+refilling it. Every term of the synthetic text is common except one
+``caseNNNN`` token shared by one record in 10,000.
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from database.sqlite_backend import SQLiteBackend
+
+VERDICTS = ["TRUE INFORMATION", "FALSE INFORMATION", "MISLEADING", "UNVERIFIED"]
+TYPES = ["text", "url", "image", "document"]
+WORDS = (
+    "vaccine election fraud miracle cure climate hoax photo video viral claim "
+    "minister study report leaked footage celebrity outbreak border market crash"
+).split()
+BATCH = 10_000
+
+
+def records(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    now = datetime.now()
+    for index in range(count):
+        created = now - timedelta(seconds=rng.randrange(365 * 24 * 3600))
+        words = rng.sample(WORDS, 6)
+        yield {
+            "id": f"bench_{index:08d}",
+            "created_at": created.isoformat(),
+            "title": " ".join(words[:3]),
+            "content": " ".join(words) + f" case{index % 10_000}",
+            "verdict": rng.choice(VERDICTS),
+            "analysis_type": rng.choice(TYPES),
+            "risk_score": rng.randint(0, 100),
+            "confidence": round(rng.random(), 2)
+        }
+
+
+async def timed(label: str, call, repeat: int = 5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = await call()
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    print(f"{label:<34} {elapsed:>9.2f} ms")
+    return result
+
+
+async def main(count: int, db_path: str):
+    fill = not os.path.exists(db_path)
+    backend = SQLiteBackend(db_path)
+    if fill:
+        start = time.perf_counter()
+        batch = []
+        for record in records(count):
+            batch.append(record)
+            if len(batch) == BATCH:
+                await backend.save_analyses(batch)
+                batch = []
+        if batch:
+            await backend.save_analyses(batch)
+        elapsed = time.perf_counter() - start
+        print(f"Inserted {count} analyses in {elapsed:.1f} s ({count / elapsed:,.0f}/s) into {db_path}")
+
+    await timed("page of 50", lambda: backend.get_analyses_page({}, 50))
+    await timed("page, verdict filter", lambda: backend.get_analyses_page({"verdict": "MISLEADING"}, 50))
+    await timed("page, high risk", lambda: backend.get_analyses_page({"risk_level": "high"}, 50))
+    await timed("page, one day", lambda: backend.get_analyses_page(
+        {"date_from": (datetime.now() - timedelta(days=30)).date().isoformat(),
+         "date_to": (datetime.now() - timedelta(days=30)).date().isoformat()}, 50))
+
+    cursor = None
+    for _ in range(20):
+        _, cursor = await backend.get_analyses_page({"analysis_type": "image"}, 50, cursor)
+    await timed("21st page by cursor", lambda: backend.get_analyses_page({"analysis_type": "image"}, 50, cursor))
+    await timed("search, common terms", lambda: backend.get_analyses_page({"search": "leaked footage"}, 50))
+    await timed("search, rare term", lambda: backend.get_analyses_page({"search": "case1234"}, 50))
+    await timed("search, phrase", lambda: backend.get_analyses_page({"search": '"leaked footage"'}, 50))
+    await timed("suggestions", lambda: backend.get_search_suggestions("vir", 10))
+    await timed("statistics 7d", lambda: backend.get_statistics("7d"))
+    await timed("statistics 1y", lambda: backend.get_statistics("1y"))
+    await timed("trends 30d by day", lambda: backend.get_trends("30d", "day"))
+    await timed("dashboard 7d", lambda: backend.get_dashboard_metrics("7d"))
+    backend.close()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    db_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(tempfile.mkdtemp(prefix="bench_archive_"), "archive.db")
+    asyncio.run(main(count, db_path))
@@ -0,0 +1,64 @@
+"""
+Batch upload throughput as a function of concurrency.
+
+Usage:
+    python benchmarks/bench_batch_upload.py [files_per_batch]
+
+Posts batches of distinct synthetic JPEGs to /api/upload/batch in
+process at each concurrency level and reports the summary line of the
+NDJSON stream. Every batch uses fresh images so neither the blob store
+nor the result cache can short-circuit the analysis.
+"""
+import json
+import os
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+CONCURRENCY_LEVELS = [1, 2, 4, 8, 16]
+
+
+def batch(seed: int, count: int):
+    files = []
+    for index in range(count):
+        rng = np.random.default_rng(seed * 1000 + index)
+        texture = rng.integers(0, 256, (150, 200, 3), dtype=np.uint8)
+        image = cv2.resize(texture, (1600, 1200), interpolation=cv2.INTER_LINEAR)
+        _, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        files.append(("files", (f"{seed}_{index}.jpg", encoded.tobytes(), "image/jpeg")))
+    return files
+
+
+def main(count: int):
+    workdir = tempfile.mkdtemp(prefix="bench_batch_")
+    os.chdir(workdir)
+    os.environ["IMAGE_RESULT_CACHE_PATH"] = ""
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from api.routes import upload
+
+    app = FastAPI()
+    app.include_router(upload.router, prefix="/api")
+    client = TestClient(app)
+
+    # Warm the forensics pool so the first level is not charged for it
+    client.post("/api/upload/batch", files=batch(0, 2))
+
+    print(f"{'concurrency':>11} {'files':>6} {'seconds':>8} {'files/s':>8} {'failed':>7}")
+    for level in CONCURRENCY_LEVELS:
+        response = client.post(f"/api/upload/batch?concurrency={level}", files=batch(level, count))
+        summary = json.loads(response.text.splitlines()[-1])["summary"]
+        print(
+            f"{level:>11} {summary['files']:>6} {summary['elapsed_seconds']:>8.2f} "
+            f"{summary['files_per_second']:>8.2f} {summary['failed']:>7}"
+        )
+    print(f"Uploads written to {workdir}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 24)
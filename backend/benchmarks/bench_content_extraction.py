@@ -0,0 +1,74 @@
+"""
+Compare ContentExtractor against the old BeautifulSoup get_text() path.
+
+Usage:
+    python benchmarks/bench_content_extraction.py <corpus_dir>
+
+The corpus directory holds saved pages as ``<name>.html``. When a
+``<name>.txt`` file with the hand-extracted article body sits next to a
+page it is used to score accuracy (token-level F1).
+"""
+import os
+import sys
+import time
+from collections import Counter
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from analysis_engine.content_extraction import ContentExtractor  # noqa: E402
+
+
+def baseline_extract(html: bytes) -> str:
+    soup = BeautifulSoup(html, "html.parser")
+    return soup.get_text()[:1000]
+
+
+def token_f1(predicted: str, expected: str) -> float:
+    predicted_tokens = Counter(predicted.lower().split())
+    expected_tokens = Counter(expected.lower().split())
+    overlap = sum((predicted_tokens & expected_tokens).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / sum(predicted_tokens.values())
+    recall = overlap / sum(expected_tokens.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def main(corpus_dir: str):
+    extractor = ContentExtractor()
+    pages = sorted(name for name in os.listdir(corpus_dir) if name.endswith(".html"))
+    if not pages:
+        print(f"No .html files in {corpus_dir}")
+        return
+
+    totals = {"baseline": [0.0, []], "extractor": [0.0, []]}
+    for name in pages:
+        with open(os.path.join(corpus_dir, name), "rb") as f:
+            html = f.read()
+        gold_path = os.path.join(corpus_dir, name[:-5] + ".txt")
+        gold = None
+        if os.path.exists(gold_path):
+            with open(gold_path, "r", encoding="utf-8") as f:
+                gold = f.read()
+
+        for label, run in (("baseline", baseline_extract), ("extractor", lambda h: extractor.extract(h)["content"])):
+            start = time.perf_counter()
+            text = run(html)
+            totals[label][0] += time.perf_counter() - start
+            if gold is not None:
+                totals[label][1].append(token_f1(text, gold))
+
+    print(f"{len(pages)} pages")
+    print(f"{'method':<10} {'total ms':>10} {'ms/page':>10} {'mean F1':>10}")
+    for label, (elapsed, scores) in totals.items():
+        mean_f1 = f"{sum(scores) / len(scores):.3f}" if scores else "n/a"
+        print(f"{label:<10} {elapsed * 1000:>10.1f} {elapsed * 1000 / len(pages):>10.2f} {mean_f1:>10}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(1)
+    main(sys.argv[1])
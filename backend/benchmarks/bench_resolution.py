@@ -0,0 +1,123 @@
+"""
+Latency and peak memory of image analysis by image size.
+
+Usage:
+    python benchmarks/bench_resolution.py [image ...]
+
+Without arguments synthetic JPEGs of 1-100 megapixels are generated.
+Each image is analysed in a fresh interpreter so peak RSS is not
+inherited from a larger run; the worker figure is the largest forensics
+pool process (read from /proc, so Linux only). The result cache and hash
+index are redirected to a temporary directory so every run does the
+full work.
+"""
+import asyncio
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+SIZES_MP = [1, 4, 12, 24, 50, 100]
+
+
+def measure(path: str):
+    """Child process: analyse one image and print a JSON report"""
+    from analysis_engine.image_forensics import ImageForensics, size_bucket
+    from analysis_engine.forensics_pool import shutdown_forensics_pool
+
+    async def analyze():
+        start = time.perf_counter()
+        result = await ImageForensics().analyze_file(path)
+        return result, time.perf_counter() - start
+
+    result, elapsed = asyncio.run(analyze())
+    worker_peak = max((_peak_rss_kb(pid) for pid in _child_pids()), default=0)
+    shutdown_forensics_pool()
+    performance = result.get("performance", {})
+    print(json.dumps({
+        "megapixels": performance.get("megapixels"),
+        "size_bucket": size_bucket(performance.get("megapixels") or 0),
+        "decode_scale": performance.get("decode_scale"),
+        "latency_ms": round(elapsed * 1000, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "worker_peak_rss_mb": round(worker_peak / 1024, 1),
+        "error": result.get("analysis") if result.get("verdict") == "ERROR" else None
+    }))
+
+
+def _child_pids():
+    for path in glob.glob(f"/proc/{os.getpid()}/task/*/children"):
+        with open(path) as children:
+            yield from (int(pid) for pid in children.read().split())
+
+
+def _peak_rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def synthetic_jpeg(path: str, megapixels: int):
+    width = int(np.sqrt(megapixels * 1_000_000 * 4 / 3))
+    height = width * 3 // 4
+    rng = np.random.default_rng(megapixels)
+    texture = rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+    image = cv2.resize(texture, (width, height), interpolation=cv2.INTER_LINEAR)
+    cv2.imwrite(path, image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+
+
+def run(label: str, path: str, workdir: str):
+    env = dict(
+        os.environ,
+        IMAGE_RESULT_CACHE_PATH="",
+        IMAGE_HASH_INDEX_PATH=os.path.join(workdir, "image_hashes.db")
+    )
+    output = subprocess.run(
+        [sys.executable, __file__, "--measure", path], env=env, capture_output=True, text=True
+    )
+    if output.returncode != 0:
+        print(f"{label:<18} failed: {output.stderr.strip().splitlines()[-1:]}")
+        return
+    report = json.loads(output.stdout.strip().splitlines()[-1])
+    print(
+        f"{label:<18} {report['megapixels']:>6.1f} MP {report['size_bucket']:>11} "
+        f"scale={report['decode_scale']:<5} "
+        f"{report['latency_ms']:>9.1f} ms rss={report['peak_rss_mb']:>7.1f} MB "
+        f"worker={report['worker_peak_rss_mb']:>7.1f} MB"
+        + (f" error={report['error']}" if report["error"] else "")
+    )
+
+
+def main(paths):
+    with tempfile.TemporaryDirectory() as workdir:
+        if paths:
+            for path in paths:
+                run(os.path.basename(path)[:18], path, workdir)
+            return
+
+        for megapixels in SIZES_MP:
+            path = os.path.join(workdir, f"synthetic_{megapixels}mp.jpg")
+            synthetic_jpeg(path, megapixels)
+            run(f"synthetic {megapixels}MP", path, workdir)
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--measure"]:
+        measure(sys.argv[2])
+    else:
+        main(sys.argv[1:])
@@ -1,6 +1,8 @@
 from typing import Dict, Any, Optional
 import asyncio
 from datetime import datetime
+from urllib.parse import urljoin
+import hashlib
 import json
 
 from .text_analysis import TextAnalyzer
@@ -8,6 +10,8 @@ from .image_forensics import ImageForensics
 from .source_tracking import SourceTracker
 from .context_analysis import ContextAnalyzer
 from .tactics_breakdown import TacticsAnalyzer
+from .document_extraction import DocumentExtractor
+from .url_cache import canonicalize_url, same_site, get_url_analysis_cache
 
 class ComprehensiveAnalyzer:
     """
@@ -20,6 +24,8 @@ class ComprehensiveAnalyzer:
         self.source_tracker = SourceTracker()
         self.context_analyzer = ContextAnalyzer()
         self.tactics_analyzer = TacticsAnalyzer()
+        self.document_extractor = DocumentExtractor()
+        self.url_cache = get_url_analysis_cache()
     
     async def analyze(self, analysis_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -32,22 +38,11 @@ class ComprehensiveAnalyzer:
             include_sources = analysis_data.get("include_sources", True)
             include_reporting = analysis_data.get("include_reporting", True)
             
-            # Initialize result structure
-            result = {
-                "verdict": "UNVERIFIED",
-                "risk_score": 0,
-                "confidence": 0.0,
-                "ai_analysis": "",
-                "manipulation_tactics": [],
-                "fact_checks": [],
-                "source_links": [],
-                "reporting_emails": [],
-                "analysis_metadata": {
-                    "type": analysis_type,
-                    "language": language,
-                    "timestamp": datetime.now().isoformat(),
-                    "processing_time": 0
-                }
+            base_metadata = {
+                "type": analysis_type,
+                "language": language,
+                "timestamp": datetime.now().isoformat(),
+                "processing_time": 0
             }
             
             start_time = datetime.now()
@@ -65,7 +60,9 @@ class ComprehensiveAnalyzer:
             
             # Calculate processing time
             processing_time = (datetime.now() - start_time).total_seconds()
-            result["analysis_metadata"]["processing_time"] = processing_time
+            metadata = {**base_metadata, **result.get("analysis_metadata", {})}
+            metadata["processing_time"] = processing_time
+            result["analysis_metadata"] = metadata
             
             return result
             
@@ -123,11 +120,16 @@ class ComprehensiveAnalyzer:
     async def _analyze_image(self, analysis_data: Dict[str, Any], language: str, include_sources: bool, include_reporting: bool) -> Dict[str, Any]:
         """Analyze image content"""
         try:
+            file_data = analysis_data.get("data")
             file_path = analysis_data.get("file_path")
             file_obj = analysis_data.get("file")
             
-            if file_path:
-                image_result = await self.image_forensics.analyze_file(file_path, language)
+            sha256 = analysis_data.get("sha256")
+            
+            if file_data is not None:
+                image_result = await self.image_forensics.analyze_bytes(file_data, language, sha256)
+            elif file_path:
+                image_result = await self.image_forensics.analyze_file(file_path, language, sha256)
             elif file_obj:
                 image_result = await self.image_forensics.analyze_file_obj(file_obj, language)
             else:
@@ -171,8 +173,12 @@ class ComprehensiveAnalyzer:
     async def _analyze_url(self, url: str, language: str, include_sources: bool, include_reporting: bool) -> Dict[str, Any]:
         """Analyze URL content"""
         try:
+            # Variants seen before are fetched from their known canonical location
+            variant = canonicalize_url(url)
+            fetch_url = await asyncio.to_thread(self.url_cache.resolve, variant) or url
+            
             # Extract content from URL
-            url_result = await self.source_tracker.extract_url_content(url)
+            url_result = await self.source_tracker.extract_url_content(fetch_url)
             content = url_result.get("content", "")
             title = url_result.get("title", "")
             
@@ -188,6 +194,23 @@ class ComprehensiveAnalyzer:
                     "reporting_emails": []
                 }
             
+            # Reuse the stored analysis unless the page content changed
+            final_url = url_result.get("final_url") or fetch_url
+            canonical_url = canonicalize_url(final_url)
+            declared = url_result.get("canonical_url")
+            if declared:
+                # A page may only name a canonical URL on its own site, so
+                # it cannot claim, or overwrite the analysis of, another site's
+                declared = canonicalize_url(urljoin(final_url, declared))
+                if same_site(declared, final_url):
+                    canonical_url = declared
+            content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+            options = f"{language}:{int(include_sources)}{int(include_reporting)}"
+            cache_entry = await asyncio.to_thread(self.url_cache.get, canonical_url, options, content_hash)
+            if cache_entry:
+                cache_entry["analysis_metadata"] = {"canonical_url": canonical_url, "cache_hit": True}
+                return self._apply_source_credibility(cache_entry, canonical_url)
+            
             # Analyze extracted content
             text_result = await self.text_analyzer.analyze(content, language)
             context_result = await self.context_analyzer.analyze(content, language)
@@ -198,7 +221,7 @@ class ComprehensiveAnalyzer:
                 "verdict": text_result.get("verdict", "UNVERIFIED"),
                 "risk_score": text_result.get("risk_score", 0),
                 "confidence": text_result.get("confidence", 0.0),
-                "ai_analysis": f"URL: {url}\nTitle: {title}\n\n{text_result.get('analysis', '')}",
+                "ai_analysis": f"URL: {canonical_url}\nTitle: {title}\n\n{text_result.get('analysis', '')}",
                 "manipulation_tactics": tactics_result.get("tactics", []),
                 "fact_checks": text_result.get("fact_checks", []),
                 "source_links": [],
@@ -214,27 +237,72 @@ class ComprehensiveAnalyzer:
             if include_reporting:
                 result["reporting_emails"] = self._get_reporting_emails(result["verdict"])
             
-            return result
+            if result["verdict"] != "ERROR":
+                await asyncio.to_thread(
+                    self.url_cache.put,
+                    canonical_url,
+                    options,
+                    content_hash,
+                    result,
+                    fetch_url=final_url,
+                    aliases=(variant, canonicalize_url(final_url))
+                )
+            
+            result["analysis_metadata"] = {"canonical_url": canonical_url, "cache_hit": False}
+            return self._apply_source_credibility(result, canonical_url)
             
         except Exception as e:
             raise Exception(f"URL analysis failed: {str(e)}")
     
+    def _apply_source_credibility(self, result: Dict[str, Any], url: str) -> Dict[str, Any]:
+        """Adjust the verdict by the reputation of the publishing domain"""
+        credibility = self.source_tracker.source_credibility(url)
+        result["source_credibility"] = credibility
+        score = credibility["score"]
+        
+        if credibility["category"] == "disinformation":
+            result["risk_score"] = max(result["risk_score"], 100 - score)
+            if result["verdict"] not in ["FALSE INFORMATION", "MISLEADING"]:
+                result["verdict"] = "MISLEADING"
+            result["ai_analysis"] += f"\n\nSource: {credibility['domain']} is listed as a known disinformation domain."
+        elif credibility["category"] == "publisher" and score >= 70:
+            result["risk_score"] = max(0, result["risk_score"] - (score - 50) // 3)
+            result["ai_analysis"] += f"\n\nSource: {credibility['domain']} is an established publisher (credibility {score}/100)."
+        
+        return result
+    
     async def _analyze_document(self, analysis_data: Dict[str, Any], language: str, include_sources: bool, include_reporting: bool) -> Dict[str, Any]:
         """Analyze document content"""
         try:
             file_path = analysis_data.get("file_path")
             content_type = analysis_data.get("content_type", "")
             
-            # Extract text from document
-            if content_type == "application/pdf":
-                # PDF extraction logic would go here
-                content = "PDF content extraction not implemented yet"
-            elif content_type == "text/plain":
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
+            # Extract text from document, page by page and capped in size
+            extraction = None
+            if content_type in ("application/pdf", "text/plain"):
+                extraction = await self.document_extractor.extract(file_path, content_type)
+                content = extraction["text"]
             else:
                 content = "Document type not supported"
             
+            # Images embedded in the document get their own forensic pass
+            embedded_images = []
+            if extraction and extraction["images"]:
+                image_results = await asyncio.gather(*(
+                    self.image_forensics.analyze_bytes(image["data"], language)
+                    for image in extraction["images"]
+                ))
+                embedded_images = [
+                    {
+                        "page": image["page"],
+                        "name": image["name"],
+                        "verdict": image_result.get("verdict", "UNVERIFIED"),
+                        "risk_score": image_result.get("risk_score", 0),
+                        "manipulated": image_result.get("manipulation_analysis", {}).get("manipulated", False)
+                    }
+                    for image, image_result in zip(extraction["images"], image_results)
+                ]
+            
             # Analyze extracted content
             text_result = await self.text_analyzer.analyze(content, language)
             tactics_result = await self.tactics_analyzer.analyze(content, language)
@@ -251,6 +319,20 @@ class ComprehensiveAnalyzer:
                 "reporting_emails": []
             }
             
+            # A debunked or manipulated image outweighs an unremarkable text
+            riskiest = max(embedded_images, key=lambda image: image["risk_score"], default=None)
+            if riskiest and riskiest["verdict"] != "ERROR" and riskiest["risk_score"] > result["risk_score"]:
+                result["verdict"] = riskiest["verdict"]
+                result["risk_score"] = riskiest["risk_score"]
+            if embedded_images:
+                result["embedded_images"] = embedded_images
+            if extraction:
+                result["analysis_metadata"] = {
+                    "pages_extracted": extraction["pages_extracted"],
+                    "characters": extraction["characters"],
+                    "truncated": extraction["truncated"]
+                }
+            
             # Add sources if requested
             if include_sources:
                 source_result = await self.source_tracker.find_sources(content, language)
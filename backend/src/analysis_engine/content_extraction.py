@@ -0,0 +1,314 @@
+from typing import Dict, Any, List, Optional
+from html.parser import HTMLParser
+import codecs
+import re
+
+# Elements whose text never belongs to the article
+SKIP_TAGS = {
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe",
+    "nav", "header", "footer", "aside", "form", "button", "select", "textarea",
+}
+
+# Elements that can hold the article body
+CONTAINER_TAGS = {"body", "article", "main", "section", "div", "td"}
+
+# Elements that end a run of text
+BLOCK_TAGS = CONTAINER_TAGS | {
+    "p", "li", "ul", "ol", "h1", "h2", "h3", "h4", "h5", "h6",
+    "blockquote", "pre", "figcaption", "table", "tr", "dd", "dt", "br", "hr",
+}
+
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+    "meta", "param", "source", "track", "wbr",
+}
+
+POSITIVE_HINTS = re.compile(r"article|body|content|entry|main|post|story|text", re.I)
+NEGATIVE_HINTS = re.compile(
+    r"ad-|ads|banner|comment|cookie|footer|menu|modal|nav|newsletter|popup|"
+    r"promo|related|share|sidebar|social|sponsor|subscribe|widget",
+    re.I,
+)
+
+META_TITLE = ("og:title", "twitter:title")
+META_AUTHOR = ("author", "article:author", "byl", "parsely-author", "dc.creator")
+META_DATE = (
+    "article:published_time", "datepublished", "date", "pubdate",
+    "publish-date", "parsely-pub-date", "dc.date", "og:published_time",
+)
+
+MIN_SEGMENT_CHARS = 25
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_CHARSET_RE = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.I)
+
+
+class _Container:
+    __slots__ = ("id", "parent", "tag", "weight", "score")
+
+    def __init__(self, container_id: int, parent: Optional["_Container"], tag: str, weight: float):
+        self.id = container_id
+        self.parent = parent
+        self.tag = tag
+        self.weight = weight
+        self.score = 0.0
+
+
+class _ArticleParser(HTMLParser):
+    """Single-pass parser that collects text segments and page metadata"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack: List[str] = []
+        self.skip_depth = 0
+        self.link_depth = 0
+        self.containers: List[_Container] = []
+        self.container_stack: List[_Container] = []
+        self.segments: List[Dict[str, Any]] = []
+        self.block_tag = "div"
+        self.text_parts: List[str] = []
+        self.link_chars = 0
+        self.meta: Dict[str, str] = {}
+        self.title_parts: Optional[List[str]] = None
+        self.byline_parts: Optional[List[str]] = None
+        self.byline_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        attributes = {k: (v or "") for k, v in attrs}
+
+        if tag == "meta":
+            self._handle_meta(attributes)
+            return
+        if tag == "link":
+            rel = attributes.get("rel", "").lower()
+            if "canonical" in rel.split() and attributes.get("href"):
+                self.meta.setdefault("canonical", attributes["href"])
+            return
+        if tag == "time" and attributes.get("datetime"):
+            self.meta.setdefault("time", attributes["datetime"])
+        if attributes.get("itemprop") == "datePublished":
+            self.meta.setdefault("itemprop_date", attributes.get("content") or attributes.get("datetime", ""))
+
+        if tag in VOID_TAGS:
+            if tag in BLOCK_TAGS:
+                self._flush()
+            return
+
+        self.stack.append(tag)
+
+        if self.skip_depth or tag in SKIP_TAGS:
+            self.skip_depth += 1
+            return
+
+        if tag == "title" and "title" not in self.meta:
+            self.title_parts = []
+        elif self.byline_parts is None and "byline" not in self.meta and self._is_byline(tag, attributes):
+            self.byline_parts = []
+            self.byline_depth = len(self.stack)
+
+        if tag == "a":
+            self.link_depth += 1
+        if tag in BLOCK_TAGS:
+            self._flush()
+            self.block_tag = tag
+        if tag in CONTAINER_TAGS:
+            parent = self.container_stack[-1] if self.container_stack else None
+            container = _Container(len(self.containers), parent, tag, self._class_weight(attributes))
+            self.containers.append(container)
+            self.container_stack.append(container)
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS or tag not in self.stack:
+            return
+        # Pop implicitly closed elements as well (unclosed <p>, <li>, ...)
+        while self.stack:
+            open_tag = self.stack.pop()
+            self._close(open_tag)
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+        if self.title_parts is not None:
+            self.title_parts.append(data)
+            return
+        if self.byline_parts is not None:
+            self.byline_parts.append(data)
+        self.text_parts.append(data)
+        if self.link_depth:
+            self.link_chars += len(data.strip())
+
+    def close(self):
+        super().close()
+        while self.stack:
+            self._close(self.stack.pop())
+        self._flush()
+
+    def _close(self, tag: str):
+        if self.skip_depth:
+            self.skip_depth -= 1
+            return
+        if tag == "title" and self.title_parts is not None:
+            self.meta["title"] = _clean("".join(self.title_parts))
+            self.title_parts = None
+        if self.byline_parts is not None and len(self.stack) < self.byline_depth:
+            byline = _clean("".join(self.byline_parts))
+            if byline:
+                self.meta["byline"] = byline
+            self.byline_parts = None
+        if tag == "a" and self.link_depth:
+            self.link_depth -= 1
+        if tag in BLOCK_TAGS:
+            self._flush()
+        if tag in CONTAINER_TAGS and self.container_stack:
+            self.container_stack.pop()
+
+    def _flush(self):
+        text = _clean("".join(self.text_parts))
+        if text:
+            container = self.container_stack[-1] if self.container_stack else None
+            self.segments.append({
+                "text": text,
+                "tag": self.block_tag,
+                "link_chars": self.link_chars,
+                "container": container,
+            })
+        self.text_parts = []
+        self.link_chars = 0
+
+    def _handle_meta(self, attributes: Dict[str, str]):
+        key = (attributes.get("property") or attributes.get("name") or attributes.get("itemprop") or "").lower()
+        value = attributes.get("content", "").strip()
+        if not key or not value:
+            return
+        if key in META_TITLE:
+            self.meta.setdefault("og_title", value)
+        elif key in META_AUTHOR:
+            self.meta.setdefault("meta_author", value)
+        elif key in META_DATE:
+            self.meta.setdefault("meta_date", value)
+        elif key == "og:url":
+            self.meta.setdefault("og_url", value)
+
+    def _is_byline(self, tag: str, attributes: Dict[str, str]) -> bool:
+        if attributes.get("itemprop") == "author" or attributes.get("rel") == "author":
+            return True
+        hints = f"{attributes.get('class', '')} {attributes.get('id', '')}".lower()
+        return tag in ("span", "div", "p", "a", "address") and ("byline" in hints or "author" in hints)
+
+    def _class_weight(self, attributes: Dict[str, str]) -> float:
+        hints = f"{attributes.get('class', '')} {attributes.get('id', '')}"
+        if not hints.strip():
+            return 1.0
+        weight = 1.0
+        if POSITIVE_HINTS.search(hints):
+            weight += 0.25
+        if NEGATIVE_HINTS.search(hints):
+            weight -= 0.5
+        return weight
+
+
+def _clean(text: str) -> str:
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+class ContentExtractor:
+    """
+    Main-content extraction for news and article pages.
+
+    Parses the page incrementally, drops script / style / navigation
+    chrome and selects the article body with a text-density heuristic.
+    """
+
+    def __init__(self, max_chars: int = 20000):
+        self.max_chars = max_chars
+
+    def extract(self, html: bytes, encoding: Optional[str] = None) -> Dict[str, Any]:
+        """Extract title, byline, publish date, canonical URL and body text"""
+        parser = _ArticleParser()
+        decoder = codecs.getincrementaldecoder(self._detect_encoding(html, encoding))(errors="replace")
+
+        view = memoryview(html)
+        for start in range(0, len(view), CHUNK_SIZE):
+            parser.feed(decoder.decode(view[start:start + CHUNK_SIZE]))
+        parser.feed(decoder.decode(b"", final=True))
+        parser.close()
+
+        content = self._select_body(parser.segments)
+        meta = parser.meta
+
+        return {
+            "title": meta.get("og_title") or meta.get("title") or "",
+            "byline": meta.get("meta_author") or meta.get("byline") or "",
+            "published": meta.get("meta_date") or meta.get("itemprop_date") or meta.get("time") or "",
+            "canonical_url": meta.get("canonical") or meta.get("og_url") or "",
+            "content": content[:self.max_chars],
+            "word_count": len(content.split()),
+        }
+
+    def _detect_encoding(self, html: bytes, encoding: Optional[str]) -> str:
+        candidates = [encoding]
+        match = _CHARSET_RE.search(html[:2048])
+        if match:
+            candidates.append(match.group(1).decode("ascii", "ignore"))
+        for candidate in candidates:
+            if not candidate:
+                continue
+            try:
+                return codecs.lookup(candidate).name
+            except LookupError:
+                continue
+        return "utf-8"
+
+    def _select_body(self, segments: List[Dict[str, Any]]) -> str:
+        """Score containers by the density of non-link text they hold"""
+        best = None
+        for segment in segments:
+            container = segment["container"]
+            if container is None or segment["tag"] in HEADING_TAGS:
+                continue
+            length = len(segment["text"])
+            if length < MIN_SEGMENT_CHARS:
+                continue
+
+            link_density = segment["link_chars"] / length
+            score = (1 + segment["text"].count(",") + min(length // 100, 3)) * (1 - link_density)
+            if segment["tag"] == "p":
+                score *= 1.5
+
+            # Credit the direct container fully and its ancestors partially
+            share = 1.0
+            node = container
+            while node is not None and share >= 0.25:
+                node.score += score * share * node.weight
+                if best is None or node.score > best.score:
+                    best = node
+                node = node.parent
+                share /= 2
+
+        if best is None:
+            return " ".join(segment["text"] for segment in segments)
+
+        paragraphs = []
+        for segment in segments:
+            if not self._within(segment["container"], best):
+                continue
+            text = segment["text"]
+            if segment["link_chars"] / len(text) > 0.5:
+                continue
+            if len(text) < MIN_SEGMENT_CHARS and segment["tag"] not in HEADING_TAGS:
+                continue
+            paragraphs.append(text)
+
+        return "\n\n".join(paragraphs)
+
+    def _within(self, container: Optional[_Container], ancestor: _Container) -> bool:
+        while container is not None:
+            if container is ancestor:
+                return True
+            container = container.parent
+        return False
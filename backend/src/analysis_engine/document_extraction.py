@@ -0,0 +1,228 @@
+"""
+Streaming text extraction for uploaded documents.
+
+PDF pages are extracted in ranges on the shared forensics process pool,
+a bounded window of ranges at a time, and yielded in page order; a
+worker reopens the file from disk rather than receiving it, so only the
+text of the ranges in flight is ever held. Plain text is decoded
+incrementally after sniffing its encoding. Both stop once
+MAX_DOCUMENT_CHARS have been produced.
+
+PDF support needs the optional ``pypdf`` package.
+"""
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from contextlib import aclosing
+import asyncio
+import codecs
+import os
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # PDF extraction is unavailable without pypdf
+    PdfReader = None
+
+try:
+    from charset_normalizer import from_bytes as detect_charset
+except ImportError:
+    detect_charset = None
+
+from .forensics_pool import get_forensics_pool
+
+MAX_DOCUMENT_CHARS = int(os.getenv("DOCUMENT_MAX_CHARS", 200_000))
+MAX_DOCUMENT_PAGES = 2000
+PAGES_PER_TASK = 8
+TEXT_CHUNK_BYTES = 64 * 1024
+
+# Embedded images worth a forensic pass: photos, not icons or rules
+MAX_EMBEDDED_IMAGES = 8
+MIN_EMBEDDED_IMAGE_PIXELS = 200 * 200
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+# The reader of the last file a worker opened; consecutive ranges of one
+# document then parse its cross-reference table once per worker
+_worker_reader: Tuple[Optional[Tuple[str, float]], Any] = (None, None)
+
+
+def detect_encoding(sample: bytes) -> str:
+    """Encoding of a text file from its first bytes"""
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+    try:
+        sample.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # A character cut at the end of the sample is still UTF-8
+        if e.start >= len(sample) - 3 and e.reason == "unexpected end of data":
+            return "utf-8"
+    if detect_charset is not None:
+        match = detect_charset(sample).best()
+        if match is not None:
+            return codecs.lookup(match.encoding).name
+    return "cp1252"
+
+
+def _open_pdf(path: str):
+    global _worker_reader
+    key = (path, os.path.getmtime(path))
+    if _worker_reader[0] != key:
+        reader = PdfReader(path)
+        if reader.is_encrypted:
+            reader.decrypt("")
+        _worker_reader = (key, reader)
+    return _worker_reader[1]
+
+
+def _extract_page_range(path: str, start: int, stop: int, max_images: int) -> List[Dict[str, Any]]:
+    """Worker entry point: text and large embedded images of pages [start, stop)"""
+    reader = _open_pdf(path)
+    pages = []
+    for index in range(start, stop):
+        page = reader.pages[index]
+        try:
+            text = page.extract_text() or ""
+        except Exception:
+            text = ""
+
+        images = []
+        if max_images > 0:
+            for name in _large_image_names(page):
+                try:
+                    image = page.images[name]
+                except Exception:
+                    continue
+                images.append({"page": index + 1, "name": image.name, "data": image.data})
+                max_images -= 1
+                if max_images == 0:
+                    break
+        pages.append({"page": index + 1, "text": text, "images": images})
+    return pages
+
+
+def _large_image_names(page) -> List[str]:
+    """Image XObjects of a page above the size threshold, read from their
+    dictionaries so small images are never decoded"""
+    resources = page.get("/Resources")
+    xobjects = resources.get_object().get("/XObject") if resources else None
+    if not xobjects:
+        return []
+    names = []
+    for name, reference in xobjects.get_object().items():
+        xobject = reference.get_object()
+        if xobject.get("/Subtype") != "/Image":
+            continue
+        if int(xobject.get("/Width", 0)) * int(xobject.get("/Height", 0)) >= MIN_EMBEDDED_IMAGE_PIXELS:
+            names.append(name)
+    return names
+
+
+class DocumentExtractor:
+    """Page-by-page text extraction with a total size cap"""
+
+    def __init__(self, max_chars: int = MAX_DOCUMENT_CHARS):
+        self.max_chars = max_chars
+        self.pool = get_forensics_pool()
+
+    async def extract(self, path: str, content_type: str) -> Dict[str, Any]:
+        """
+        Collected text of a document, up to ``max_chars``, with the
+        embedded images found along the way
+        """
+        parts: List[str] = []
+        images: List[Dict[str, Any]] = []
+        length = 0
+        pages = 0
+        truncated = False
+        # Closing the generator early cancels the ranges still in flight
+        async with aclosing(self.iter_text(path, content_type)) as chunks:
+            async for chunk in chunks:
+                pages = chunk.get("page", pages)
+                images.extend(chunk.get("images", ()))
+                text = chunk["text"]
+                if length + len(text) > self.max_chars:
+                    text = text[:self.max_chars - length]
+                    truncated = True
+                parts.append(text)
+                length += len(text)
+                if truncated:
+                    break
+
+        return {
+            "text": "".join(parts),
+            "characters": length,
+            "pages_extracted": pages,
+            "truncated": truncated,
+            "images": images[:MAX_EMBEDDED_IMAGES]
+        }
+
+    async def iter_text(self, path: str, content_type: str) -> AsyncIterator[Dict[str, Any]]:
+        """Text in document order; PDF chunks also carry page and images"""
+        if content_type == "application/pdf":
+            async for page in self.iter_pdf_pages(path):
+                yield page
+        elif content_type == "text/plain":
+            async for text in self.iter_text_file(path):
+                yield {"text": text}
+        else:
+            raise ValueError(f"Document type {content_type} not supported")
+
+    async def iter_pdf_pages(self, path: str) -> AsyncIterator[Dict[str, Any]]:
+        if PdfReader is None:
+            raise RuntimeError("PDF extraction requires the pypdf package")
+
+        page_count = await asyncio.to_thread(lambda: len(PdfReader(path).pages))
+        ranges = [
+            (start, min(start + PAGES_PER_TASK, page_count, MAX_DOCUMENT_PAGES))
+            for start in range(0, min(page_count, MAX_DOCUMENT_PAGES), PAGES_PER_TASK)
+        ]
+        # Enough ranges in flight to keep every worker busy, few enough
+        # that memory does not grow with the page count
+        window = self.pool.max_workers * 2
+        in_flight: List[asyncio.Future] = []
+        produced = 0
+        images_left = MAX_EMBEDDED_IMAGES
+        try:
+            for start, stop in ranges:
+                in_flight.append(asyncio.ensure_future(
+                    self.pool.run_task(_extract_page_range, path, start, stop, images_left)
+                ))
+                if len(in_flight) < window:
+                    continue
+                async for page in self._drain(in_flight.pop(0)):
+                    images_left -= len(page["images"])
+                    produced += len(page["text"])
+                    yield page
+                if produced >= self.max_chars:
+                    return
+            while in_flight:
+                async for page in self._drain(in_flight.pop(0)):
+                    yield page
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    async def _drain(self, future: asyncio.Future) -> AsyncIterator[Dict[str, Any]]:
+        for page in await future:
+            yield page
+
+    async def iter_text_file(self, path: str) -> AsyncIterator[str]:
+        """Decoded text of a plain-text file, one read chunk at a time"""
+        with open(path, "rb") as f:
+            chunk = await asyncio.to_thread(f.read, TEXT_CHUNK_BYTES)
+            decoder = codecs.getincrementaldecoder(detect_encoding(chunk))(errors="replace")
+            produced = 0
+            while chunk:
+                text = decoder.decode(chunk)
+                produced += len(text)
+                yield text
+                if produced >= self.max_chars:
+                    return
+                chunk = await asyncio.to_thread(f.read, TEXT_CHUNK_BYTES)
+            yield decoder.decode(b"", final=True)
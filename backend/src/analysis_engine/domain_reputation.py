@@ -0,0 +1,210 @@
+"""
+Domain reputation store for source credibility scoring.
+
+Publisher and disinformation-domain lists are compiled into one binary
+file of sorted reversed-label keys ("com.example.news") that is
+memory-mapped at startup. A host is matched against its registered
+suffixes, most specific first, so subdomains inherit their parent's
+reputation unless listed themselves.
+
+File layout (little endian):
+    b"DREP" | u32 header length | header JSON
+    u32 key offsets (count + 1) | u8 scores (count) | u8 categories (count)
+    key bytes
+
+Build from lists with one ``domain[,score]`` entry per line:
+    python -m analysis_engine.domain_reputation build --out data/domain_reputation.bin \\
+        --publishers publishers.csv --disinformation disinfo.txt
+"""
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit
+import argparse
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+DOMAIN_REPUTATION_PATH = os.getenv(
+    "DOMAIN_REPUTATION_PATH", os.path.join("data", "domain_reputation.bin")
+)
+
+MAGIC = b"DREP"
+CATEGORIES = ["unknown", "publisher", "disinformation"]
+
+DEFAULT_PUBLISHER_SCORE = 80
+DEFAULT_DISINFORMATION_SCORE = 5
+
+
+def reverse_host(host: str) -> str:
+    return ".".join(reversed(host.lower().strip(".").split(".")))
+
+
+def _host_of(url_or_host: str) -> str:
+    if "/" in url_or_host or ":" in url_or_host:
+        if "://" not in url_or_host:
+            url_or_host = "//" + url_or_host
+        return urlsplit(url_or_host).hostname or ""
+    return url_or_host
+
+
+class DomainReputation:
+    """Read-only, memory-mapped domain reputation lookups"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._count = 0
+        self._offsets = np.zeros(1, dtype=np.uint32)
+        self._scores = np.zeros(0, dtype=np.uint8)
+        self._categories = np.zeros(0, dtype=np.uint8)
+        self._keys = b""
+        self._keys_start = 0
+
+        if path and os.path.exists(path):
+            self._load(path)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def lookup(self, url_or_host: str) -> Optional[Dict[str, Any]]:
+        """Reputation of the most specific listed suffix of a host"""
+        host = _host_of(url_or_host)
+        if not host or not self._count:
+            return None
+
+        labels = reverse_host(host).split(".")
+        for depth in range(len(labels), 0, -1):
+            key = ".".join(labels[:depth]).encode("utf-8")
+            index = self._find(key)
+            if index is not None:
+                return {
+                    "domain": ".".join(reversed(labels[:depth])),
+                    "score": int(self._scores[index]),
+                    "category": CATEGORIES[self._categories[index]],
+                }
+        return None
+
+    def _find(self, key: bytes) -> Optional[int]:
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            current = self._key(middle)
+            if current < key:
+                low = middle + 1
+            elif current > key:
+                high = middle
+            else:
+                return middle
+        return None
+
+    def _key(self, index: int) -> bytes:
+        start = self._keys_start + int(self._offsets[index])
+        end = self._keys_start + int(self._offsets[index + 1])
+        return self._keys[start:end]
+
+    def _load(self, path: str):
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[:4] != MAGIC:
+            mapped.close()
+            raise ValueError(f"{path} is not a domain reputation file")
+
+        header_length = struct.unpack_from("<I", mapped, 4)[0]
+        header = json.loads(mapped[8:8 + header_length])
+        count = header["count"]
+        position = 8 + header_length
+
+        self._offsets = np.frombuffer(mapped, dtype="<u4", count=count + 1, offset=position)
+        position += 4 * (count + 1)
+        self._scores = np.frombuffer(mapped, dtype=np.uint8, count=count, offset=position)
+        position += count
+        self._categories = np.frombuffer(mapped, dtype=np.uint8, count=count, offset=position)
+        position += count
+
+        self._keys = mapped
+        self._keys_start = position
+        self._count = count
+
+
+def write_reputation_file(entries: Dict[str, Tuple[int, str]], path: str):
+    """Compile {domain: (score, category)} into the binary lookup format"""
+    keys = sorted((reverse_host(domain).encode("utf-8"), value) for domain, value in entries.items())
+
+    offsets = np.zeros(len(keys) + 1, dtype="<u4")
+    scores = np.zeros(len(keys), dtype=np.uint8)
+    categories = np.zeros(len(keys), dtype=np.uint8)
+    blob = bytearray()
+    for i, (key, (score, category)) in enumerate(keys):
+        blob += key
+        offsets[i + 1] = len(blob)
+        scores[i] = max(0, min(100, score))
+        categories[i] = CATEGORIES.index(category)
+
+    header = json.dumps({"version": 1, "count": len(keys), "categories": CATEGORIES}).encode("utf-8")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        f.write(offsets.tobytes())
+        f.write(scores.tobytes())
+        f.write(categories.tobytes())
+        f.write(bytes(blob))
+    os.replace(tmp_path, path)
+
+
+def read_domain_list(path: str, default_score: int) -> List[Tuple[str, int]]:
+    """``domain[,score]`` lines; blank lines and # comments are skipped"""
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            fields = [field.strip() for field in line.split(",")]
+            domain = _host_of(fields[0]) or fields[0]
+            if domain.startswith("www."):
+                domain = domain[4:]
+            score = default_score
+            if len(fields) > 1 and fields[1].isdigit():
+                score = int(fields[1])
+            entries.append((domain.lower(), score))
+    return entries
+
+
+_reputation: Optional[DomainReputation] = None
+
+
+def get_domain_reputation() -> DomainReputation:
+    global _reputation
+    if _reputation is None:
+        _reputation = DomainReputation(DOMAIN_REPUTATION_PATH)
+    return _reputation
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile domain reputation lists")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build")
+    build.add_argument("--out", default=DOMAIN_REPUTATION_PATH)
+    build.add_argument("--publishers", nargs="*", default=[])
+    build.add_argument("--disinformation", nargs="*", default=[])
+    args = parser.parse_args(argv)
+
+    entries: Dict[str, Tuple[int, str]] = {}
+    for path in args.publishers:
+        for domain, score in read_domain_list(path, DEFAULT_PUBLISHER_SCORE):
+            entries[domain] = (score, "publisher")
+    # Disinformation listings take precedence over publisher listings
+    for path in args.disinformation:
+        for domain, score in read_domain_list(path, DEFAULT_DISINFORMATION_SCORE):
+            entries[domain] = (score, "disinformation")
+
+    write_reputation_file(entries, args.out)
+    print(f"Wrote {len(entries)} domains to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+Offline BM25 index over trusted-source articles and fact-check records.
+
+On-disk layout (one directory):
+    meta.json      corpus statistics and BM25 parameters
+    lexicon.json   term -> [postings offset, document frequency]
+    postings.bin   per term: uint32 doc ids followed by uint32 term counts
+    doclens.bin    uint32 token count per document
+    docs.jsonl     stored reference fields, one document per line
+    docs.idx       uint64 byte offset of each line in docs.jsonl
+
+The binary files are memory-mapped and read as zero-copy NumPy views.
+
+Build or extend an index from JSONL dumps:
+    python -m analysis_engine.evidence_index build --out data/evidence_index dump.jsonl ...
+    python -m analysis_engine.evidence_index add --index data/evidence_index new.jsonl ...
+"""
+from typing import Dict, Any, List, Optional, Iterable
+from array import array
+from collections import Counter
+import argparse
+import json
+import math
+import mmap
+import os
+import re
+
+import numpy as np
+
+EVIDENCE_INDEX_DIR = os.getenv("EVIDENCE_INDEX_DIR", os.path.join("data", "evidence_index"))
+
+K1 = 1.2
+B = 0.75
+MAX_QUERY_TERMS = 32
+MIN_SCORE = 0.01
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "has",
+    "have", "in", "is", "it", "its", "of", "on", "or", "that", "the", "this", "to",
+    "was", "were", "will", "with", "not", "they", "their", "you", "we", "he", "she",
+}
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    return [
+        token for token in _TOKEN_RE.findall(text.lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def _document_fields(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a trusted-article or fact-check record onto a source reference"""
+    name = record.get("title") or record.get("claim") or record.get("name") or ""
+    body = record.get("text") or record.get("content") or record.get("description") or ""
+    rating = record.get("rating") or record.get("verdict")
+    publisher = record.get("publisher") or record.get("source") or ""
+
+    description = record.get("description") or ""
+    if rating:
+        description = f"{publisher} rating: {rating}".strip() if publisher else f"Rating: {rating}"
+    elif not description:
+        description = publisher or body[:200]
+
+    parts = [name, body]
+    if record.get("claim") and record["claim"] != name:
+        parts.append(record["claim"])
+
+    return {
+        "name": name,
+        "description": description,
+        "url": record.get("url", ""),
+        "text": " ".join(parts),
+    }
+
+
+class EvidenceIndex:
+    """
+    BM25 ranked inverted index.
+
+    Postings live in a memory-mapped segment written by ``save``; documents
+    added afterwards go to an in-memory delta segment that is searched
+    alongside it until the next ``save`` merges the two.
+    """
+
+    def __init__(self, index_dir: Optional[str] = None):
+        self.index_dir = index_dir
+        self._docs_file = None
+        self._maps: List[mmap.mmap] = []
+        self._reset()
+
+        if index_dir and os.path.exists(os.path.join(index_dir, "meta.json")):
+            self._load(index_dir)
+
+    def _reset(self):
+        self._lexicon: Dict[str, List[int]] = {}
+        self._postings = np.zeros(0, dtype=np.uint32)
+        self._doclens = np.zeros(0, dtype=np.uint32)
+        self._doc_offsets = np.zeros(0, dtype=np.uint64)
+        self._total_tokens = 0
+        self._length_norm = None
+
+        # Delta segment
+        self._delta_postings: Dict[str, List[array]] = {}
+        self._delta_doclens = array("I")
+        self._delta_docs: List[Dict[str, Any]] = []
+
+    @property
+    def num_docs(self) -> int:
+        return len(self._doclens) + len(self._delta_doclens)
+
+    def add_documents(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Index records into the delta segment"""
+        added = 0
+        for record in records:
+            doc = _document_fields(record)
+            tokens = tokenize(doc.pop("text"))
+            if not tokens or not doc["url"]:
+                continue
+            doc_id = self.num_docs
+            for term, count in Counter(tokens).items():
+                postings = self._delta_postings.get(term)
+                if postings is None:
+                    postings = self._delta_postings[term] = [array("I"), array("I")]
+                postings[0].append(doc_id)
+                postings[1].append(count)
+            self._delta_doclens.append(len(tokens))
+            self._delta_docs.append(doc)
+            self._total_tokens += len(tokens)
+            added += 1
+        self._length_norm = None
+        return added
+
+    def search(self, text: str, k: int = 5) -> List[Dict[str, Any]]:
+        """Top-k documents for a free-text query"""
+        total_docs = self.num_docs
+        if not total_docs:
+            return []
+
+        if self._length_norm is None:
+            avg_len = self._total_tokens / total_docs
+            self._length_norm = K1 * (1 - B + B * self._all_doclens() / avg_len)
+        norm = self._length_norm
+
+        query_terms = Counter(tokenize(text))
+        weighted = []
+        for term, query_count in query_terms.items():
+            df = self._document_frequency(term)
+            if df:
+                idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+                weighted.append((idf * query_count, idf, term))
+        # Long inputs: keep the most discriminative terms
+        weighted.sort(reverse=True)
+
+        scores = np.zeros(total_docs, dtype=np.float32)
+        for _, idf, term in weighted[:MAX_QUERY_TERMS]:
+            for doc_ids, counts in self._term_postings(term):
+                tf = counts.astype(np.float32)
+                scores[doc_ids] += idf * tf * (K1 + 1) / (tf + norm[doc_ids])
+
+        k = min(k, total_docs)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for doc_id in top:
+            score = float(scores[doc_id])
+            if score < MIN_SCORE:
+                break
+            doc = self._document(int(doc_id))
+            doc["score"] = round(score, 3)
+            results.append(doc)
+        return results
+
+    def save(self, index_dir: Optional[str] = None):
+        """Merge the delta segment and write the index to disk"""
+        index_dir = index_dir or self.index_dir
+        os.makedirs(index_dir, exist_ok=True)
+
+        tmp = lambda name: os.path.join(index_dir, name + ".tmp")  # noqa: E731
+
+        lexicon = self._write_postings(tmp("postings.bin"))
+
+        with open(tmp("doclens.bin"), "wb") as f:
+            f.write(self._all_doclens().astype(np.uint32).tobytes())
+
+        offsets = array("Q")
+        with open(tmp("docs.jsonl"), "wb") as f:
+            position = 0
+            for doc_id in range(self.num_docs):
+                line = (json.dumps(self._document(doc_id)) + "\n").encode("utf-8")
+                offsets.append(position)
+                f.write(line)
+                position += len(line)
+        with open(tmp("docs.idx"), "wb") as f:
+            offsets.tofile(f)
+
+        with open(tmp("lexicon.json"), "w") as f:
+            json.dump(lexicon, f, separators=(",", ":"))
+        with open(tmp("meta.json"), "w") as f:
+            json.dump({
+                "version": 1,
+                "num_docs": self.num_docs,
+                "total_tokens": self._total_tokens,
+                "num_terms": len(lexicon),
+                "k1": K1,
+                "b": B,
+            }, f)
+
+        self.close()
+        for name in ("postings.bin", "doclens.bin", "docs.jsonl", "docs.idx", "lexicon.json", "meta.json"):
+            os.replace(tmp(name), os.path.join(index_dir, name))
+
+        self.index_dir = index_dir
+        self._load(index_dir)
+
+    def _write_postings(self, path: str) -> Dict[str, List[int]]:
+        """Write merged postings for every term; returns the new lexicon"""
+        lexicon = {}
+        offset = 0
+        with open(path, "wb") as f:
+            for term in sorted(set(self._lexicon) | set(self._delta_postings)):
+                segments = list(self._term_postings(term))
+                doc_ids = np.concatenate([ids for ids, _ in segments])
+                f.write(doc_ids.tobytes())
+                f.write(np.concatenate([counts for _, counts in segments]).tobytes())
+                lexicon[term] = [offset, len(doc_ids)]
+                offset += 2 * len(doc_ids)
+        return lexicon
+
+    def close(self):
+        # Drop the NumPy views before unmapping their buffers
+        self._reset()
+        for mapped in self._maps:
+            mapped.close()
+        self._maps = []
+        if self._docs_file:
+            self._docs_file.close()
+            self._docs_file = None
+
+    def _load(self, index_dir: str):
+        with open(os.path.join(index_dir, "meta.json")) as f:
+            meta = json.load(f)
+        with open(os.path.join(index_dir, "lexicon.json")) as f:
+            self._lexicon = json.load(f)
+        self._postings = self._map(os.path.join(index_dir, "postings.bin"), np.uint32)
+        self._doclens = self._map(os.path.join(index_dir, "doclens.bin"), np.uint32)
+        self._doc_offsets = self._map(os.path.join(index_dir, "docs.idx"), np.uint64)
+        self._docs_file = open(os.path.join(index_dir, "docs.jsonl"), "rb")
+        self._total_tokens = meta["total_tokens"]
+        self._length_norm = None
+
+    def _map(self, path: str, dtype) -> np.ndarray:
+        if os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=dtype)
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return np.frombuffer(mapped, dtype=dtype)
+
+    def _all_doclens(self) -> np.ndarray:
+        if not self._delta_doclens:
+            return self._doclens.astype(np.float32)
+        delta = np.frombuffer(self._delta_doclens, dtype=np.uint32)
+        return np.concatenate([self._doclens, delta]).astype(np.float32)
+
+    def _document_frequency(self, term: str) -> int:
+        df = 0
+        entry = self._lexicon.get(term)
+        if entry:
+            df += entry[1]
+        delta = self._delta_postings.get(term)
+        if delta:
+            df += len(delta[0])
+        return df
+
+    def _term_postings(self, term: str):
+        """(doc ids, term counts) array pairs from each segment"""
+        entry = self._lexicon.get(term)
+        if entry:
+            offset, df = entry
+            yield self._postings[offset:offset + df], self._postings[offset + df:offset + 2 * df]
+        delta = self._delta_postings.get(term)
+        if delta:
+            yield np.frombuffer(delta[0], dtype=np.uint32), np.frombuffer(delta[1], dtype=np.uint32)
+
+    def _document(self, doc_id: int) -> Dict[str, Any]:
+        stored = len(self._doclens)
+        if doc_id >= stored:
+            return dict(self._delta_docs[doc_id - stored])
+        self._docs_file.seek(int(self._doc_offsets[doc_id]))
+        return json.loads(self._docs_file.readline())
+
+
+def read_jsonl(paths: Iterable[str]):
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+_index: Optional[EvidenceIndex] = None
+
+
+def get_evidence_index() -> EvidenceIndex:
+    global _index
+    if _index is None:
+        _index = EvidenceIndex(EVIDENCE_INDEX_DIR)
+    return _index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the offline evidence index")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Build a new index from JSONL dumps")
+    build.add_argument("--out", default=EVIDENCE_INDEX_DIR)
+    build.add_argument("inputs", nargs="+")
+
+    add = commands.add_parser("add", help="Add JSONL dumps to an existing index")
+    add.add_argument("--index", default=EVIDENCE_INDEX_DIR)
+    add.add_argument("inputs", nargs="+")
+
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        index = EvidenceIndex()
+        index_dir = args.out
+    else:
+        index = EvidenceIndex(args.index)
+        index_dir = args.index
+
+    added = index.add_documents(read_jsonl(args.inputs))
+    index.save(index_dir)
+    print(f"Indexed {added} documents ({index.num_docs} total) into {index_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,569 @@
+"""
+CPU-bound forensic stages.
+
+Plain module-level functions over NumPy arrays so they can run inside
+worker processes of the forensics pool. Every detector works on a
+bounded-size proxy of the grayscale plane, so cost grows only with the
+linear-time downscale once images exceed the working size.
+"""
+from typing import Dict, Any, List, Optional, Tuple
+import base64
+
+import cv2
+import numpy as np
+
+# Working size for the global detectors
+MAX_WORK_PIXELS = 2_000_000
+
+# Copy-move detection
+BLOCK = 8
+DCT_COEFFICIENTS = [(0, 0), (0, 1), (1, 0), (1, 1), (0, 2), (2, 0)]
+DCT_STEPS = [24, 16, 16, 16, 16, 16]
+MIN_BLOCK_STD = 4.0
+MIN_SHIFT = 16
+MIN_CLUSTER_PAIRS = 64
+MAX_CANDIDATE_SHIFTS = 8
+# Shifts this close (in pixels) to a stronger one belong to the same clone
+SHIFT_RADIUS = 2
+# A block equals its shifted copy within this mean absolute difference
+# (grey levels, or this share of its standard deviation if larger)
+MAX_BLOCK_DIFF = 3.0
+MAX_BLOCK_DIFF_RATIO = 0.2
+# A cloned region is a connected area of verified blocks at least this
+# large (side in pixels and share of the image) and this densely filled
+MIN_REGION_SIDE = 24
+MIN_REGION_FRACTION = 0.0025
+MIN_REGION_FILL = 0.5
+# Share of a region's pixels that must carry sensor noise
+MIN_REGION_NOISE = 0.8
+# Median number of distinct shifts a region's blocks may match under
+MAX_SHIFTS_PER_BLOCK = 1
+
+# Lighting / edge consistency
+LIGHTING_SIDE = 256
+LIGHTING_TILE = 16
+# Honest photos and screenshots score down to about 0.5
+LIGHTING_MIN_CONSISTENCY = 0.45
+NOISE_TILE = 64
+NOISE_OUTLIER_MADS = 3.5
+# Fewer measurable tiles give no stable median to compare against
+NOISE_MIN_TILES = 16
+
+# Error level analysis
+ELA_QUALITY = 90
+ELA_BLOCK = 8
+ELA_TILE = 1024  # multiple of 16 so tiles keep the JPEG MCU grid
+ELA_MAX_PIXELS = 16_000_000
+ELA_HEATMAP_SIDE = 256
+ELA_OUTLIER_MADS = 4.0
+ELA_MIN_REGION_BLOCKS = 16
+ELA_MAX_REGIONS = 4
+# Share of the smaller box two regions must share to corroborate each other
+REGION_MIN_OVERLAP = 0.25
+REFINE_MAX_MARGIN = 512
+REFINE_MIN_CONTRAST = 1.5
+
+# Text presence
+TEXT_SIDE = 1024
+TEXT_MIN_CONTRAST = 32
+TEXT_MIN_ALIGNED = 2
+
+_IMMERKAER = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+_GRADIENT_KERNEL = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+
+
+def detect_manipulation(gray: np.ndarray) -> Dict[str, Any]:
+    """Combine the manipulation detectors into one score"""
+    work = _downscale(gray, MAX_WORK_PIXELS)
+
+    # Check for duplicate regions (copy-paste detection)
+    duplicate_regions, cloned_regions = find_duplicate_regions(work)
+
+    # Check for inconsistent lighting
+    lighting_consistency = check_lighting_consistency(work)
+
+    # Check for edge inconsistencies
+    edge_consistency = check_edge_consistency(work)
+
+    # Determine if manipulated. No signal decides on its own: repeated
+    # content is common in honest pictures, so a clone needs lighting or
+    # noise evidence as well (or ELA, which the caller weighs)
+    manipulation_score = 0.0
+    if duplicate_regions > 0.01:  # 1% of the image cloned
+        manipulation_score += 0.4
+    if lighting_consistency < LIGHTING_MIN_CONSISTENCY:  # Neighbouring regions lit from different directions
+        manipulation_score += 0.3
+    if edge_consistency < 0.95:  # Noise level differs across regions
+        manipulation_score += 0.3
+
+    return {
+        "manipulated": manipulation_score > 0.5,
+        "confidence": round(min(manipulation_score, 1.0), 2),
+        "duplicate_regions": duplicate_regions,
+        "cloned_regions": cloned_regions,
+        "lighting_consistency": lighting_consistency,
+        "edge_consistency": edge_consistency
+    }
+
+
+def find_duplicate_regions(image: np.ndarray) -> Tuple[float, List[List[float]]]:
+    """
+    Fraction of the image covered by copy-moved regions, and their boxes.
+
+    Every overlapping 8x8 block is described by its low-frequency DCT
+    coefficients, computed for all positions at once as separable
+    filters. Quantized coefficients are packed into one integer key and
+    sorted so identical blocks become neighbours; pairs of matches are
+    then clustered by shift vector. The strongest shifts are verified
+    densely, and a cloned region is a connected, noisy area above a
+    minimum size that matches under that one shift only and lies clear
+    of its copy. Boxes are normalised to 0-1, source before target.
+    """
+    image = _downscale(image, MAX_WORK_PIXELS).astype(np.float32)
+    height, width = image.shape
+    grid_h, grid_w = height - BLOCK + 1, width - BLOCK + 1
+    if grid_h < BLOCK or grid_w < BLOCK:
+        return 0.0, []
+
+    # Flat blocks (sky, walls) match everywhere and carry no evidence
+    mean = _block_filter(cv2.boxFilter, image)[:grid_h, :grid_w]
+    mean_sq = _block_filter(cv2.sqrBoxFilter, image)[:grid_h, :grid_w]
+    textured = np.flatnonzero((mean_sq - mean * mean).ravel() >= MIN_BLOCK_STD ** 2)
+    if textured.size < 2:
+        return 0.0, []
+
+    keys = np.zeros(grid_h * grid_w, dtype=np.int64)
+    basis = [_dct_basis(u) for u in range(3)]
+    for i, ((u, v), step) in enumerate(zip(DCT_COEFFICIENTS, DCT_STEPS)):
+        coefficient = cv2.sepFilter2D(
+            image, cv2.CV_32F, basis[v], basis[u], anchor=(0, 0), borderType=cv2.BORDER_CONSTANT
+        )[:grid_h, :grid_w]
+        quantized = np.rint(coefficient.ravel() / step).astype(np.int64)
+        offset = 0 if i == 0 else 64
+        keys |= np.clip(quantized + offset, 0, 127) << (7 * i)
+
+    # Lexicographic grouping of identical feature vectors
+    block_keys = keys[textured]
+    order = np.argsort(block_keys, kind="stable")
+    sorted_keys = block_keys[order]
+    same = sorted_keys[1:] == sorted_keys[:-1]
+    first = textured[order[:-1][same]]
+    second = textured[order[1:][same]]
+
+    first_y, first_x = np.divmod(first, grid_w)
+    second_y, second_x = np.divmod(second, grid_w)
+    shift_y = second_y - first_y
+    shift_x = second_x - first_x
+
+    # A shift and its negation describe the same clone
+    flip = (shift_x < 0) | ((shift_x == 0) & (shift_y < 0))
+    shift_y = np.where(flip, -shift_y, shift_y)
+    shift_x = np.where(flip, -shift_x, shift_x)
+
+    far = shift_y * shift_y + shift_x * shift_x >= MIN_SHIFT ** 2
+    if not far.any():
+        return 0.0, []
+    shift_codes = (shift_y[far] + grid_h) * (2 * grid_w + 1) + (shift_x[far] + grid_w)
+
+    codes, counts = np.unique(shift_codes, return_counts=True)
+    strong = counts >= MIN_CLUSTER_PAIRS
+    if not strong.any():
+        return 0.0, []
+
+    # A resampled clone spreads its matches over neighbouring shifts;
+    # keep the strongest shift of each neighbourhood
+    shifts = []
+    for code in codes[strong][np.argsort(counts[strong], kind="stable")[::-1]]:
+        shift_y, shift_x = divmod(int(code), 2 * grid_w + 1)
+        shift_y, shift_x = shift_y - grid_h, shift_x - grid_w
+        if all(max(abs(shift_y - y), abs(shift_x - x)) > SHIFT_RADIUS for y, x in shifts):
+            shifts.append((shift_y, shift_x))
+            if len(shifts) == MAX_CANDIDATE_SHIFTS:
+                break
+
+    # Key matches are sparse; verify each candidate shift densely and keep
+    # the textured positions whose block really equals the shifted block
+    std = np.sqrt(np.maximum(mean_sq - mean * mean, 0))
+    tolerance = np.maximum(MAX_BLOCK_DIFF, MAX_BLOCK_DIFF_RATIO * std)
+    textured_mask = std >= MIN_BLOCK_STD
+    verified = []
+    for shift_y, shift_x in shifts:
+        difference = _shifted_block_difference(image, shift_y, shift_x)[:grid_h, :grid_w]
+        verified.append((difference <= tolerance) & textured_mask)
+
+    # Glyphs, icons and regular textures repeat under many shifts; a block
+    # that equals its neighbour at several distinct offsets is no clone
+    multiplicity = np.sum(verified, axis=0, dtype=np.int32)
+
+    mask = np.zeros((grid_h, grid_w), dtype=np.uint8)
+    regions = []
+    min_blocks = MIN_REGION_FRACTION * grid_h * grid_w
+    closing = np.ones((BLOCK, BLOCK), np.uint8)
+    for (shift_y, shift_x), matched in zip(shifts, verified):
+        matched = cv2.morphologyEx(matched.astype(np.uint8), cv2.MORPH_CLOSE, closing)
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(matched, connectivity=8)
+        for label in range(1, count):
+            x, y, w, h, area = stats[label]
+            if min(w, h) < MIN_REGION_SIDE or area < min_blocks or area < MIN_REGION_FILL * w * h:
+                continue
+            # Lines, gradients and stripes match themselves when slid along
+            # their own direction; a moved copy lies clear of its source
+            if abs(shift_x) < w and abs(shift_y) < h:
+                continue
+            component = labels == label
+            if np.median(multiplicity[component]) > MAX_SHIFTS_PER_BLOCK:
+                continue
+            # Rendered graphics repeat shapes on flat, noiseless fills; a
+            # cloned piece of a photograph carries sensor noise throughout
+            patch = image[y:y + h + BLOCK - 1, x:x + w + BLOCK - 1]
+            residual = cv2.filter2D(patch, -1, _IMMERKAER, borderType=cv2.BORDER_REFLECT)
+            if np.count_nonzero(residual) < MIN_REGION_NOISE * residual.size:
+                continue
+            rows, cols = np.nonzero(component)
+            mask[rows, cols] = 1
+            rows, cols = rows + shift_y, cols + shift_x
+            inside = (rows >= 0) & (rows < grid_h) & (cols >= 0) & (cols < grid_w)
+            mask[rows[inside], cols[inside]] = 1
+            for left, top in ((x, y), (x + shift_x, y + shift_y)):
+                regions.append([
+                    round(float(left / width), 4), round(float(top / height), 4),
+                    round(float((left + w + BLOCK - 1) / width), 4),
+                    round(float((top + h + BLOCK - 1) / height), 4)
+                ])
+
+    if not regions:
+        return 0.0, []
+    mask = cv2.dilate(mask, np.ones((BLOCK, BLOCK), np.uint8), anchor=(0, 0))
+    return round(float(np.count_nonzero(mask)) / (height * width), 4), regions
+
+
+def check_lighting_consistency(image: np.ndarray) -> float:
+    """
+    Agreement of local illumination direction between neighbouring tiles.
+
+    The low-pass illumination field of a single-light scene changes
+    direction smoothly; a pasted object lit from elsewhere disagrees with
+    its surroundings. Returns the strength-weighted mean of
+    (1 + cos angle) / 2 between each tile's gradient and its neighbours'.
+    """
+    small = _downscale_side(image, LIGHTING_SIDE).astype(np.float32)
+    illumination = cv2.GaussianBlur(small, (0, 0), max(small.shape) / 32)
+    grad_x = cv2.Sobel(illumination, cv2.CV_32F, 1, 0, ksize=3)
+    grad_y = cv2.Sobel(illumination, cv2.CV_32F, 0, 1, ksize=3)
+
+    tiles_x = _tile_sums(grad_x, LIGHTING_TILE)
+    tiles_y = _tile_sums(grad_y, LIGHTING_TILE)
+    if tiles_x.size < 4:
+        return 1.0
+    strength = np.hypot(tiles_x, tiles_y)
+    if not strength.any():
+        return 1.0
+
+    # Mean direction of the eight neighbours of each tile
+    kernel = np.ones((3, 3), np.float32)
+    kernel[1, 1] = 0
+    neighbours_x = cv2.filter2D(tiles_x, -1, kernel, borderType=cv2.BORDER_REFLECT)
+    neighbours_y = cv2.filter2D(tiles_y, -1, kernel, borderType=cv2.BORDER_REFLECT)
+    neighbour_strength = np.hypot(neighbours_x, neighbours_y)
+
+    valid = (strength > 1e-6) & (neighbour_strength > 1e-6)
+    if not valid.any():
+        return 1.0
+    cosine = (tiles_x * neighbours_x + tiles_y * neighbours_y)[valid] / (strength * neighbour_strength)[valid]
+    agreement = (1 + cosine) / 2
+    weights = strength[valid]
+
+    return round(float((agreement * weights).sum() / weights.sum()), 4)
+
+
+def check_edge_consistency(image: np.ndarray) -> float:
+    """
+    Consistency of the sensor noise level across the image.
+
+    Noise is estimated per tile with Immerkaer's Laplacian-difference
+    operator over non-edge pixels. Spliced or retouched regions usually
+    carry a different noise level; the result is the share of tiles whose
+    noise is within a robust (median / MAD) band of the rest.
+    """
+    work = image.astype(np.float32)
+    response = np.abs(cv2.filter2D(work, -1, _IMMERKAER, borderType=cv2.BORDER_REFLECT))
+
+    # Texture and edges inflate the estimate; keep the flatter pixels
+    grad = np.abs(cv2.Sobel(work, cv2.CV_32F, 1, 0, ksize=3)) + np.abs(cv2.Sobel(work, cv2.CV_32F, 0, 1, ksize=3))
+    smooth = (grad < np.percentile(grad, 60)).astype(np.float32)
+    # Clipped shadows and highlights have no measurable noise
+    smooth *= ((work > 8) & (work < 247)).astype(np.float32)
+
+    noise_sum = _tile_sums(response * smooth, NOISE_TILE)
+    counts = _tile_sums(smooth, NOISE_TILE)
+    measurable = counts >= NOISE_TILE * NOISE_TILE * 0.1
+    if measurable.sum() < NOISE_MIN_TILES:
+        return 1.0
+
+    sigma = np.sqrt(np.pi / 2) / 6 * noise_sum[measurable] / counts[measurable]
+    log_sigma = np.log(sigma + 1e-3)
+    median = np.median(log_sigma)
+    mad = np.median(np.abs(log_sigma - median)) * 1.4826 + 0.05
+    outliers = np.abs(log_sigma - median) > NOISE_OUTLIER_MADS * mad
+
+    return round(1.0 - float(outliers.mean()), 4)
+
+
+def error_level_analysis(pixels: np.ndarray, quality: int = ELA_QUALITY) -> Dict[str, Any]:
+    """
+    Error level analysis: recompress at a known JPEG quality and measure
+    the per-block residual.
+
+    Regions pasted in from another source usually recompress differently
+    from the rest of the picture. Images above ELA_MAX_PIXELS are reduced
+    down a Gaussian pyramid first, and the image is processed in
+    MCU-aligned tiles so working memory stays at a few tiles regardless
+    of the image size. Returns residual statistics and a downsampled
+    uint8 heatmap encoded as base64 PNG.
+    """
+    levels = 0
+    while pixels.shape[0] * pixels.shape[1] > ELA_MAX_PIXELS:
+        pixels = cv2.pyrDown(pixels)
+        levels += 1
+
+    residuals = _residual_grid(pixels, quality)
+    if residuals is None:
+        return {"error": "Image too small for error level analysis"}
+
+    median = float(np.median(residuals))
+    mad = float(np.median(np.abs(residuals - median))) * 1.4826 + 0.1
+    outliers = residuals > median + ELA_OUTLIER_MADS * mad
+    scale = max(float(np.percentile(residuals, 99.5)), 1.0)
+
+    heatmap = _downscale_side(residuals, ELA_HEATMAP_SIDE)
+    heatmap = np.clip(heatmap * (255.0 / scale), 0, 255).astype(np.uint8)
+    _, png = cv2.imencode(".png", heatmap)
+
+    return {
+        "quality": quality,
+        "pyramid_levels": levels,
+        "mean_residual": round(float(residuals.mean()), 3),
+        "median_residual": round(median, 3),
+        "p99_residual": round(float(np.percentile(residuals, 99)), 3),
+        "max_residual": round(float(residuals.max()), 3),
+        "outlier_fraction": round(float(outliers.mean()), 4),
+        "regions": _outlier_regions(outliers),
+        "heatmap": {
+            "width": heatmap.shape[1],
+            "height": heatmap.shape[0],
+            "scale": round(scale, 3),
+            "png_base64": base64.b64encode(png.tobytes()).decode("ascii")
+        }
+    }
+
+
+def refine_regions(encoded: np.ndarray, regions: List[List[float]], quality: int = ELA_QUALITY) -> Dict[str, Any]:
+    """
+    Full-resolution error level analysis of suspicious regions.
+
+    ``encoded`` holds the compressed file; it is decoded here at native
+    resolution as a single grayscale plane, used for the regions only and
+    released with the worker's frame. Each region (normalised x0, y0, x1,
+    y1 from a proxy analysis) is compared with a margin of surrounding
+    context; a region whose residual clearly exceeds its surroundings is
+    confirmed.
+    """
+    gray = cv2.imdecode(encoded, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        return {"error": "Unable to decode image"}
+    height, width = gray.shape
+
+    refined = []
+    for x0, y0, x1, y1 in regions:
+        # Region and context box in pixels, snapped to the JPEG MCU grid
+        left, top = int(x0 * width) // 16 * 16, int(y0 * height) // 16 * 16
+        right, bottom = -(-int(x1 * width) // 16) * 16, -(-int(y1 * height) // 16) * 16
+        margin_x = min(max((right - left) // 2, 64), REFINE_MAX_MARGIN) // 16 * 16
+        margin_y = min(max((bottom - top) // 2, 64), REFINE_MAX_MARGIN) // 16 * 16
+        context_left, context_top = max(left - margin_x, 0), max(top - margin_y, 0)
+        context_right, context_bottom = min(right + margin_x, width), min(bottom + margin_y, height)
+
+        residuals = _residual_grid(gray[context_top:context_bottom, context_left:context_right], quality)
+        if residuals is None:
+            continue
+        inside = np.zeros(residuals.shape, dtype=bool)
+        inside[
+            (top - context_top) // ELA_BLOCK:(bottom - context_top) // ELA_BLOCK,
+            (left - context_left) // ELA_BLOCK:(right - context_left) // ELA_BLOCK
+        ] = True
+        if inside.all() or not inside.any():
+            continue
+
+        residual_inside = float(residuals[inside].mean())
+        residual_outside = float(residuals[~inside].mean())
+        contrast = (residual_inside + 0.1) / (residual_outside + 0.1)
+        refined.append({
+            "region": [x0, y0, x1, y1],
+            "pixels": [left, top, right, bottom],
+            "residual_inside": round(residual_inside, 3),
+            "residual_outside": round(residual_outside, 3),
+            "contrast": round(contrast, 2),
+            "confirmed": contrast >= REFINE_MIN_CONTRAST
+        })
+
+    return {"width": width, "height": height, "regions": refined}
+
+
+def _residual_grid(pixels: np.ndarray, quality: int) -> Optional[np.ndarray]:
+    """Per-8x8-block recompression residual, computed tile by tile"""
+    height, width = pixels.shape[:2]
+    grid_h, grid_w = height // ELA_BLOCK, width // ELA_BLOCK
+    if grid_h == 0 or grid_w == 0:
+        return None
+
+    residuals = np.zeros((grid_h, grid_w), dtype=np.float32)
+    for top in range(0, grid_h * ELA_BLOCK, ELA_TILE):
+        for left in range(0, grid_w * ELA_BLOCK, ELA_TILE):
+            bottom = min(top + ELA_TILE, grid_h * ELA_BLOCK)
+            right = min(left + ELA_TILE, grid_w * ELA_BLOCK)
+            tile = np.ascontiguousarray(pixels[top:bottom, left:right])
+            residuals[top // ELA_BLOCK:bottom // ELA_BLOCK, left // ELA_BLOCK:right // ELA_BLOCK] = \
+                _tile_residuals(tile, quality)
+    return residuals
+
+
+def regions_overlap(regions: List[List[float]], others: List[List[float]]) -> bool:
+    """Whether any box of one list covers a quarter of a box of the other"""
+    for x0, y0, x1, y1 in regions:
+        for u0, v0, u1, v1 in others:
+            overlap = max(0.0, min(x1, u1) - max(x0, u0)) * max(0.0, min(y1, v1) - max(y0, v0))
+            smaller = min((x1 - x0) * (y1 - y0), (u1 - u0) * (v1 - v0))
+            if smaller > 0 and overlap >= REGION_MIN_OVERLAP * smaller:
+                return True
+    return False
+
+
+def _outlier_regions(outliers: np.ndarray) -> List[List[float]]:
+    """Bounding boxes of the largest outlier clusters, normalised to 0-1"""
+    # Closing joins the fragments of one pasted area into a single region
+    mask = cv2.morphologyEx(outliers.astype(np.uint8), cv2.MORPH_CLOSE, np.ones((5, 5), np.uint8))
+    count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    rows, cols = outliers.shape
+    components = sorted(
+        (component for component in stats[1:] if component[4] >= ELA_MIN_REGION_BLOCKS),
+        key=lambda component: component[4],
+        reverse=True
+    )
+    return [
+        [round(float(x / cols), 4), round(float(y / rows), 4),
+         round(float((x + w) / cols), 4), round(float((y + h) / rows), 4)]
+        for x, y, w, h, _ in components[:ELA_MAX_REGIONS]
+    ]
+
+
+def detect_text_presence(gray: np.ndarray) -> Dict[str, Any]:
+    """
+    Cheap check for rendered text ahead of OCR.
+
+    Strong edges are found with a morphological gradient and Otsu
+    threshold; their connected components are kept when glyph or word
+    shaped, and text is reported when several of them sit next to a
+    neighbour of similar height on the same line. Permissive by design:
+    a false positive costs one OCR call, a false negative loses the text.
+    """
+    proxy = _downscale_side(gray, TEXT_SIDE)
+    gradient = cv2.morphologyEx(proxy, cv2.MORPH_GRADIENT, _GRADIENT_KERNEL)
+    if gradient.max() < TEXT_MIN_CONTRAST:
+        return {"likely": False, "edge_density": 0.0, "aligned_glyphs": 0}
+
+    _, edges = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    edge_density = float(np.count_nonzero(edges)) / edges.size
+
+    _, _, stats, _ = cv2.connectedComponentsWithStats(edges, connectivity=8)
+    boxes = stats[1:, :4].astype(np.float32)
+    widths, heights = boxes[:, 2], boxes[:, 3]
+    fill = stats[1:, 4] / (widths * heights)
+    shaped = (
+        (heights >= 6) & (heights <= proxy.shape[0] * 0.25)
+        & (widths >= 2) & (widths <= heights * 10)
+        & (fill > 0.1) & (fill < 0.95)
+    )
+    boxes = boxes[shaped]
+
+    aligned = 0
+    if len(boxes) > 1:
+        centers = boxes[:, 1] + boxes[:, 3] / 2
+        order = np.lexsort((boxes[:, 0], np.round(centers / 8)))
+        boxes, centers = boxes[order], centers[order]
+        heights = boxes[:, 3]
+        gap = boxes[1:, 0] - (boxes[:-1, 0] + boxes[:-1, 2])
+        same_line = np.abs(centers[1:] - centers[:-1]) < heights[:-1] / 2
+        similar = np.abs(heights[1:] - heights[:-1]) < heights[:-1] * 0.5
+        close = (gap > -1) & (gap < heights[:-1] * 1.5)
+        aligned = int(np.count_nonzero(same_line & similar & close))
+
+    return {
+        "likely": aligned >= TEXT_MIN_ALIGNED,
+        "edge_density": round(edge_density, 4),
+        "aligned_glyphs": aligned
+    }
+
+
+def _tile_residuals(tile: np.ndarray, quality: int) -> np.ndarray:
+    """Mean absolute recompression residual of each 8x8 block in a tile"""
+    ok, encoded = cv2.imencode(".jpg", tile, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("JPEG re-encode failed")
+    recompressed = cv2.imdecode(encoded, cv2.IMREAD_UNCHANGED)
+    difference = cv2.absdiff(tile, recompressed)
+    if difference.ndim == 3:
+        difference = difference.mean(axis=2, dtype=np.float32)
+
+    rows, cols = tile.shape[0] // ELA_BLOCK, tile.shape[1] // ELA_BLOCK
+    blocks = difference.reshape(rows, ELA_BLOCK, cols, ELA_BLOCK)
+    return blocks.mean(axis=(1, 3), dtype=np.float32)
+
+
+def _dct_basis(u: int) -> np.ndarray:
+    n = np.arange(BLOCK)
+    scale = np.sqrt(1 / BLOCK) if u == 0 else np.sqrt(2 / BLOCK)
+    return (scale * np.cos((2 * n + 1) * u * np.pi / (2 * BLOCK))).astype(np.float32)
+
+
+def _block_filter(filter_fn, image: np.ndarray) -> np.ndarray:
+    return filter_fn(image, -1, (BLOCK, BLOCK), anchor=(0, 0), normalize=True, borderType=cv2.BORDER_CONSTANT)
+
+
+def _shifted_block_difference(image: np.ndarray, shift_y: int, shift_x: int) -> np.ndarray:
+    """Mean absolute difference between each block and the block at the given shift"""
+    height, width = image.shape
+    top, left = max(0, -shift_y), max(0, -shift_x)
+    bottom, right = min(height, height - shift_y), min(width, width - shift_x)
+    difference = np.full((height, width), 255, dtype=np.float32)
+    difference[top:bottom, left:right] = cv2.absdiff(
+        image[top:bottom, left:right],
+        image[top + shift_y:bottom + shift_y, left + shift_x:right + shift_x]
+    )
+    return _block_filter(cv2.boxFilter, difference)
+
+
+def _tile_sums(values: np.ndarray, tile: int) -> np.ndarray:
+    """Sum over non-overlapping tile x tile cells (partial edge tiles dropped)"""
+    rows, cols = values.shape[0] // tile, values.shape[1] // tile
+    cropped = values[:rows * tile, :cols * tile]
+    return cropped.reshape(rows, tile, cols, tile).sum(axis=(1, 3), dtype=np.float32)
+
+
+def _downscale(image: np.ndarray, max_pixels: int) -> np.ndarray:
+    height, width = image.shape[:2]
+    if height * width <= max_pixels:
+        return image
+    scale = np.sqrt(max_pixels / (height * width))
+    return cv2.resize(image, _scaled_size(width, height, scale), interpolation=cv2.INTER_AREA)
+
+
+def _downscale_side(image: np.ndarray, max_side: int) -> np.ndarray:
+    height, width = image.shape[:2]
+    if max(height, width) <= max_side:
+        return image
+    scale = max_side / max(height, width)
+    return cv2.resize(image, _scaled_size(width, height, scale), interpolation=cv2.INTER_AREA)
+
+
+def _scaled_size(width: int, height: int, scale: float) -> Tuple[int, int]:
+    return max(1, int(width * scale)), max(1, int(height * scale))
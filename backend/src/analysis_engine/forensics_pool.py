@@ -0,0 +1,128 @@
+from typing import Dict, Any, Callable, Optional, Tuple, TypeVar
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+import asyncio
+import os
+import time
+
+import numpy as np
+
+from . import forensic_stages
+
+T = TypeVar("T")
+
+# Stages that may be submitted to the pool, by name
+STAGES = {
+    "manipulation": forensic_stages.detect_manipulation,
+    "ela": forensic_stages.error_level_analysis,
+    "ela_refine": forensic_stages.refine_regions,
+}
+
+
+def _run_stage(stage: str, shm_name: str, shape: Tuple[int, ...], dtype: str, submitted_at: float, kwargs: Dict[str, Any]):
+    """Worker entry point: attach to the shared pixel buffer and run a stage"""
+    started_at = time.time()
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        pixels = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        result = STAGES[stage](pixels, **kwargs)
+        # Release the view before the segment is closed
+        del pixels
+    finally:
+        shm.close()
+    finished_at = time.time()
+    return result, started_at - submitted_at, finished_at - started_at
+
+
+class ForensicsPool:
+    """
+    Bounded process pool for CPU-heavy forensic stages.
+
+    Pixel buffers are passed through POSIX / Windows shared memory rather
+    than pickled, and admission is capped at one in-flight job per worker
+    so queued uploads wait on the event loop instead of piling up in the
+    executor. Queue wait and execution time are reported separately.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._admission: Optional[asyncio.Semaphore] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            if os.name == "posix":
+                # Workers must share the parent's resource tracker: one of
+                # their own would report the segments they attach to as
+                # leaked and unlink them at exit
+                resource_tracker.ensure_running()
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def run(self, stage: str, pixels: np.ndarray, **kwargs) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """Run a named stage on an array; returns (result, timing)"""
+        if self._admission is None:
+            self._admission = asyncio.Semaphore(self.max_workers)
+
+        requested_at = time.time()
+        async with self._admission:
+            admitted_at = time.time()
+            shm = shared_memory.SharedMemory(create=True, size=max(pixels.nbytes, 1))
+            try:
+                shared = np.ndarray(pixels.shape, dtype=pixels.dtype, buffer=shm.buf)
+                shared[...] = pixels
+                del shared
+
+                loop = asyncio.get_running_loop()
+                result, pool_wait, execution = await loop.run_in_executor(
+                    self.executor,
+                    _run_stage,
+                    stage,
+                    shm.name,
+                    pixels.shape,
+                    pixels.dtype.str,
+                    admitted_at,
+                    kwargs,
+                )
+            finally:
+                shm.close()
+                shm.unlink()
+
+        timing = {
+            "queue_wait_ms": round((admitted_at - requested_at + max(pool_wait, 0)) * 1000, 1),
+            "execution_ms": round(execution * 1000, 1),
+        }
+        return result, timing
+
+    async def run_task(self, function: Callable[..., T], *args) -> T:
+        """
+        Run a picklable module-level function in the pool, for CPU work
+        that reads its input from disk rather than from a pixel buffer.
+        Admission is shared with the forensic stages.
+        """
+        if self._admission is None:
+            self._admission = asyncio.Semaphore(self.max_workers)
+        async with self._admission:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, function, *args)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_pool: Optional[ForensicsPool] = None
+
+
+def get_forensics_pool() -> ForensicsPool:
+    global _pool
+    if _pool is None:
+        _pool = ForensicsPool()
+    return _pool
+
+
+def shutdown_forensics_pool():
+    if _pool is not None:
+        _pool.shutdown()
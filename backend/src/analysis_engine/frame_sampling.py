@@ -0,0 +1,82 @@
+"""
+Streaming frame source and keyframe sampling for animated GIF / WebP.
+
+Frames are produced one at a time by a generator, so only the frame being
+examined (plus the keyframes still being analysed) is ever held in memory
+regardless of animation length. ``KeyframeSampler`` keeps a frame when it
+differs visibly from the current scene and its perceptual hash is not
+within DUPLICATE_DISTANCE bits of a keyframe already kept.
+"""
+from typing import Iterator, List, Optional, Tuple
+import io
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from .image_hash_index import dhash, hamming
+
+THUMB_SIDE = 64
+# Mean absolute thumbnail difference (0-1) that counts as a scene change
+SCENE_CHANGE_THRESHOLD = 0.08
+DUPLICATE_DISTANCE = 6
+MAX_KEYFRAMES = 8
+MAX_SCANNED_FRAMES = 3000
+
+Frame = Tuple[int, float, np.ndarray]
+
+
+def is_animated(data) -> bool:
+    """Whether a GIF / WebP buffer holds more than one frame"""
+    with Image.open(io.BytesIO(data)) as image:
+        return bool(getattr(image, "is_animated", False))
+
+
+def iter_animation_frames(data) -> Iterator[Frame]:
+    """(index, timestamp ms, BGR frame) for each frame of a GIF or WebP"""
+    with Image.open(io.BytesIO(data)) as image:
+        timestamp = 0.0
+        for index in range(MAX_SCANNED_FRAMES):
+            try:
+                image.seek(index)
+            except EOFError:
+                break
+            rgb = np.asarray(image.convert("RGB"))
+            yield index, timestamp, cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+            timestamp += image.info.get("duration") or 0
+
+
+class KeyframeSampler:
+    """Scene-change detection with perceptual-hash deduplication"""
+
+    def __init__(self, max_keyframes: int = MAX_KEYFRAMES):
+        self.max_keyframes = max_keyframes
+        self.scanned = 0
+        self.duplicates = 0
+        self._reference: Optional[np.ndarray] = None
+        self._hashes: List[int] = []
+
+    @property
+    def full(self) -> bool:
+        return len(self._hashes) >= self.max_keyframes
+
+    def offer(self, frame: np.ndarray) -> bool:
+        """True when the frame should be analysed as a keyframe"""
+        self.scanned += 1
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        thumb = cv2.resize(gray, (THUMB_SIDE, THUMB_SIDE), interpolation=cv2.INTER_AREA)
+
+        if self._reference is not None:
+            change = cv2.absdiff(thumb, self._reference).mean() / 255.0
+            if change < SCENE_CHANGE_THRESHOLD:
+                return False
+
+        self._reference = thumb
+        frame_hash = dhash(thumb)
+        if any(hamming(frame_hash, seen) <= DUPLICATE_DISTANCE for seen in self._hashes):
+            # A cut back to a scene already sampled
+            self.duplicates += 1
+            return False
+
+        self._hashes.append(frame_hash)
+        return True
@@ -0,0 +1,137 @@
+from typing import Optional, Tuple, Union
+import io
+import sys
+
+import cv2
+import numpy as np
+from PIL import Image
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# cv2 flags for a JPEG decode scaled down by 1/2, 1/4 or 1/8 in the DCT domain
+_JPEG_REDUCED = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+class DecodedImage:
+    """
+    One decode of an uploaded image shared by every forensic stage.
+
+    ``pixels`` is the BGR buffer produced by a single ``cv2.imdecode``
+    (Pillow's first frame for formats OpenCV cannot read);
+    channel slices are views into it and the grayscale plane is computed
+    once on first use. ``data`` keeps the original compressed bytes for
+    stages that want the file as uploaded (OCR, hashing); it may be a
+    memoryview over an upload buffer or a memory-mapped file.
+
+    Large images are decoded as a proxy of at most ``max_pixels``:
+    JPEGs through libjpeg's reduced-size decode, which never materialises
+    the full frame, other formats by an area resize after decoding.
+    ``scale`` is the proxy's linear size relative to the original.
+    """
+
+    def __init__(self, data: Union[bytes, memoryview], pixels: np.ndarray, original_size: Optional[Tuple[int, int]] = None):
+        self.data = data
+        self.pixels = pixels
+        self.original_width, self.original_height = original_size or (pixels.shape[1], pixels.shape[0])
+        self._gray: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_bytes(
+        cls,
+        data: Union[bytes, bytearray, memoryview],
+        max_pixels: Optional[int] = None,
+        size: Optional[Tuple[int, int]] = None,
+        is_jpeg: bool = False,
+    ) -> "DecodedImage":
+        buffer = np.frombuffer(data, dtype=np.uint8)
+
+        factor = 1
+        if max_pixels and size and is_jpeg:
+            width, height = size
+            while factor < 8 and (width // factor) * (height // factor) > max_pixels:
+                factor *= 2
+
+        pixels = cv2.imdecode(buffer, _JPEG_REDUCED[factor])
+        if pixels is None:
+            # OpenCV builds without GIF (and animated WebP) support
+            factor = 1
+            pixels = _decode_with_pillow(data)
+        original_size = (pixels.shape[1] * factor, pixels.shape[0] * factor)
+        if size:
+            # EXIF orientation may have swapped the axes during decode
+            landscape = pixels.shape[1] >= pixels.shape[0]
+            original_size = size if landscape == (size[0] >= size[1]) else (size[1], size[0])
+
+        if max_pixels and pixels.shape[0] * pixels.shape[1] > max_pixels:
+            scale = np.sqrt(max_pixels / (pixels.shape[0] * pixels.shape[1]))
+            target = (max(1, int(pixels.shape[1] * scale)), max(1, int(pixels.shape[0] * scale)))
+            pixels = cv2.resize(pixels, target, interpolation=cv2.INTER_AREA)
+        return cls(data, pixels, original_size)
+
+    @property
+    def height(self) -> int:
+        return self.pixels.shape[0]
+
+    @property
+    def width(self) -> int:
+        return self.pixels.shape[1]
+
+    @property
+    def megapixels(self) -> float:
+        return self.width * self.height / 1_000_000
+
+    @property
+    def original_megapixels(self) -> float:
+        return self.original_width * self.original_height / 1_000_000
+
+    @property
+    def scale(self) -> float:
+        return self.width / self.original_width
+
+    @property
+    def gray(self) -> np.ndarray:
+        if self._gray is None:
+            self._gray = cv2.cvtColor(self.pixels, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    def channel(self, index: int) -> np.ndarray:
+        """Zero-copy view of one BGR channel"""
+        return self.pixels[:, :, index]
+
+    @property
+    def buffer_bytes(self) -> int:
+        """Bytes held by decoded pixel buffers"""
+        total = self.pixels.nbytes
+        if self._gray is not None:
+            total += self._gray.nbytes
+        return total
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process, where the platform reports it"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    if sys.platform == "darwin":
+        return round(peak / (1024 * 1024), 1)
+    return round(peak / 1024, 1)
+
+
+def _decode_with_pillow(data: Union[bytes, bytearray, memoryview]) -> np.ndarray:
+    """First frame of an image as BGR, for formats OpenCV cannot decode"""
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            rgb = np.asarray(image.convert("RGB"))
+    except Exception:
+        raise ValueError("Unable to decode image")
+    return cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
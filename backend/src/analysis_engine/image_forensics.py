@@ -1,10 +1,68 @@
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, Optional, Tuple, Union
 import asyncio
+import hashlib
+import io
+import mmap
 import os
-import datetime
-from PIL import Image
+import tempfile
+import time
 import cv2
 import numpy as np
+from PIL import Image
+
+from . import forensic_stages
+from .image_buffer import DecodedImage, peak_rss_mb
+from .image_metadata import extract_metadata, metadata_indicators
+from .forensics_pool import get_forensics_pool
+from .image_hash_index import get_image_hash_index, phash, dhash
+from .image_result_cache import get_image_result_cache
+from .frame_sampling import KeyframeSampler, Frame, is_animated, iter_animation_frames
+
+# Uploads larger than this are spooled to a temp file and memory-mapped
+# instead of being held on the heap
+SPOOL_THRESHOLD_BYTES = int(os.getenv("IMAGE_SPOOL_THRESHOLD_BYTES", 16 * 1024 * 1024))
+READ_CHUNK_BYTES = 1024 * 1024
+
+# Resolution policy: uploads above MAX_IMAGE_PIXELS are rejected, images
+# above PROXY_MAX_PIXELS are analysed on a downscaled proxy, and no single
+# decode may need more than MAX_DECODE_BYTES
+MAX_IMAGE_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", 250_000_000))
+PROXY_MAX_PIXELS = int(os.getenv("IMAGE_PROXY_MAX_PIXELS", 16_000_000))
+MAX_DECODE_BYTES = int(os.getenv("IMAGE_MAX_DECODE_MB", 1024)) * 1024 * 1024
+
+# Upper bounds (megapixels) of the size buckets used in performance reports
+SIZE_BUCKETS = (1, 4, 12, 24, 50, 100)
+
+# Keyframes of an animation held in memory while being analysed
+FRAME_WINDOW = 3
+ANIMATED_FORMATS = ("gif", "webp")
+
+# Prefix of cached forensic results; changed whenever the detectors'
+# verdicts change so stale results are recomputed
+FORENSICS_CACHE_PREFIX = "forensics:v2"
+
+ImageData = Union[bytes, bytearray, memoryview]
+
+_vision_client = None
+
+
+def get_vision_client():
+    """One Vision client per process; it holds the gRPC channel and credentials"""
+    global _vision_client
+    if _vision_client is None:
+        from google.cloud import vision
+        _vision_client = vision.ImageAnnotatorClient()
+    return _vision_client
+
+
+def size_bucket(megapixels: float) -> str:
+    lower = 0
+    for upper in SIZE_BUCKETS:
+        if megapixels < upper:
+            return f"{lower}-{upper} MP"
+        lower = upper
+    return f">{lower} MP"
+
 
 class ImageForensics:
     """
@@ -12,21 +70,117 @@ class ImageForensics:
     """
 
     def __init__(self):
-        pass
+        self.pool = get_forensics_pool()
+        self.hash_index = get_image_hash_index()
+        self.result_cache = get_image_result_cache()
     
-    async def analyze_file(self, file_path: str, language: str = "en") -> Dict[str, Any]:
+    async def analyze_file(self, file_path: str, language: str = "en", sha256: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze image file for manipulation and misinformation
+        
+        ``sha256`` skips re-hashing when the caller already has the digest.
         """
         try:
-            # Load image
-            image = Image.open(file_path)
+            with open(file_path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                # Decoded straight from the page cache, no heap copy
+                return await self._analyze_data(memoryview(mapped), language, sha256)
+            finally:
+                try:
+                    mapped.close()
+                except BufferError:
+                    # A view is still referenced; the map closes when it is collected
+                    pass
+            
+        except Exception as e:
+            return self._error_result(e)
+    
+    async def analyze_bytes(self, data: ImageData, language: str = "en", sha256: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Analyze an image held in memory; the buffer is decoded without copying
+        """
+        return await self._analyze_data(memoryview(data), language, sha256)
+    
+    async def _analyze_data(self, data: memoryview, language: str, sha256: Optional[str] = None) -> Dict[str, Any]:
+        """Run every forensic stage against a single decode of the image"""
+        try:
+            start = time.perf_counter()
+            
+            # Header metadata costs microseconds and is read before anything
+            # touches the pixels
+            metadata_analysis = await self._analyze_metadata(data)
+            
+            # Re-uploads of the same bytes reuse their forensic results and
+            # skip decoding entirely
+            if sha256 is None:
+                sha256 = await asyncio.to_thread(lambda: hashlib.sha256(data).hexdigest())
+            cached = await asyncio.to_thread(self.result_cache.get, f"{FORENSICS_CACHE_PREFIX}:{sha256}")
+            
+            image = None
+            decode_time = 0.0
+            if cached is None:
+                # Decode once; every stage reads the shared buffer. OpenCV
+                # releases the GIL, so a worker thread keeps the loop free
+                decode_start = time.perf_counter()
+                image = await asyncio.to_thread(self._decode, data, metadata_analysis)
+                decode_time = time.perf_counter() - decode_start
+                fingerprint = await asyncio.to_thread(self._fingerprint, image, sha256)
+            else:
+                fingerprint = {"sha256": sha256, "phash": cached["phash"], "dhash": cached["dhash"]}
+            
+            # Known images are looked up before the expensive stages
+            reverse_search = await self._reverse_image_search(fingerprint)
             
-            # Run various analyses
-            metadata_analysis = await self._analyze_metadata(file_path)
-            manipulation_analysis = await self._detect_manipulation(file_path)
-            ocr_analysis = await self._extract_text(image)
-            reverse_search = await self._reverse_image_search(file_path)
+            stage_timings = {}
+            if cached is None:
+                manipulation_analysis, ela_analysis, ocr_analysis, frame_analysis = await asyncio.gather(
+                    self._detect_manipulation(image),
+                    self._error_level_analysis(image),
+                    self._extract_text(image, fingerprint),
+                    self._analyze_animation(data, metadata_analysis)
+                )
+                stage_timings = {
+                    "manipulation": manipulation_analysis.pop("timing", None),
+                    "error_level_analysis": ela_analysis.pop("timing", None)
+                }
+                
+                # The proxy only localises; suspicious regions are
+                # re-examined at native resolution
+                if image.scale < 1 and ela_analysis.get("regions"):
+                    refinement = await self._refine_regions(image, ela_analysis["regions"])
+                    stage_timings["ela_refine"] = refinement.pop("timing", None)
+                    ela_analysis["refinement"] = refinement
+                
+                width, height = image.original_width, image.original_height
+                if "error" not in manipulation_analysis and "error" not in ela_analysis:
+                    await asyncio.to_thread(self.result_cache.put, f"{FORENSICS_CACHE_PREFIX}:{sha256}", {
+                        "phash": fingerprint["phash"],
+                        "dhash": fingerprint["dhash"],
+                        "width": width,
+                        "height": height,
+                        "manipulation": manipulation_analysis,
+                        "ela": ela_analysis,
+                        "frames": frame_analysis
+                    })
+            else:
+                manipulation_analysis, ela_analysis = cached["manipulation"], cached["ela"]
+                frame_analysis = cached.get("frames")
+                width, height = cached["width"], cached["height"]
+                ocr_analysis = await self._cached_text(fingerprint)
+                if ocr_analysis is None:
+                    image = await asyncio.to_thread(self._decode, data, metadata_analysis)
+                    ocr_analysis = await self._extract_text(image, fingerprint)
+            
+            # A cloned region that ELA also singles out is corroborated;
+            # any manipulated keyframe of an animation counts
+            manipulated = (
+                manipulation_analysis.get("manipulated", False)
+                or forensic_stages.regions_overlap(
+                    manipulation_analysis.get("cloned_regions", []), ela_analysis.get("regions", [])
+                )
+                or bool(frame_analysis and frame_analysis["manipulated"])
+            )
             
             # Combine results
             result = {
@@ -38,12 +192,21 @@ class ImageForensics:
                 "fact_checks": [],
                 "extracted_text": ocr_analysis.get("text", ""),
                 "metadata": metadata_analysis,
-                "manipulation_detected": manipulation_analysis.get("manipulated", False),
-                "reverse_search_results": reverse_search
+                "manipulation_detected": manipulated,
+                "manipulation_analysis": manipulation_analysis,
+                "error_level_analysis": ela_analysis,
+                "frame_analysis": frame_analysis,
+                "reverse_search_results": reverse_search,
+                "image_hashes": {
+                    "sha256": fingerprint["sha256"],
+                    "phash": f"{fingerprint['phash']:016x}",
+                    "dhash": f"{fingerprint['dhash']:016x}"
+                },
+                "performance": {}
             }
             
             # Determine verdict based on analysis
-            if manipulation_analysis.get("manipulated", False):
+            if manipulated:
                 result["verdict"] = "FALSE INFORMATION"
                 result["risk_score"] = 90
                 result["confidence"] = 0.85
@@ -59,51 +222,141 @@ class ImageForensics:
                 result["confidence"] = 0.40
                 result["analysis"] = "Unable to determine image authenticity with current methods."
             
+            self._apply_known_matches(result, reverse_search)
+            await asyncio.to_thread(
+                self.hash_index.add,
+                fingerprint["sha256"],
+                fingerprint["phash"],
+                fingerprint["dhash"],
+                verdict=result["verdict"],
+                risk_score=result["risk_score"]
+            )
+            
+            total_time = time.perf_counter() - start
+            megapixels = width * height / 1_000_000
+            result["performance"] = {
+                "width": width,
+                "height": height,
+                "megapixels": round(megapixels, 2),
+                "size_bucket": size_bucket(megapixels),
+                "decode_scale": round(image.scale, 4) if image else None,
+                "cache_hit": cached is not None,
+                "ocr_cache_hit": ocr_analysis.get("cached", False),
+                "decode_ms": round(decode_time * 1000, 1),
+                "total_ms": round(total_time * 1000, 1),
+                "ms_per_megapixel": round(total_time * 1000 / max(megapixels, 0.01), 1),
+                "pixel_buffer_mb": round(image.buffer_bytes / (1024 * 1024), 2) if image else 0.0,
+                "peak_rss_mb": peak_rss_mb(),
+                "stages": stage_timings
+            }
+            
             return result
             
         except Exception as e:
-            return {
-                "verdict": "ERROR",
-                "risk_score": 0,
-                "confidence": 0.0,
-                "analysis": f"Image analysis failed: {str(e)}",
-                "tactics": [],
-                "fact_checks": [],
-                "extracted_text": "",
-                "metadata": {},
-                "manipulation_detected": False,
-                "reverse_search_results": []
-            }
+            return self._error_result(e)
+    
+    def _decode(self, data: memoryview, metadata: Dict[str, Any]) -> DecodedImage:
+        """Decode within the configured limits, as a proxy when the image is large"""
+        width, height = metadata.get("width"), metadata.get("height")
+        if not (width and height):
+            # Formats the header parser does not read, or a corrupt header:
+            # the limits are still enforced before any pixel is decoded
+            width, height = self._probe_size(data)
+        pixels = width * height
+        if pixels > MAX_IMAGE_PIXELS:
+            raise ValueError(
+                f"Image is {pixels / 1e6:.0f} MP; the limit is {MAX_IMAGE_PIXELS / 1e6:.0f} MP"
+            )
+        # Only JPEG can be decoded directly at reduced size
+        if metadata.get("format") != "jpeg" and pixels * 3 > MAX_DECODE_BYTES:
+            raise ValueError(
+                f"Decoding needs {pixels * 3 // 2**20} MB; the limit is {MAX_DECODE_BYTES // 2**20} MB"
+            )
+        return DecodedImage.from_bytes(data, PROXY_MAX_PIXELS, (width, height), metadata.get("format") == "jpeg")
+    
+    @staticmethod
+    def _probe_size(data: memoryview) -> Tuple[int, int]:
+        """Dimensions from Pillow's lazy header parse; unknown sizes are rejected"""
+        try:
+            with Image.open(io.BytesIO(data)) as probe:
+                width, height = probe.size
+        except Image.DecompressionBombError as e:
+            raise ValueError(f"Image exceeds the pixel limit: {e}")
+        except Exception:
+            raise ValueError("Could not determine the image dimensions")
+        if not (width and height):
+            raise ValueError("Could not determine the image dimensions")
+        return width, height
+    
+    def _error_result(self, e: Exception) -> Dict[str, Any]:
+        return {
+            "verdict": "ERROR",
+            "risk_score": 0,
+            "confidence": 0.0,
+            "analysis": f"Image analysis failed: {str(e)}",
+            "tactics": [],
+            "fact_checks": [],
+            "extracted_text": "",
+            "metadata": {},
+            "manipulation_detected": False,
+            "reverse_search_results": []
+        }
     
     async def analyze_file_obj(self, file_obj, language: str = "en") -> Dict[str, Any]:
         """
         Analyze image file object
+        
+        Small uploads are analyzed in memory; once an upload passes
+        SPOOL_THRESHOLD_BYTES the rest is streamed to a unique temp file.
         """
-        # Save file object to temporary location and analyze
-        temp_path = f"temp_{int(datetime.datetime.now().timestamp())}.jpg"
+        buffer = bytearray()
+        temp_path = None
         try:
-            with open(temp_path, "wb") as f:
-                content = await file_obj.read()
-                f.write(content)
+            while True:
+                chunk = await file_obj.read(READ_CHUNK_BYTES)
+                if not chunk:
+                    break
+                if temp_path is None:
+                    buffer += chunk
+                    if len(buffer) > SPOOL_THRESHOLD_BYTES:
+                        fd, temp_path = tempfile.mkstemp(prefix="image_upload_")
+                        spool = os.fdopen(fd, "wb")
+                        spool.write(buffer)
+                        buffer = bytearray()
+                else:
+                    spool.write(chunk)
             
-            result = await self.analyze_file(temp_path, language)
-            return result
+            if temp_path is None:
+                return await self.analyze_bytes(buffer, language)
+            
+            spool.close()
+            return await self.analyze_file(temp_path, language)
         finally:
-            if os.path.exists(temp_path):
+            if temp_path is not None:
+                if not spool.closed:
+                    spool.close()
                 os.remove(temp_path)
     
-    async def _analyze_metadata(self, file_path: str) -> Dict[str, Any]:
+    async def _analyze_metadata(self, data: memoryview) -> Dict[str, Any]:
         """Analyze image metadata for signs of manipulation"""
         try:
-            image = Image.open(file_path)
-            metadata = image.getexif()
+            # Container headers only; no pixels are decoded
+            metadata = extract_metadata(data)
+            exif, xmp = metadata["exif"], metadata["xmp"]
             
             analysis = {
-                "has_metadata": len(metadata) > 0,
-                "creation_software": metadata.get(271, "Unknown"),
-                "creation_date": metadata.get(306, "Unknown"),
-                "camera_make": metadata.get(271, "Unknown"),
-                "camera_model": metadata.get(272, "Unknown"),
+                "has_metadata": bool(exif or xmp),
+                "format": metadata["format"],
+                "width": metadata["width"],
+                "height": metadata["height"],
+                "creation_software": exif.get("software") or xmp.get("creator_tool") or "Unknown",
+                "creation_date": exif.get("datetime_original") or exif.get("datetime") or xmp.get("create_date") or "Unknown",
+                "camera_make": exif.get("make") or "Unknown",
+                "camera_model": exif.get("model") or "Unknown",
+                "exif": exif,
+                "xmp": xmp,
+                "icc": metadata["icc"],
+                "thumbnail": metadata["thumbnail"],
                 "suspicious_indicators": []
             }
             
@@ -114,125 +367,223 @@ class ImageForensics:
             if not analysis["creation_date"] or analysis["creation_date"] == "Unknown":
                 analysis["suspicious_indicators"].append("No creation date metadata")
             
+            analysis["suspicious_indicators"].extend(metadata_indicators(metadata))
+            
             return analysis
             
         except Exception as e:
             return {"error": str(e)}
     
-    async def _detect_manipulation(self, file_path: str) -> Dict[str, Any]:
-        """Detect digital manipulation using computer vision"""
+    async def _analyze_animation(self, data: memoryview, metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Keyframe analysis of animated GIF / WebP; None for still images"""
         try:
-            # Load image with OpenCV
-            image = cv2.imread(file_path)
-            if image is None:
-                return {"manipulated": False, "confidence": 0.0}
-            
-            # Convert to grayscale
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            if metadata.get("format") not in ANIMATED_FORMATS:
+                return None
+            if not await asyncio.to_thread(is_animated, data):
+                return None
+            # Frame 0 is already covered by the single-image stages
+            return await self._analyze_frames(iter_animation_frames(data), skip_first=True)
             
-            # Simple manipulation detection (this is a basic implementation)
-            # In a real system, you'd use more sophisticated algorithms
-            
-            # Check for duplicate regions (copy-paste detection)
-            duplicate_regions = self._find_duplicate_regions(gray)
+        except Exception as e:
+            return {"manipulated": False, "keyframes": [], "error": str(e)}
+    
+    async def _analyze_frames(self, frames: Iterator[Frame], skip_first: bool) -> Dict[str, Any]:
+        """
+        Stream frames, pick keyframes and analyse them in parallel.
+        
+        Frames are pulled one at a time in a worker thread; at most
+        FRAME_WINDOW selected keyframes are in flight, so memory stays
+        bounded however long the animation is.
+        """
+        sampler = KeyframeSampler()
+        in_flight = set()
+        keyframes = []
+        
+        try:
+            while not sampler.full:
+                item = await asyncio.to_thread(next, frames, None)
+                if item is None:
+                    break
+                index, timestamp, frame = item
+                if not sampler.offer(frame) or (skip_first and index == 0):
+                    continue
+                
+                in_flight.add(asyncio.create_task(self._analyze_keyframe(index, timestamp, frame)))
+                del frame
+                if len(in_flight) >= FRAME_WINDOW:
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    keyframes.extend(task.result() for task in done)
             
-            # Check for inconsistent lighting
-            lighting_consistency = self._check_lighting_consistency(gray)
+            if in_flight:
+                keyframes.extend(await asyncio.gather(*in_flight))
+        finally:
+            frames.close()
+        
+        keyframes.sort(key=lambda keyframe: keyframe["index"])
+        return {
+            "manipulated": any(keyframe.get("manipulated") for keyframe in keyframes),
+            "frames_scanned": sampler.scanned,
+            "duplicates_skipped": sampler.duplicates,
+            "keyframes": keyframes
+        }
+    
+    async def _analyze_keyframe(self, index: int, timestamp: float, frame) -> Dict[str, Any]:
+        keyframe = {"index": index, "timestamp_ms": round(timestamp, 1)}
+        try:
+            gray = await asyncio.to_thread(cv2.cvtColor, frame, cv2.COLOR_BGR2GRAY)
+            (manipulation, _), (ela, _) = await asyncio.gather(
+                self.pool.run("manipulation", gray),
+                self.pool.run("ela", frame)
+            )
+            keyframe.update({
+                "manipulated": manipulation.get("manipulated", False),
+                "confidence": manipulation.get("confidence", 0.0),
+                "duplicate_regions": manipulation.get("duplicate_regions"),
+                "ela_mean_residual": ela.get("mean_residual"),
+                "ela_outlier_fraction": ela.get("outlier_fraction")
+            })
             
-            # Check for edge inconsistencies
-            edge_consistency = self._check_edge_consistency(gray)
+        except Exception as e:
+            keyframe.update({"manipulated": False, "error": str(e)})
+        return keyframe
+    
+    async def _detect_manipulation(self, image: DecodedImage) -> Dict[str, Any]:
+        """Detect digital manipulation using computer vision"""
+        try:
+            # Only the grayscale plane crosses to the worker process
+            gray = await asyncio.to_thread(lambda: image.gray)
+            result, timing = await self.pool.run("manipulation", gray)
+            result["timing"] = timing
+            return result
             
-            # Determine if manipulated
-            manipulation_score = 0
-            if duplicate_regions > 0.1:  # 10% duplicate regions
-                manipulation_score += 0.3
-            if lighting_consistency < 0.7:  # Low lighting consistency
-                manipulation_score += 0.3
-            if edge_consistency < 0.6:  # Low edge consistency
-                manipulation_score += 0.4
+        except Exception as e:
+            return {"manipulated": False, "confidence": 0.0, "error": str(e)}
+    
+    async def _error_level_analysis(self, image: DecodedImage) -> Dict[str, Any]:
+        """Recompression residual statistics and heatmap"""
+        try:
+            result, timing = await self.pool.run("ela", image.pixels)
+            result["timing"] = timing
+            return result
             
-            return {
-                "manipulated": manipulation_score > 0.5,
-                "confidence": manipulation_score,
-                "duplicate_regions": duplicate_regions,
-                "lighting_consistency": lighting_consistency,
-                "edge_consistency": edge_consistency
-            }
+        except Exception as e:
+            return {"error": str(e)}
+    
+    async def _cached_text(self, fingerprint: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        ocr_analysis = await asyncio.to_thread(self.result_cache.get, f"ocr:{fingerprint['sha256']}")
+        if ocr_analysis is not None:
+            ocr_analysis["cached"] = True
+        return ocr_analysis
+    
+    async def _refine_regions(self, image: DecodedImage, regions: list) -> Dict[str, Any]:
+        """Full-resolution residuals of the proxy's suspicious regions"""
+        try:
+            # The worker decodes a single grayscale plane at native size
+            if image.original_width * image.original_height > MAX_DECODE_BYTES:
+                return {"skipped": "Full-resolution decode exceeds the memory limit"}
+            encoded = np.frombuffer(image.data, dtype=np.uint8)
+            result, timing = await self.pool.run("ela_refine", encoded, regions=regions)
+            result["timing"] = timing
+            return result
             
         except Exception as e:
-            return {"manipulated": False, "confidence": 0.0, "error": str(e)}
+            return {"error": str(e)}
     
-    def _find_duplicate_regions(self, image):
-        """Find duplicate regions in image (simplified)"""
-        # This is a simplified implementation
-        # Real implementation would use more sophisticated algorithms
-        return 0.05  # Mock value
-    
-    def _check_lighting_consistency(self, image):
-        """Check lighting consistency across image"""
-        # This is a simplified implementation
-        # Real implementation would analyze lighting patterns
-        return 0.8  # Mock value
-    
-    def _check_edge_consistency(self, image):
-        """Check edge consistency across image"""
-        # This is a simplified implementation
-        # Real implementation would analyze edge patterns
-        return 0.7  # Mock value
-    
-    async def _extract_text(self, image) -> Dict[str, Any]:
+    async def _extract_text(self, image: DecodedImage, fingerprint: Dict[str, Any]) -> Dict[str, Any]:
         """Extract text from image using OCR"""
-        from google.cloud import vision
-        import io
+        cached = await self._cached_text(fingerprint)
+        if cached is not None:
+            return cached
+        
         try:
-            client = vision.ImageAnnotatorClient()
-            # Convert PIL Image to bytes
-            img_byte_arr = io.BytesIO()
-            image.save(img_byte_arr, format='PNG')
-            content = img_byte_arr.getvalue()
-            image_vision = vision.Image(content=content)
-            response = client.text_detection(image=image_vision)
-            texts = response.text_annotations
-            if response.error.message:
-                raise Exception(response.error.message)
-            if texts:
-                return {
-                    "text": texts[0].description,
-                    "confidence": None,  # Google Vision API does not provide confidence in text_detection
-                    "language": None
-                }
-            else:
-                return {
+            presence = await asyncio.to_thread(forensic_stages.detect_text_presence, image.gray)
+            if not presence["likely"]:
+                ocr_analysis = {
                     "text": "",
                     "confidence": 0.0,
-                    "language": None
+                    "language": None,
+                    "skipped": "No text detected"
                 }
+            else:
+                ocr_analysis = await asyncio.to_thread(self._vision_text, image.data)
+            
+            await asyncio.to_thread(
+                self.result_cache.put, f"ocr:{fingerprint['sha256']}", ocr_analysis
+            )
+            return ocr_analysis
+            
         except Exception as e:
             return {"text": "", "confidence": 0.0, "error": str(e)}
     
-    async def _reverse_image_search(self, file_path: str) -> list:
-        """Perform reverse image search"""
+    def _vision_text(self, content: memoryview) -> Dict[str, Any]:
+        from google.cloud import vision
+        # Send the original compressed bytes, no re-encode
+        image_vision = vision.Image(content=bytes(content))
+        response = get_vision_client().text_detection(image=image_vision)
+        texts = response.text_annotations
+        if response.error.message:
+            raise Exception(response.error.message)
+        if texts:
+            return {
+                "text": texts[0].description,
+                "confidence": None,  # Google Vision API does not provide confidence in text_detection
+                "language": None
+            }
+        else:
+            return {
+                "text": "",
+                "confidence": 0.0,
+                "language": None
+            }
+    
+    def _fingerprint(self, image: DecodedImage, sha256: str) -> Dict[str, Any]:
+        """Content hash of the upload and perceptual hashes of its pixels"""
+        return {
+            "sha256": sha256,
+            "phash": phash(image.gray),
+            "dhash": dhash(image.gray)
+        }
+    
+    async def _reverse_image_search(self, fingerprint: Dict[str, Any]) -> list:
+        """Near-duplicates of the image in the local hash index"""
         try:
-            # This is a mock implementation
-            # Real implementation would use Google Images API or similar
-            await asyncio.sleep(1.0)  # Simulate API call
-            
+            matches = await asyncio.to_thread(
+                self.hash_index.search, fingerprint["phash"], fingerprint["dhash"]
+            )
             return [
-                {
-                    "url": "https://example.com/similar-image1.jpg",
-                    "similarity": 0.85,
-                    "source": "Google Images"
-                },
-                {
-                    "url": "https://example.com/similar-image2.jpg", 
-                    "similarity": 0.72,
-                    "source": "Bing Images"
-                }
+                match for match in matches
+                # A re-upload of the same file is not evidence about itself
+                if not (match["sha256"] == fingerprint["sha256"] and match["source"] == "analysis")
             ]
             
         except Exception as e:
             return []
     
+    def _apply_known_matches(self, result: Dict[str, Any], matches: list):
+        """Surface verdicts of previously debunked copies of the image"""
+        debunked = [match for match in matches if match["debunked"]]
+        if not debunked:
+            return
+        
+        best = debunked[0]
+        where = f" ({best['url']})" if best.get("url") else ""
+        note = f"Image matches a previously debunked image{where}, verdict: {best['verdict']}."
+        result["fact_checks"].append(
+            f"Matched {best.get('title') or best['source']}{where}: {best['verdict']} "
+            f"(similarity {best['similarity']:.0%})"
+        )
+        
+        # Only published fact-checks override our own verdict
+        if best["source"] != "analysis":
+            result["verdict"] = "FALSE INFORMATION"
+            result["risk_score"] = max(result["risk_score"], 85)
+            result["confidence"] = max(result["confidence"], round(0.6 + 0.4 * best["similarity"], 2))
+            result["analysis"] = note
+            if "Recycled or repurposed image" not in result["tactics"]:
+                result["tactics"].append("Recycled or repurposed image")
+        else:
+            result["analysis"] = f"{result['analysis']} {note}".strip()
+    
     async def _analyze_extracted_text(self, text: str) -> Dict[str, Any]:
         """Analyze extracted text for misinformation"""
         # This would integrate with the text analyzer
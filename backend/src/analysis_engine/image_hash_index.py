@@ -0,0 +1,323 @@
+"""
+Local near-duplicate image index for reverse image search.
+
+Every analysed image is stored with a 64-bit DCT perceptual hash (pHash)
+and a 64-bit gradient hash (dHash). Lookups use multi-index hashing: the
+pHash is split into four 16-bit chunks and each chunk has its own sorted
+table, so by the pigeonhole principle any hash within Hamming distance
+``r`` of the query shares at least one chunk within ``r // 4`` bits.
+Only those few buckets are probed and candidates are verified with a
+vectorised popcount.
+
+Records persist in SQLite; the hash tables are rebuilt from it at
+startup. Inserts go to a small delta segment that is scanned linearly
+and merged into the sorted tables once it grows past MERGE_THRESHOLD.
+
+Import debunked images from a JSONL file of
+``{"image": path, "verdict": ..., "url": ..., "title": ...}`` records:
+    python -m analysis_engine.image_hash_index add fact_checks.jsonl
+"""
+from typing import Dict, Any, List, Optional, Iterable
+from functools import lru_cache
+from itertools import combinations
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import cv2
+import numpy as np
+
+IMAGE_HASH_INDEX_PATH = os.getenv(
+    "IMAGE_HASH_INDEX_PATH", os.path.join("data", "image_hashes.db")
+)
+
+CHUNKS = 4
+CHUNK_BITS = 16
+# Up to 7 bits every chunk table is probed at radius 1 (17 buckets)
+MAX_DISTANCE = 7
+MAX_DHASH_DISTANCE = 14
+MAX_RESULTS = 10
+MERGE_THRESHOLD = 4096
+
+# Verdicts that mark an image as previously debunked
+DEBUNKED_VERDICTS = {"FALSE INFORMATION", "FALSE", "MISLEADING", "MANIPULATED", "FAKE"}
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def phash(gray: np.ndarray) -> int:
+    """64-bit DCT hash: low 8x8 frequencies against their median"""
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].flatten()
+    bits = low > np.median(low[1:])
+    return _pack(bits)
+
+
+def dhash(gray: np.ndarray) -> int:
+    """64-bit gradient hash: sign of horizontal differences on a 9x8 thumbnail"""
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA).astype(np.int16)
+    return _pack((small[:, 1:] > small[:, :-1]).flatten())
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _pack(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.astype(np.uint8)).tobytes(), "big")
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    return _POPCOUNT[values.view(np.uint8).reshape(-1, 8)].sum(axis=1)
+
+
+def _to_signed(value: int) -> int:
+    """SQLite integers are signed 64-bit"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+def _chunk(values: np.ndarray, index: int) -> np.ndarray:
+    return ((values >> np.uint64(index * CHUNK_BITS)) & np.uint64(0xFFFF)).astype(np.uint16)
+
+
+@lru_cache(maxsize=None)
+def _flip_masks(radius: int) -> np.ndarray:
+    """XOR masks of every 16-bit pattern with at most ``radius`` bits set"""
+    masks = [0]
+    for distance in range(1, radius + 1):
+        for positions in combinations(range(CHUNK_BITS), distance):
+            masks.append(sum(1 << position for position in positions))
+    return np.array(masks, dtype=np.uint16)
+
+
+class ImageHashIndex:
+    """Persistent multi-index hash table of perceptual image hashes"""
+
+    def __init__(self, db_path: str = IMAGE_HASH_INDEX_PATH):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS image_hashes (
+                id INTEGER PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                source TEXT NOT NULL,
+                phash INTEGER NOT NULL,
+                dhash INTEGER NOT NULL,
+                verdict TEXT,
+                risk_score INTEGER,
+                url TEXT,
+                title TEXT,
+                created_at REAL NOT NULL,
+                UNIQUE (sha256, source)
+            );
+        """)
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._ids) + len(self._delta_ids)
+
+    def _load(self):
+        rows = self._conn.execute("SELECT id, phash, dhash FROM image_hashes").fetchall()
+        self._ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self._phashes = np.array([_to_unsigned(row[1]) for row in rows], dtype=np.uint64)
+        self._dhashes = np.array([_to_unsigned(row[2]) for row in rows], dtype=np.uint64)
+        self._delta_ids: List[int] = []
+        self._delta_phashes: List[int] = []
+        self._delta_dhashes: List[int] = []
+        self._build_tables()
+
+    def _build_tables(self):
+        # Per chunk: positions sorted by chunk value, plus the start of
+        # each of the 2^16 buckets in that order for O(1) bucket lookup
+        self._tables = []
+        for index in range(CHUNKS):
+            values = _chunk(self._phashes, index)
+            order = np.argsort(values, kind="stable")
+            counts = np.bincount(values, minlength=1 << CHUNK_BITS)
+            bucket_starts = np.concatenate([[0], np.cumsum(counts)])
+            self._tables.append((bucket_starts, order))
+
+    def _merge(self):
+        self._ids = np.concatenate([self._ids, np.array(self._delta_ids, dtype=np.int64)])
+        self._phashes = np.concatenate([self._phashes, np.array(self._delta_phashes, dtype=np.uint64)])
+        self._dhashes = np.concatenate([self._dhashes, np.array(self._delta_dhashes, dtype=np.uint64)])
+        self._delta_ids, self._delta_phashes, self._delta_dhashes = [], [], []
+        self._build_tables()
+
+    def add(
+        self,
+        sha256: str,
+        phash_value: int,
+        dhash_value: int,
+        source: str = "analysis",
+        verdict: Optional[str] = None,
+        risk_score: Optional[int] = None,
+        url: Optional[str] = None,
+        title: Optional[str] = None,
+    ) -> int:
+        """Insert or update an image record; returns its id"""
+        with self._lock:
+            with self._conn:
+                row = self._conn.execute(
+                    "SELECT id FROM image_hashes WHERE sha256 = ? AND source = ?", (sha256, source)
+                ).fetchone()
+                if row:
+                    self._conn.execute(
+                        "UPDATE image_hashes SET verdict = ?, risk_score = ?, "
+                        "url = COALESCE(?, url), title = COALESCE(?, title) WHERE id = ?",
+                        (verdict, risk_score, url, title, row[0]),
+                    )
+                    return row[0]
+                cursor = self._conn.execute(
+                    "INSERT INTO image_hashes "
+                    "(sha256, source, phash, dhash, verdict, risk_score, url, title, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (sha256, source, _to_signed(phash_value), _to_signed(dhash_value),
+                     verdict, risk_score, url, title, time.time()),
+                )
+            self._delta_ids.append(cursor.lastrowid)
+            self._delta_phashes.append(phash_value)
+            self._delta_dhashes.append(dhash_value)
+            if len(self._delta_ids) >= MERGE_THRESHOLD:
+                self._merge()
+            return cursor.lastrowid
+
+    def search(
+        self,
+        phash_value: int,
+        dhash_value: int,
+        max_distance: int = MAX_DISTANCE,
+        limit: int = MAX_RESULTS,
+    ) -> List[Dict[str, Any]]:
+        """Stored images within ``max_distance`` pHash bits, nearest first"""
+        with self._lock:
+            candidates = self._candidates(phash_value, max_distance)
+            ids = np.concatenate([self._ids[candidates], np.array(self._delta_ids, dtype=np.int64)])
+            phashes = np.concatenate([self._phashes[candidates], np.array(self._delta_phashes, dtype=np.uint64)])
+            dhashes = np.concatenate([self._dhashes[candidates], np.array(self._delta_dhashes, dtype=np.uint64)])
+
+        if not len(ids):
+            return []
+        p_distance = _popcount(phashes ^ np.uint64(phash_value))
+        d_distance = _popcount(dhashes ^ np.uint64(dhash_value))
+        keep = (p_distance <= max_distance) & (d_distance <= MAX_DHASH_DISTANCE)
+        order = np.lexsort((d_distance[keep], p_distance[keep]))[:limit]
+        matches = {
+            int(ids[keep][i]): (int(p_distance[keep][i]), int(d_distance[keep][i]))
+            for i in order
+        }
+        return self._records(matches)
+
+    def _candidates(self, phash_value: int, max_distance: int) -> np.ndarray:
+        masks = _flip_masks(max_distance // CHUNKS)
+        found = []
+        for index, (bucket_starts, order) in enumerate(self._tables):
+            probes = (masks ^ np.uint16((phash_value >> (index * CHUNK_BITS)) & 0xFFFF)).astype(np.int64)
+            starts = bucket_starts[probes]
+            lengths = bucket_starts[probes + 1] - starts
+            hit = lengths > 0
+            starts, lengths = starts[hit], lengths[hit]
+            if not len(starts):
+                continue
+            # Expand the [start, start + length) ranges without a Python loop
+            total = int(lengths.sum())
+            offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+            found.append(order[offsets + np.arange(total)])
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def _records(self, matches: Dict[int, tuple]) -> List[Dict[str, Any]]:
+        if not matches:
+            return []
+        placeholders = ",".join("?" * len(matches))
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, sha256, source, verdict, risk_score, url, title, created_at "
+                f"FROM image_hashes WHERE id IN ({placeholders})",
+                list(matches),
+            ).fetchall()
+
+        records = []
+        for row in rows:
+            p_distance, d_distance = matches[row[0]]
+            records.append({
+                "sha256": row[1],
+                "source": row[2],
+                "verdict": row[3],
+                "risk_score": row[4],
+                "url": row[5],
+                "title": row[6],
+                "first_seen": row[7],
+                "phash_distance": p_distance,
+                "dhash_distance": d_distance,
+                "similarity": round(1 - p_distance / 64, 3),
+                "debunked": (row[3] or "").upper() in DEBUNKED_VERDICTS,
+            })
+        records.sort(key=lambda record: (record["phash_distance"], record["dhash_distance"]))
+        return records
+
+
+_index: Optional[ImageHashIndex] = None
+
+
+def get_image_hash_index() -> ImageHashIndex:
+    global _index
+    if _index is None:
+        _index = ImageHashIndex()
+    return _index
+
+
+def _read_records(paths: Iterable[str]):
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the local image hash index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Import fact-checked images from JSONL")
+    add.add_argument("--index", default=IMAGE_HASH_INDEX_PATH)
+    add.add_argument("--source", default="fact_check")
+    add.add_argument("inputs", nargs="+")
+    args = parser.parse_args(argv)
+
+    index = ImageHashIndex(args.index)
+    added = 0
+    for record in _read_records(args.inputs):
+        with open(record["image"], "rb") as f:
+            data = f.read()
+        gray = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            print(f"{record['image']}: unreadable")
+            continue
+        index.add(
+            hashlib.sha256(data).hexdigest(),
+            phash(gray),
+            dhash(gray),
+            source=args.source,
+            verdict=record.get("verdict") or record.get("rating"),
+            url=record.get("url"),
+            title=record.get("title") or record.get("claim"),
+        )
+        added += 1
+    print(f"Indexed {added} images ({len(index)} total) into {args.index}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+"""
+Header-only image metadata extraction.
+
+Walks the container structure of JPEG (APP segments up to the first scan),
+PNG (chunks) and WebP (RIFF chunks), plus the GIF screen descriptor,
+straight from the upload buffer and parses the EXIF, XMP and ICC
+payloads found there. Compressed image data is skipped by length and
+never decoded, so extraction costs microseconds regardless of the image
+size.
+"""
+from typing import Dict, Any, List, Optional, Tuple
+import re
+import struct
+import zlib
+
+# TIFF / EXIF tags
+TAG_IMAGE_WIDTH = 0x0100
+TAG_IMAGE_HEIGHT = 0x0101
+TAG_MAKE = 0x010F
+TAG_MODEL = 0x0110
+TAG_ORIENTATION = 0x0112
+TAG_SOFTWARE = 0x0131
+TAG_DATETIME = 0x0132
+TAG_THUMBNAIL_OFFSET = 0x0201
+TAG_THUMBNAIL_LENGTH = 0x0202
+TAG_EXIF_IFD = 0x8769
+TAG_GPS_IFD = 0x8825
+TAG_DATETIME_ORIGINAL = 0x9003
+TAG_DATETIME_DIGITIZED = 0x9004
+TAG_PIXEL_X = 0xA002
+TAG_PIXEL_Y = 0xA003
+
+# Byte size of each TIFF field type
+_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8, 11: 4, 12: 8}
+
+# JPEG start-of-frame markers (C4 DHT, C8 JPG and CC DAC are not frames)
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+EXIF_HEADER = b"Exif\x00\x00"
+XMP_HEADER = b"http://ns.adobe.com/xap/1.0/\x00"
+ICC_HEADER = b"ICC_PROFILE\x00"
+
+EDITING_SOFTWARE = (
+    "photoshop", "gimp", "affinity", "pixelmator", "paint.net", "pixlr", "canva",
+    "picsart", "facetune", "snapseed", "fotor", "photopea", "lightroom",
+)
+
+# PNG iCCP / iTXt payloads are zlib streams; one that inflates past this
+# is dropped rather than decompressed in full (a few KB can expand to GB)
+MAX_INFLATED_PAYLOAD = 4 * 1024 * 1024
+
+# Aspect ratios of thumbnail and image may differ by this much (rounding)
+THUMBNAIL_ASPECT_TOLERANCE = 0.05
+
+_XMP_ATTRIBUTE = r'{name}\s*=\s*"([^"]*)"|<{name}>([^<]*)</{name}>'
+_XMP_FIELDS = {
+    "creator_tool": "xmp:CreatorTool",
+    "create_date": "xmp:CreateDate",
+    "modify_date": "xmp:ModifyDate",
+    "document_id": "xmpMM:DocumentID",
+    "original_document_id": "xmpMM:OriginalDocumentID",
+}
+_XMP_AGENT = re.compile(r'stEvt:softwareAgent\s*=\s*"([^"]*)"|<stEvt:softwareAgent>([^<]*)<')
+
+
+def extract_metadata(data) -> Dict[str, Any]:
+    """
+    Container format, frame size and parsed EXIF / XMP / ICC payloads.
+
+    Returns ``{"format", "width", "height", "exif", "xmp", "icc",
+    "thumbnail"}``; missing sections are empty dicts or None.
+    """
+    view = memoryview(data)
+    if view.ndim != 1 or view.itemsize != 1:
+        view = view.cast("B")
+
+    if view[:2] == b"\xff\xd8":
+        container = _parse_jpeg(view)
+    elif view[:8] == b"\x89PNG\r\n\x1a\n":
+        container = _parse_png(view)
+    elif view[:4] == b"RIFF" and view[8:12] == b"WEBP":
+        container = _parse_webp(view)
+    elif view[:6] in (b"GIF87a", b"GIF89a"):
+        width, height = struct.unpack_from("<HH", view, 6)
+        container = {"format": "gif", "width": width, "height": height}
+    else:
+        container = {"format": "unknown"}
+
+    exif_payload = container.pop("exif_payload", None)
+    xmp_payload = container.pop("xmp_payload", None)
+    icc_payload = container.pop("icc_payload", None)
+
+    exif, thumbnail = ({}, None)
+    if exif_payload is not None:
+        exif, thumbnail = parse_exif(exif_payload)
+
+    return {
+        "format": container.get("format", "unknown"),
+        "width": container.get("width"),
+        "height": container.get("height"),
+        "exif": exif,
+        "xmp": parse_xmp(xmp_payload) if xmp_payload is not None else {},
+        "icc": parse_icc(icc_payload) if icc_payload is not None else {},
+        "thumbnail": thumbnail,
+    }
+
+
+def _parse_jpeg(view: memoryview) -> Dict[str, Any]:
+    result: Dict[str, Any] = {"format": "jpeg"}
+    icc_chunks: Dict[int, bytes] = {}
+    position = 2
+    end = len(view)
+
+    while position + 4 <= end:
+        if view[position] != 0xFF:
+            break
+        marker = view[position + 1]
+        if marker == 0xFF:
+            # Fill byte
+            position += 1
+            continue
+        if marker in (0x01,) or 0xD0 <= marker <= 0xD7:
+            position += 2
+            continue
+        if marker in (0xD9, 0xDA):
+            # End of image or start of scan: entropy-coded data follows
+            break
+
+        length = struct.unpack_from(">H", view, position + 2)[0]
+        segment = view[position + 4:position + 2 + length]
+
+        if marker == 0xE1 and segment[:6] == EXIF_HEADER and "exif_payload" not in result:
+            result["exif_payload"] = segment[6:]
+        elif marker == 0xE1 and segment[:len(XMP_HEADER)] == XMP_HEADER:
+            result["xmp_payload"] = bytes(segment[len(XMP_HEADER):])
+        elif marker == 0xE2 and segment[:len(ICC_HEADER)] == ICC_HEADER:
+            # Profiles above 64 KB are split over numbered APP2 segments
+            sequence = segment[len(ICC_HEADER)]
+            icc_chunks[sequence] = bytes(segment[len(ICC_HEADER) + 2:])
+        elif marker in _SOF_MARKERS and "width" not in result:
+            result["height"], result["width"] = struct.unpack_from(">HH", segment, 1)
+
+        position += 2 + length
+
+    if icc_chunks:
+        result["icc_payload"] = b"".join(icc_chunks[key] for key in sorted(icc_chunks))
+    return result
+
+
+def _parse_png(view: memoryview) -> Dict[str, Any]:
+    result: Dict[str, Any] = {"format": "png"}
+    position = 8
+    end = len(view)
+
+    while position + 8 <= end:
+        length, kind = struct.unpack_from(">I4s", view, position)
+        body = view[position + 8:position + 8 + length]
+
+        if kind == b"IHDR":
+            result["width"], result["height"] = struct.unpack_from(">II", body)
+        elif kind == b"eXIf":
+            result["exif_payload"] = body
+        elif kind == b"iCCP":
+            # Profile name, NUL, compression method, zlib stream
+            name_end = bytes(body[:80]).index(b"\x00")
+            icc = _inflate(bytes(body[name_end + 2:]))
+            if icc is not None:
+                result["icc_payload"] = icc
+        elif kind == b"iTXt" and bytes(body[:17]) == b"XML:com.adobe.xmp":
+            xmp = _itxt_text(bytes(body))
+            if xmp is not None:
+                result["xmp_payload"] = xmp
+        elif kind == b"IEND":
+            break
+
+        # Image data chunks are skipped by length, never inflated
+        position += 12 + length
+    return result
+
+
+def _inflate(data: bytes) -> Optional[bytes]:
+    """A zlib stream inflated up to MAX_INFLATED_PAYLOAD, None beyond it"""
+    inflater = zlib.decompressobj()
+    payload = inflater.decompress(data, MAX_INFLATED_PAYLOAD)
+    if inflater.unconsumed_tail:
+        return None
+    return payload
+
+
+def _itxt_text(body: bytes) -> Optional[bytes]:
+    keyword_end = body.index(b"\x00")
+    compressed = body[keyword_end + 1]
+    rest = body[keyword_end + 3:]
+    # Language tag and translated keyword, each NUL terminated
+    rest = rest[rest.index(b"\x00") + 1:]
+    rest = rest[rest.index(b"\x00") + 1:]
+    if compressed:
+        return _inflate(rest)
+    return rest
+
+
+def _parse_webp(view: memoryview) -> Dict[str, Any]:
+    result: Dict[str, Any] = {"format": "webp"}
+    position = 12
+    end = min(len(view), 8 + struct.unpack_from("<I", view, 4)[0])
+
+    while position + 8 <= end:
+        kind, length = struct.unpack_from("<4sI", view, position)
+        body = view[position + 8:position + 8 + length]
+
+        if kind == b"VP8X":
+            width = int.from_bytes(body[4:7], "little") + 1
+            height = int.from_bytes(body[7:10], "little") + 1
+            result["width"], result["height"] = width, height
+        elif kind == b"VP8 " and "width" not in result:
+            # Frame tag (3 bytes), start code (3 bytes), 14-bit dimensions
+            width, height = struct.unpack_from("<HH", body, 6)
+            result["width"], result["height"] = width & 0x3FFF, height & 0x3FFF
+        elif kind == b"VP8L" and "width" not in result:
+            bits = int.from_bytes(body[1:5], "little")
+            result["width"] = (bits & 0x3FFF) + 1
+            result["height"] = ((bits >> 14) & 0x3FFF) + 1
+        elif kind == b"EXIF":
+            # Some writers keep the JPEG APP1 prefix
+            result["exif_payload"] = body[6:] if body[:6] == EXIF_HEADER else body
+        elif kind == b"XMP ":
+            result["xmp_payload"] = bytes(body)
+        elif kind == b"ICCP":
+            result["icc_payload"] = bytes(body)
+
+        # Chunks are padded to an even size
+        position += 8 + length + (length & 1)
+    return result
+
+
+def parse_exif(tiff: memoryview) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """Selected EXIF fields and the IFD1 thumbnail location from a TIFF blob"""
+    if tiff[:2] == b"II":
+        order = "<"
+    elif tiff[:2] == b"MM":
+        order = ">"
+    else:
+        return {}, None
+
+    ifd0_offset = struct.unpack_from(order + "I", tiff, 4)[0]
+    ifd0, ifd1_offset = _read_ifd(tiff, order, ifd0_offset)
+    tags = dict(ifd0)
+    if TAG_EXIF_IFD in ifd0:
+        tags.update(_read_ifd(tiff, order, ifd0[TAG_EXIF_IFD])[0])
+
+    exif = {
+        "make": tags.get(TAG_MAKE),
+        "model": tags.get(TAG_MODEL),
+        "software": tags.get(TAG_SOFTWARE),
+        "datetime": tags.get(TAG_DATETIME),
+        "datetime_original": tags.get(TAG_DATETIME_ORIGINAL),
+        "datetime_digitized": tags.get(TAG_DATETIME_DIGITIZED),
+        "orientation": tags.get(TAG_ORIENTATION),
+        "pixel_width": tags.get(TAG_PIXEL_X),
+        "pixel_height": tags.get(TAG_PIXEL_Y),
+        "has_gps": TAG_GPS_IFD in ifd0,
+        "tag_count": len(tags),
+    }
+
+    thumbnail = None
+    if ifd1_offset:
+        ifd1, _ = _read_ifd(tiff, order, ifd1_offset)
+        offset, length = ifd1.get(TAG_THUMBNAIL_OFFSET), ifd1.get(TAG_THUMBNAIL_LENGTH)
+        if offset and length and offset + length <= len(tiff):
+            frame = _parse_jpeg(tiff[offset:offset + length])
+            thumbnail = {
+                "bytes": length,
+                "width": frame.get("width"),
+                "height": frame.get("height"),
+            }
+    return exif, thumbnail
+
+
+def _read_ifd(tiff: memoryview, order: str, offset: int) -> Tuple[Dict[int, Any], int]:
+    entries: Dict[int, Any] = {}
+    if offset <= 0 or offset + 2 > len(tiff):
+        return entries, 0
+
+    count = struct.unpack_from(order + "H", tiff, offset)[0]
+    position = offset + 2
+    for _ in range(count):
+        if position + 12 > len(tiff):
+            break
+        tag, kind, values = struct.unpack_from(order + "HHI", tiff, position)
+        size = _TYPE_SIZES.get(kind, 1) * values
+        # Values of up to four bytes are stored inline
+        value_offset = position + 8 if size <= 4 else struct.unpack_from(order + "I", tiff, position + 8)[0]
+        if value_offset + size <= len(tiff):
+            entries[tag] = _read_value(tiff, order, kind, values, value_offset)
+        position += 12
+
+    next_offset = 0
+    if position + 4 <= len(tiff):
+        next_offset = struct.unpack_from(order + "I", tiff, position)[0]
+    return entries, next_offset
+
+
+def _read_value(tiff: memoryview, order: str, kind: int, count: int, offset: int):
+    if kind == 2:
+        return bytes(tiff[offset:offset + count]).split(b"\x00", 1)[0].decode("utf-8", "replace").strip()
+    if kind == 3:
+        values = struct.unpack_from(f"{order}{count}H", tiff, offset)
+    elif kind in (4, 9):
+        values = struct.unpack_from(f"{order}{count}{'I' if kind == 4 else 'i'}", tiff, offset)
+    elif kind in (5, 10):
+        pairs = struct.unpack_from(f"{order}{2 * count}{'I' if kind == 5 else 'i'}", tiff, offset)
+        values = tuple(pairs[i] / pairs[i + 1] if pairs[i + 1] else 0.0 for i in range(0, len(pairs), 2))
+    else:
+        return None
+    return values[0] if count == 1 else list(values)
+
+
+def parse_xmp(packet: bytes) -> Dict[str, Any]:
+    text = packet.decode("utf-8", "replace")
+    xmp: Dict[str, Any] = {}
+    for key, name in _XMP_FIELDS.items():
+        match = re.search(_XMP_ATTRIBUTE.format(name=re.escape(name)), text)
+        if match:
+            xmp[key] = (match.group(1) or match.group(2) or "").strip()
+    agents = [a or b for a, b in _XMP_AGENT.findall(text)]
+    xmp["history_agents"] = sorted(set(agent.strip() for agent in agents if agent.strip()))
+    return xmp
+
+
+def parse_icc(profile: bytes) -> Dict[str, Any]:
+    if len(profile) < 132:
+        return {}
+    icc = {
+        "size": struct.unpack_from(">I", profile, 0)[0],
+        "cmm": profile[4:8].decode("latin-1").strip("\x00 "),
+        "device_class": profile[12:16].decode("latin-1").strip(),
+        "color_space": profile[16:20].decode("latin-1").strip(),
+        "creator": profile[80:84].decode("latin-1").strip("\x00 "),
+        "description": None,
+    }
+
+    tag_count = struct.unpack_from(">I", profile, 128)[0]
+    for index in range(min(tag_count, 256)):
+        entry = 132 + 12 * index
+        if entry + 12 > len(profile):
+            break
+        signature, offset, size = struct.unpack_from(">4sII", profile, entry)
+        if signature == b"desc":
+            icc["description"] = _icc_text(profile[offset:offset + size])
+            break
+    return icc
+
+
+def _icc_text(element: bytes) -> Optional[str]:
+    kind = element[:4]
+    if kind == b"desc" and len(element) >= 12:
+        length = struct.unpack_from(">I", element, 8)[0]
+        return element[12:12 + length].split(b"\x00", 1)[0].decode("latin-1")
+    if kind == b"mluc" and len(element) >= 28:
+        length, offset = struct.unpack_from(">II", element, 20)
+        return element[offset:offset + length].decode("utf-16-be", "replace")
+    return None
+
+
+def metadata_indicators(metadata: Dict[str, Any]) -> List[str]:
+    """Suspicious findings derived from header metadata alone"""
+    indicators = []
+    exif, xmp = metadata["exif"], metadata["xmp"]
+
+    tools = [exif.get("software"), xmp.get("creator_tool"), *xmp.get("history_agents", [])]
+    editors = sorted({
+        tool for tool in tools
+        if tool and any(name in tool.lower() for name in EDITING_SOFTWARE)
+    })
+    if editors:
+        indicators.append(f"Edited with {', '.join(editors)}")
+
+    original, modified = exif.get("datetime_original"), exif.get("datetime")
+    if original and modified and modified > original:
+        indicators.append("Modified after capture (DateTime later than DateTimeOriginal)")
+
+    original_id, document_id = xmp.get("original_document_id"), xmp.get("document_id")
+    if original_id and document_id and original_id != document_id:
+        indicators.append("XMP document derived from another original")
+
+    width, height = metadata.get("width"), metadata.get("height")
+    recorded = (exif.get("pixel_width"), exif.get("pixel_height"))
+    if width and height and all(recorded) and set(recorded) != {width, height}:
+        indicators.append(
+            f"EXIF dimensions {recorded[0]}x{recorded[1]} differ from image {width}x{height}"
+        )
+
+    thumbnail = metadata.get("thumbnail")
+    if width and height and thumbnail and thumbnail.get("width") and thumbnail.get("height"):
+        image_aspect = max(width, height) / min(width, height)
+        thumb_aspect = max(thumbnail["width"], thumbnail["height"]) / min(thumbnail["width"], thumbnail["height"])
+        landscape_mismatch = (width >= height) != (thumbnail["width"] >= thumbnail["height"])
+        if abs(image_aspect - thumb_aspect) / image_aspect > THUMBNAIL_ASPECT_TOLERANCE or (
+            landscape_mismatch and width != height and thumbnail["width"] != thumbnail["height"]
+        ):
+            indicators.append("Embedded thumbnail does not match the image (cropped or replaced)")
+
+    return indicators
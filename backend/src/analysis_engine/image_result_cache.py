@@ -0,0 +1,118 @@
+from typing import Dict, Any, Optional
+from collections import OrderedDict
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Set to an empty string to keep the cache in memory only
+IMAGE_RESULT_CACHE_PATH = os.getenv(
+    "IMAGE_RESULT_CACHE_PATH", os.path.join("cache", "image_results.db")
+)
+
+MAX_MEMORY_BYTES = 64 * 1024 * 1024
+MAX_DISK_ENTRIES = 200_000
+# Disk pruning runs once per this many writes
+PRUNE_INTERVAL = 1000
+
+
+class ImageResultCache:
+    """
+    Size-bounded LRU cache of per-image stage results.
+
+    Forensic results and OCR text are keyed by the SHA-256 of the uploaded
+    bytes; a perceptual hash would hand one caption's text to every meme
+    built on the same template. Entries are held as serialized JSON, which bounds
+    memory by actual size and hands every caller an independent copy.
+    With a database path, entries are also written to SQLite and evicted
+    from it oldest-access-first beyond ``max_disk_entries``.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = IMAGE_RESULT_CACHE_PATH,
+        max_memory_bytes: int = MAX_MEMORY_BYTES,
+        max_disk_entries: int = MAX_DISK_ENTRIES,
+    ):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_entries = max_disk_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_bytes = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS image_results (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    accessed_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_image_results_accessed
+                    ON image_results (accessed_at);
+            """)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            elif self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value FROM image_results WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    value = row[0]
+                    with self._conn:
+                        self._conn.execute(
+                            "UPDATE image_results SET accessed_at = ? WHERE key = ?", (time.time(), key)
+                        )
+                    self._remember(key, value)
+        return json.loads(value) if value is not None else None
+
+    def put(self, key: str, result: Dict[str, Any]):
+        value = json.dumps(result)
+        with self._lock:
+            self._remember(key, value)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO image_results VALUES (?, ?, ?)", (key, value, time.time())
+                    )
+                self._writes += 1
+                if self._writes % PRUNE_INTERVAL == 0:
+                    self._prune_disk()
+
+    def _remember(self, key: str, value: str):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._entries[key] = value
+        self._memory_bytes += len(value)
+        while self._memory_bytes > self.max_memory_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _prune_disk(self):
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM image_results WHERE key IN ("
+                "SELECT key FROM image_results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,),
+            )
+
+
+_cache: Optional[ImageResultCache] = None
+
+
+def get_image_result_cache() -> ImageResultCache:
+    global _cache
+    if _cache is None:
+        _cache = ImageResultCache()
+    return _cache
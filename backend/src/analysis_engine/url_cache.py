@@ -0,0 +1,246 @@
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, unquote
+import json
+import os
+import sqlite3
+import threading
+import time
+
+URL_CACHE_PATH = os.path.join("cache", "url_analysis.db")
+# Analyses and aliases older than MAX_ENTRY_AGE_SECONDS are pruned, then
+# the oldest beyond MAX_ENTRIES, once per PRUNE_INTERVAL writes
+MAX_ENTRY_AGE_SECONDS = 30 * 24 * 3600
+MAX_ENTRIES = 100_000
+PRUNE_INTERVAL = 500
+
+# Query parameters that only carry campaign / click tracking
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "gclsrc", "msclkid", "yclid", "twclid", "igshid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi", "mkt_tok", "oly_anon_id",
+    "oly_enc_id", "vero_id", "wickedid", "cmpid", "smid", "smtyp", "ito", "ref",
+    "ref_src", "ref_url", "referrer", "s_cid", "at_medium", "at_campaign",
+    "__twitter_impression", "amp", "outputtype",
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_", "hmb_")
+
+# Mobile / AMP host prefixes that serve the same article as the desktop site
+MOBILE_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+
+AMP_CACHE_SUFFIX = ".cdn.ampproject.org"
+
+# Second-level labels under which country-code domains are registered
+# (example.co.uk, example.com.au)
+COUNTRY_SECOND_LEVEL = {"ac", "co", "com", "edu", "gov", "gob", "govt", "net", "nic", "or", "org", "ne", "go"}
+# Hosting suffixes whose subdomains belong to unrelated owners
+SHARED_HOST_SUFFIXES = {
+    "blogspot.com", "wordpress.com", "tumblr.com", "substack.com", "medium.com",
+    "github.io", "gitlab.io", "netlify.app", "vercel.app", "pages.dev", "web.app",
+    "firebaseapp.com", "appspot.com", "herokuapp.com", "azurewebsites.net",
+    "cloudfront.net", "s3.amazonaws.com", "wixsite.com", "weebly.com", "neocities.org",
+}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalise a URL so variants of the same article share one key.
+
+    Lower-cases the scheme and host, drops default ports, mobile / AMP
+    prefixes, tracking parameters and fragments, unwraps Google AMP cache
+    URLs and sorts the remaining query string.
+    """
+    url = url.strip()
+    if "://" not in url:
+        url = "https://" + url
+
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower().rstrip(".")
+    path = parts.path or "/"
+
+    # https://www.google.com/amp/s/example.com/a  and
+    # https://example-com.cdn.ampproject.org/c/s/example.com/a
+    if (host.endswith(".google.com") or host == "google.com") and path.startswith("/amp/"):
+        rest = path[len("/amp/"):]
+        secure = rest.startswith("s/")
+        return canonicalize_url(_unwrap_amp_path(rest[2:] if secure else rest, secure))
+    if host.endswith(AMP_CACHE_SUFFIX):
+        for prefix in ("/c/s/", "/v/s/", "/i/s/", "/c/", "/v/", "/i/"):
+            if path.startswith(prefix):
+                return canonicalize_url(_unwrap_amp_path(path[len(prefix):], prefix.endswith("/s/")))
+
+    for prefix in MOBILE_PREFIXES:
+        if host.startswith(prefix) and host.count(".") > 1:
+            host = host[len(prefix):]
+            break
+
+    port = parts.port
+    netloc = host if port in (None, 80, 443) else f"{host}:{port}"
+
+    # AMP path variants: /article/amp, /article/amp/, /article.amp.html
+    lowered = path.lower()
+    if lowered.endswith("/amp") or lowered.endswith("/amp/"):
+        path = path[:lowered.rindex("/amp")] or "/"
+    elif lowered.endswith(".amp.html"):
+        path = path[:-len(".amp.html")] + ".html"
+    elif lowered.endswith(".amp"):
+        path = path[:-len(".amp")]
+
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/") or "/"
+
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    query.sort()
+
+    return urlunsplit(("https", netloc, path, urlencode(query), ""))
+
+
+def registrable_domain(url: str) -> str:
+    """
+    The domain a URL's owner registered: example.com for
+    news.example.com, example.co.uk for www.example.co.uk and
+    someone.github.io on shared hosting suffixes.
+    """
+    host = (urlsplit(url if "://" in url else "https://" + url).hostname or "").lower().rstrip(".")
+    labels = host.split(".")
+    if len(labels) <= 2 or host.replace(".", "").isdigit():
+        return host
+    size = 2
+    if len(labels[-1]) == 2 and labels[-2] in COUNTRY_SECOND_LEVEL:
+        size = 3
+    for suffix in SHARED_HOST_SUFFIXES:
+        if host.endswith("." + suffix):
+            size = suffix.count(".") + 2
+            break
+    return ".".join(labels[-size:])
+
+
+def same_site(url: str, other: str) -> bool:
+    """Whether two URLs are on the same registrable domain"""
+    return bool(registrable_domain(url)) and registrable_domain(url) == registrable_domain(other)
+
+
+def _unwrap_amp_path(rest: str, secure: bool) -> str:
+    scheme = "https" if secure else "http"
+    return f"{scheme}://{unquote(rest)}"
+
+
+class UrlAnalysisCache:
+    """
+    Disk-backed cache of URL analyses.
+
+    Results are keyed by canonical URL, the analysis options and a hash of
+    the extracted page content, so an article is re-analysed only when its content changes.
+    Every URL variant requested is remembered as an alias of its canonical
+    URL, together with the URL the page was last fetched from, so later
+    variants skip redirect chains and hit the HTTP cache. Only URLs the
+    fetch actually went through are aliased; a page's own canonical link
+    is never trusted to stand for another URL.
+
+    Methods block on SQLite; call them through ``asyncio.to_thread``.
+    """
+
+    def __init__(
+        self,
+        db_path: str = URL_CACHE_PATH,
+        max_age: float = MAX_ENTRY_AGE_SECONDS,
+        max_entries: int = MAX_ENTRIES,
+    ):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS url_analyses (
+                canonical_url TEXT NOT NULL,
+                options TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (canonical_url, options)
+            );
+            CREATE TABLE IF NOT EXISTS url_aliases (
+                url TEXT PRIMARY KEY,
+                canonical_url TEXT NOT NULL,
+                fetch_url TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_url_analyses_created ON url_analyses (created_at);
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(url_aliases)")}
+        if "seen_at" not in columns:
+            # Caches created before pruning
+            self._conn.execute(f"ALTER TABLE url_aliases ADD COLUMN seen_at REAL NOT NULL DEFAULT {time.time()}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_url_aliases_seen ON url_aliases (seen_at)")
+        self._conn.commit()
+
+    def resolve(self, url: str) -> Optional[str]:
+        """URL to fetch for a previously seen URL variant"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetch_url FROM url_aliases WHERE url = ?", (url,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get(self, canonical_url: str, options: str, content_hash: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM url_analyses "
+                "WHERE canonical_url = ? AND options = ? AND content_hash = ?",
+                (canonical_url, options, content_hash),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(
+        self,
+        canonical_url: str,
+        options: str,
+        content_hash: str,
+        result: Dict[str, Any],
+        fetch_url: str,
+        aliases=(),
+    ):
+        now = time.time()
+        with self._lock, self._conn:
+            # Replaces the analysis of any older content version of the page
+            self._conn.execute(
+                "INSERT OR REPLACE INTO url_analyses VALUES (?, ?, ?, ?, ?)",
+                (canonical_url, options, content_hash, json.dumps(result), now),
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO url_aliases (url, canonical_url, fetch_url, seen_at) VALUES (?, ?, ?, ?)",
+                [(alias, canonical_url, fetch_url, now) for alias in set(aliases)],
+            )
+            self._writes += 1
+            if self._writes % PRUNE_INTERVAL == 0:
+                self._prune(now)
+
+    def _prune(self, now: float):
+        cutoff = now - self.max_age
+        self._conn.execute("DELETE FROM url_analyses WHERE created_at < ?", (cutoff,))
+        self._conn.execute("DELETE FROM url_aliases WHERE seen_at < ?", (cutoff,))
+        self._conn.execute(
+            "DELETE FROM url_analyses WHERE rowid IN ("
+            "SELECT rowid FROM url_analyses ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self._conn.execute(
+            "DELETE FROM url_aliases WHERE rowid IN ("
+            "SELECT rowid FROM url_aliases ORDER BY seen_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+
+_cache: Optional[UrlAnalysisCache] = None
+
+
+def get_url_analysis_cache() -> UrlAnalysisCache:
+    global _cache
+    if _cache is None:
+        _cache = UrlAnalysisCache()
+    return _cache
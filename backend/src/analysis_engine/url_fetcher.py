@@ -0,0 +1,341 @@
+from typing import Dict, Any, List, Optional
+from contextlib import asynccontextmanager
+from urllib.parse import urljoin, urlsplit
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+
+import aiofiles
+import httpx
+
+# Fetch limits
+MAX_BODY_BYTES = 2 * 1024 * 1024
+MAX_REDIRECTS = 5
+MAX_CONNECTIONS = 50
+PER_HOST_CONNECTIONS = 4
+REQUEST_TIMEOUT = 10.0
+CHUNK_SIZE = 64 * 1024
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+# Local response cache; entries unused for MAX_CACHE_AGE_SECONDS are
+# evicted, then the oldest until the cache fits in MAX_CACHE_BYTES
+HTTP_CACHE_DIR = os.path.join("cache", "http")
+MAX_FRESH_SECONDS = 15 * 60
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+MAX_CACHE_AGE_SECONDS = 7 * 24 * 3600
+# Cache pruning runs once per this many writes
+PRUNE_INTERVAL = 200
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class UrlFetcher:
+    """
+    Async HTTP fetcher on a shared connection pool.
+
+    Enforces per-host concurrency, a body size cap and a redirect limit, and
+    keeps a local response cache that is revalidated with ETag /
+    Last-Modified conditional requests.
+
+    Redirects are followed here rather than by httpx, so every hop waits
+    for a slot of the host it actually requests. Cache files are written
+    to a temporary name and renamed into place; each body file is named
+    by its content hash and the metadata names the body it describes, so
+    readers never see a torn entry.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = HTTP_CACHE_DIR,
+        max_body_bytes: int = MAX_BODY_BYTES,
+        max_redirects: int = MAX_REDIRECTS,
+        per_host_connections: int = PER_HOST_CONNECTIONS,
+        timeout: float = REQUEST_TIMEOUT,
+    ):
+        self.cache_dir = cache_dir
+        self.max_body_bytes = max_body_bytes
+        self.max_redirects = max_redirects
+        self.per_host_connections = per_host_connections
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        # Semaphore and number of holders per host, dropped when unused
+        self._host_limits: Dict[str, list] = {}
+        self._writes = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers={"User-Agent": USER_AGENT},
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_CONNECTIONS,
+                ),
+                follow_redirects=False,
+            )
+        return self._client
+
+    async def fetch(self, url: str) -> Dict[str, Any]:
+        """
+        Fetch a URL, serving from the local cache when fresh and revalidating
+        it with a conditional request otherwise.
+        """
+        cached = await self._read_cache(url)
+
+        if cached and cached["meta"].get("expires_at", 0) > time.time():
+            return self._cached_result(url, cached, revalidated=False)
+
+        headers = {}
+        if cached:
+            if cached["meta"].get("etag"):
+                headers["If-None-Match"] = cached["meta"]["etag"]
+            if cached["meta"].get("last_modified"):
+                headers["If-Modified-Since"] = cached["meta"]["last_modified"]
+
+        try:
+            target = url
+            for _ in range(self.max_redirects + 1):
+                async with self._host_limit(urlsplit(target).hostname or ""):
+                    async with self.client.stream("GET", target, headers=headers) as response:
+                        if response.status_code in REDIRECT_STATUSES and "location" in response.headers:
+                            target = urljoin(str(response.url), response.headers["location"])
+                            continue
+
+                        if response.status_code == 304 and cached:
+                            cached["meta"]["expires_at"] = self._expires_at(response.headers)
+                            await self._write_meta(url, cached["meta"])
+                            return self._cached_result(url, cached, revalidated=True)
+
+                        content, truncated = await self._read_body(response)
+                        result = {
+                            "url": url,
+                            "final_url": str(response.url),
+                            "status_code": response.status_code,
+                            "content": content,
+                            "content_type": response.headers.get("content-type", ""),
+                            "encoding": response.charset_encoding,
+                            "truncated": truncated,
+                            "from_cache": False,
+                        }
+
+                        if response.status_code == 200 and not truncated:
+                            await self._write_cache(url, result, response.headers)
+
+                        return result
+
+            return self._error_result(url, f"Exceeded {self.max_redirects} redirects")
+        except httpx.HTTPError as e:
+            if cached:
+                # Serve stale content rather than nothing when the origin is down
+                result = self._cached_result(url, cached, revalidated=False)
+                result["stale"] = True
+                return result
+            return self._error_result(url, str(e) or e.__class__.__name__)
+
+    async def aclose(self):
+        """Close the shared connection pool"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @asynccontextmanager
+    async def _host_limit(self, host: str):
+        """One of ``per_host_connections`` slots for a host"""
+        entry = self._host_limits.get(host)
+        if entry is None:
+            entry = self._host_limits[host] = [asyncio.Semaphore(self.per_host_connections), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._host_limits[host]
+
+    async def _read_body(self, response: httpx.Response):
+        """Stream the body, stopping once the size cap is reached"""
+        chunks = []
+        received = 0
+        truncated = False
+        async for chunk in response.aiter_bytes(CHUNK_SIZE):
+            remaining = self.max_body_bytes - received
+            if len(chunk) > remaining:
+                # Keep the head of oversized pages; the article is usually there
+                chunks.append(chunk[:remaining])
+                truncated = True
+                break
+            chunks.append(chunk)
+            received += len(chunk)
+
+        return b"".join(chunks), truncated
+
+    def _expires_at(self, headers: httpx.Headers) -> float:
+        cache_control = headers.get("cache-control", "").lower()
+        if "no-cache" in cache_control or "no-store" in cache_control:
+            return 0
+        match = _MAX_AGE_RE.search(cache_control)
+        if not match:
+            return 0
+        return time.time() + min(int(match.group(1)), MAX_FRESH_SECONDS)
+
+    def _cache_base(self, url: str) -> str:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    async def _read_cache(self, url: str) -> Optional[Dict[str, Any]]:
+        base = self._cache_base(url)
+        try:
+            async with aiofiles.open(base + ".json", "r") as f:
+                meta = json.loads(await f.read())
+            async with aiofiles.open(os.path.join(os.path.dirname(base), meta["body"]), "rb") as f:
+                body = await f.read()
+            return {"meta": meta, "body": body}
+        except (OSError, ValueError, KeyError):
+            return None
+
+    async def _write_file(self, path: str, data):
+        """Write to a temporary name and rename into place"""
+        staged = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            async with aiofiles.open(staged, "wb" if isinstance(data, bytes) else "w") as f:
+                await f.write(data)
+            os.replace(staged, path)
+        except OSError:
+            try:
+                os.remove(staged)
+            except OSError:
+                pass
+            raise
+
+    async def _write_meta(self, url: str, meta: Dict[str, Any]):
+        try:
+            await self._write_file(self._cache_base(url) + ".json", json.dumps(meta))
+        except OSError as e:
+            print(f"Error writing HTTP cache for {url}: {str(e)}")
+
+    async def _write_cache(self, url: str, result: Dict[str, Any], headers: httpx.Headers):
+        if "no-store" in headers.get("cache-control", "").lower():
+            return
+
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        if not etag and not last_modified and not self._expires_at(headers):
+            return  # Nothing to revalidate against
+
+        base = self._cache_base(url)
+        body_name = f"{os.path.basename(base)}.{hashlib.sha256(result['content']).hexdigest()[:16]}.body"
+        body_path = os.path.join(os.path.dirname(base), body_name)
+        try:
+            os.makedirs(os.path.dirname(base), exist_ok=True)
+            previous = await self._read_cache(url)
+            await self._write_file(body_path, result["content"])
+            await self._write_file(base + ".json", json.dumps({
+                "body": body_name,
+                "final_url": result["final_url"],
+                "content_type": result["content_type"],
+                "encoding": result["encoding"],
+                "etag": etag,
+                "last_modified": last_modified,
+                "expires_at": self._expires_at(headers),
+            }))
+            if previous and previous["meta"]["body"] != body_name:
+                os.remove(os.path.join(os.path.dirname(base), previous["meta"]["body"]))
+        except OSError as e:
+            print(f"Error writing HTTP cache for {url}: {str(e)}")
+            return
+
+        self._writes += 1
+        if self._writes % PRUNE_INTERVAL == 0:
+            await asyncio.to_thread(prune_http_cache, self.cache_dir)
+
+    def _cached_result(self, url: str, cached: Dict[str, Any], revalidated: bool) -> Dict[str, Any]:
+        meta = cached["meta"]
+        return {
+            "url": url,
+            "final_url": meta.get("final_url", url),
+            "status_code": 200,
+            "content": cached["body"],
+            "content_type": meta.get("content_type", ""),
+            "encoding": meta.get("encoding"),
+            "truncated": False,
+            "from_cache": True,
+            "revalidated": revalidated,
+        }
+
+    def _error_result(self, url: str, error: str) -> Dict[str, Any]:
+        return {
+            "url": url,
+            "final_url": url,
+            "status_code": 0,
+            "content": b"",
+            "content_type": "",
+            "encoding": None,
+            "truncated": False,
+            "from_cache": False,
+            "error": error,
+        }
+
+
+def prune_http_cache(
+    cache_dir: str = HTTP_CACHE_DIR,
+    max_bytes: int = MAX_CACHE_BYTES,
+    max_age: float = MAX_CACHE_AGE_SECONDS,
+) -> int:
+    """
+    Evict cache entries not written or revalidated within ``max_age``,
+    then the least recently refreshed until the cache fits in
+    ``max_bytes``; returns the number of entries removed.
+    """
+    entries: Dict[str, List] = {}
+    for directory, _, names in os.walk(cache_dir):
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            # Metadata, bodies and staged files of a URL share its key prefix
+            entry = entries.setdefault(os.path.join(directory, name.split(".")[0]), [0.0, 0, []])
+            entry[0] = max(entry[0], stat.st_mtime)
+            entry[1] += stat.st_size
+            entry[2].append(path)
+
+    cutoff = time.time() - max_age
+    total = sum(entry[1] for entry in entries.values())
+    removed = 0
+    for refreshed_at, size, paths in sorted(entries.values()):
+        if refreshed_at >= cutoff and total <= max_bytes:
+            break
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        total -= size
+        removed += 1
+    return removed
+
+
+_fetcher: Optional[UrlFetcher] = None
+
+
+def get_url_fetcher() -> UrlFetcher:
+    """Shared fetcher so every analyzer instance reuses one connection pool"""
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = UrlFetcher()
+    return _fetcher
+
+
+async def close_url_fetcher():
+    if _fetcher is not None:
+        await _fetcher.aclose()
@@ -8,4 +8,6 @@ def setup_cors(app):
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # Pagination cursor of the archive listing
+        expose_headers=["X-Next-Cursor"],
     )
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from typing import List, Optional
 from datetime import datetime, timedelta
 import json
@@ -33,18 +33,23 @@ class ArchiveStats(BaseModel):
 
 @router.get("/archive", response_model=List[ArchiveResponse])
 async def get_archived_analyses(
-    search: Optional[str] = Query(None, description="Search term for content"),
+    response: Response,
+    search: Optional[str] = Query(None, description="Search terms; \"quoted phrases\" must match exactly"),
     risk_level: Optional[str] = Query(None, description="Filter by risk level (low, medium, high)"),
     verdict: Optional[str] = Query(None, description="Filter by verdict"),
     analysis_type: Optional[str] = Query(None, description="Filter by analysis type"),
     date_from: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     date_to: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
-    limit: int = Query(50, description="Number of results to return"),
+    limit: int = Query(50, ge=1, le=500, description="Number of results to return"),
     offset: int = Query(0, description="Number of results to skip"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     archive_service: ArchiveService = Depends()
 ):
     """
     Get archived analyses with filtering and pagination
+    
+    The cursor of the next page, if any, is returned in the X-Next-Cursor
+    header; passing it back is cheaper than ``offset``.
     """
     try:
         # Build filters
@@ -63,12 +68,17 @@ async def get_archived_analyses(
             filters["date_to"] = date_to
         
         # Get analyses
-        analyses = await archive_service.get_analyses(filters, limit, offset)
+        try:
+            analyses, next_cursor = await archive_service.get_analyses_page(filters, limit, cursor, offset)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         
         # Convert to response format
-        response = []
+        results = []
         for analysis in analyses:
-            response.append(ArchiveResponse(
+            results.append(ArchiveResponse(
                 id=analysis.get("id", ""),
                 title=analysis.get("title", "Untitled Analysis"),
                 content=analysis.get("content", ""),
@@ -80,39 +90,13 @@ async def get_archived_analyses(
                 updated_at=analysis.get("updated_at", "")
             ))
         
-        return response
+        return results
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get archived analyses: {str(e)}")
 
-@router.get("/archive/{analysis_id}", response_model=ArchiveResponse)
-async def get_analysis_by_id(
-    analysis_id: str,
-    archive_service: ArchiveService = Depends()
-):
-    """
-    Get specific analysis by ID
-    """
-    try:
-        analysis = await archive_service.get_analysis_by_id(analysis_id)
-        if not analysis:
-            raise HTTPException(status_code=404, detail="Analysis not found")
-        
-        return ArchiveResponse(
-            id=analysis.get("id", ""),
-            title=analysis.get("title", "Untitled Analysis"),
-            content=analysis.get("content", ""),
-            verdict=analysis.get("verdict", "UNVERIFIED"),
-            risk_score=analysis.get("risk_score", 0),
-            confidence=analysis.get("confidence", 0.0),
-            analysis_type=analysis.get("analysis_type", "text"),
-            created_at=analysis.get("created_at", ""),
-            updated_at=analysis.get("updated_at", "")
-        )
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get analysis: {str(e)}")
-
 @router.get("/archive/stats", response_model=ArchiveStats)
 async def get_archive_stats(
     time_range: str = Query("7d", description="Time range for stats (1d, 7d, 30d, 90d, 1y)"),
@@ -181,6 +165,50 @@ async def export_archive(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to export archive: {str(e)}")
 
+@router.get("/archive/trends")
+async def get_analysis_trends(
+    time_range: str = Query("30d", description="Time range for trends"),
+    granularity: str = Query("day", description="Data granularity (hour, day, week)"),
+    archive_service: ArchiveService = Depends()
+):
+    """
+    Get analysis trends over time
+    """
+    try:
+        trends = await archive_service.get_trends(time_range, granularity)
+        return trends
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get trends: {str(e)}")
+
+@router.get("/archive/{analysis_id}", response_model=ArchiveResponse)
+async def get_analysis_by_id(
+    analysis_id: str,
+    archive_service: ArchiveService = Depends()
+):
+    """
+    Get specific analysis by ID
+    """
+    try:
+        analysis = await archive_service.get_analysis_by_id(analysis_id)
+        if not analysis:
+            raise HTTPException(status_code=404, detail="Analysis not found")
+        
+        return ArchiveResponse(
+            id=analysis.get("id", ""),
+            title=analysis.get("title", "Untitled Analysis"),
+            content=analysis.get("content", ""),
+            verdict=analysis.get("verdict", "UNVERIFIED"),
+            risk_score=analysis.get("risk_score", 0),
+            confidence=analysis.get("confidence", 0.0),
+            analysis_type=analysis.get("analysis_type", "text"),
+            created_at=analysis.get("created_at", ""),
+            updated_at=analysis.get("updated_at", "")
+        )
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get analysis: {str(e)}")
+
 @router.delete("/archive/{analysis_id}")
 async def delete_analysis(
     analysis_id: str,
@@ -246,19 +274,3 @@ async def get_search_suggestions(
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get suggestions: {str(e)}")
-
-@router.get("/archive/trends")
-async def get_analysis_trends(
-    time_range: str = Query("30d", description="Time range for trends"),
-    granularity: str = Query("day", description="Data granularity (hour, day, week)"),
-    archive_service: ArchiveService = Depends()
-):
-    """
-    Get analysis trends over time
-    """
-    try:
-        trends = await archive_service.get_trends(time_range, granularity)
-        return trends
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get trends: {str(e)}")
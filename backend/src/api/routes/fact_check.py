@@ -1,11 +1,14 @@
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Response
 from typing import Optional
 from datetime import datetime
+import asyncio
 import os
 from dotenv import load_dotenv
 import requests
 import json
 from analysis_engine.comprehensive_analysis import ComprehensiveAnalyzer
+from database.upload_store import get_upload_store
+from api.routes.upload import analyze_blob
 
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -68,6 +71,7 @@ async def analyze_content(
     text: Optional[str] = Form(None),
     url: Optional[str] = Form(None),
     image: Optional[UploadFile] = File(None),
+    file_id: Optional[str] = Form(None),
     analysis_type: str = Form("text"),
     language: str = Form("en"),
     include_sources: bool = Form(True),
@@ -86,7 +90,7 @@ async def analyze_content(
             raise HTTPException(status_code=400, detail="Text content is required for text analysis")
         elif analysis_type == "url" and not url:
             raise HTTPException(status_code=400, detail="URL is required for URL analysis")
-        elif analysis_type == "image" and not image:
+        elif analysis_type == "image" and not (image or file_id):
             raise HTTPException(status_code=400, detail="Image file is required for image analysis")
 
         # Prepare analysis data
@@ -103,8 +107,32 @@ async def analyze_content(
         elif analysis_type == "image":
             analysis_data["file"] = image
 
+        # A file already uploaded is analyzed by reference; its stored
+        # analysis is served without running the analyzers again
+        stored_ref = None
+        if file_id and analysis_type in ("image", "document"):
+            store = get_upload_store()
+            stored_ref = await asyncio.to_thread(store.get_ref, file_id)
+            if stored_ref is None:
+                raise HTTPException(status_code=404, detail="Uploaded file not found")
+            if stored_ref["upload_type"] != analysis_type:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Uploaded file is a {stored_ref['upload_type']}, not a {analysis_type}"
+                )
+
+        if stored_ref is not None:
+            result = await analyze_blob(stored_ref["sha256"], {
+                **analysis_data,
+                "sha256": stored_ref["sha256"],
+                "file_path": store.blob_path(stored_ref["sha256"]),
+                "filename": stored_ref["filename"],
+                "content_type": stored_ref["content_type"]
+            }, analyzer, store)
+            if result is None:
+                raise HTTPException(status_code=500, detail="Analysis of the uploaded file failed")
         # If text analysis, use Gemini API
-        if analysis_type == "text" and text:
+        elif analysis_type == "text" and text:
             gemini_result = analyze_with_gemini(text)
             print("Gemini raw response:", gemini_result)
             result = {
@@ -1,13 +1,20 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, Query
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, List, Optional, Tuple
+from dataclasses import dataclass
 import aiofiles
+import asyncio
+import hashlib
+import json
 import os
+import time
 from datetime import datetime
 import uuid
 from pydantic import BaseModel
 
-from analysis_engine.image_forensics import ImageForensics
+from analysis_engine.image_forensics import ImageForensics, SPOOL_THRESHOLD_BYTES
 from analysis_engine.comprehensive_analysis import ComprehensiveAnalyzer
+from database.upload_store import UploadStore, get_upload_store
 
 router = APIRouter()
 
@@ -15,9 +22,105 @@ router = APIRouter()
 ALLOWED_IMAGE_TYPES = ["image/jpeg", "image/png", "image/gif", "image/webp"]
 ALLOWED_DOCUMENT_TYPES = ["application/pdf", "text/plain", "application/msword"]
 
-# Upload directory
-UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+# Uploads are streamed to disk in fixed-size chunks and rejected as soon
+# as they pass MAX_UPLOAD_BYTES
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", 50)) * 1024 * 1024
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+# Files of a batch analyzed at once, by default and at most
+BATCH_CONCURRENCY = int(os.getenv("UPLOAD_BATCH_CONCURRENCY", 4))
+MAX_BATCH_CONCURRENCY = 16
+MAX_BATCH_FILES = 100
+
+# Leading bytes that identify each allowed type
+FILE_SIGNATURES = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"%PDF-", "application/pdf"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/msword"),
+]
+
+@dataclass
+class StoredUpload:
+    file_path: str
+    file_size: int
+    sha256: str
+    content_type: str
+    # The whole body, kept only for uploads up to SPOOL_THRESHOLD_BYTES
+    content: Optional[bytes]
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """Content type from the first bytes of a file, or None if unrecognised"""
+    for signature, content_type in FILE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    # Plain text: no NUL bytes and valid UTF-8, allowing for a multi-byte
+    # character cut at the chunk boundary
+    if head and b"\x00" not in head:
+        try:
+            head.decode("utf-8")
+            return "text/plain"
+        except UnicodeDecodeError as e:
+            if e.start >= len(head) - 3:
+                return "text/plain"
+    return None
+
+async def store_upload(upload: UploadFile, file_path: str, allowed_types: List[str]) -> StoredUpload:
+    """
+    Stream an upload to ``file_path``, hashing it as the chunks arrive.
+    
+    The type is checked against the file's own signature, not the
+    client's header, before anything is written. Peak memory is one
+    chunk for uploads above SPOOL_THRESHOLD_BYTES; a partial file is
+    removed when the upload is rejected.
+    """
+    if upload.size is not None and upload.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"File exceeds the {MAX_UPLOAD_BYTES // 2**20} MB limit")
+    
+    head = await upload.read(UPLOAD_CHUNK_BYTES)
+    content_type = sniff_content_type(head)
+    if content_type not in allowed_types:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File content is not an allowed type. Allowed types: {allowed_types}"
+        )
+    
+    digest = hashlib.sha256()
+    buffer = bytearray()
+    file_size = 0
+    try:
+        async with aiofiles.open(file_path, 'wb') as f:
+            chunk = head
+            while chunk:
+                file_size += len(chunk)
+                if file_size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(
+                        status_code=413, detail=f"File exceeds the {MAX_UPLOAD_BYTES // 2**20} MB limit"
+                    )
+                digest.update(chunk)
+                if buffer is not None:
+                    buffer += chunk
+                    if len(buffer) > SPOOL_THRESHOLD_BYTES:
+                        # Large files are analyzed from disk instead
+                        buffer = None
+                await f.write(chunk)
+                chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+    except BaseException:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    
+    return StoredUpload(
+        file_path=file_path,
+        file_size=file_size,
+        sha256=digest.hexdigest(),
+        content_type=content_type,
+        content=bytes(buffer) if buffer is not None else None
+    )
 
 class UploadResponse(BaseModel):
     file_id: str
@@ -26,11 +129,119 @@ class UploadResponse(BaseModel):
     file_size: int
     upload_time: str
     analysis_ready: bool
+    sha256: Optional[str] = None
+    # The same bytes were already stored; the upload reuses that copy
+    duplicate: bool = False
+    analysis: Optional[Dict[str, Any]] = None
+
+# Analyses in progress by blob hash and options, so concurrent uploads
+# of the same file share one run
+_pending_analyses: Dict[Tuple[str, str], asyncio.Task] = {}
+
+def analysis_options(analysis_data: Dict[str, Any]) -> str:
+    """Key of the options an analysis ran with, defaulted as the analyzer does"""
+    return (
+        f"{analysis_data.get('type')}:{analysis_data.get('language', 'en')}:"
+        f"{int(analysis_data.get('include_sources', True))}{int(analysis_data.get('include_reporting', True))}"
+    )
+
+async def analyze_blob(
+    sha256: str,
+    analysis_data: Dict[str, Any],
+    analyzer: ComprehensiveAnalyzer,
+    store: UploadStore
+) -> Optional[Dict[str, Any]]:
+    """
+    The stored analysis of a blob with these options, running the
+    analyzers only if there is none yet. Failed analyses are not stored,
+    so a later request retries.
+    """
+    key = (sha256, analysis_options(analysis_data))
+    analysis = await asyncio.to_thread(store.get_analysis, *key)
+    if analysis is not None:
+        return analysis
+    
+    task = _pending_analyses.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_run_analysis(key, analysis_data, analyzer, store))
+        _pending_analyses[key] = task
+        task.add_done_callback(
+            lambda done: _pending_analyses.pop(key) if _pending_analyses.get(key) is done else None
+        )
+    # A cancelled request must not cancel the run other requests await
+    return await asyncio.shield(task)
+
+async def _run_analysis(
+    key: Tuple[str, str],
+    analysis_data: Dict[str, Any],
+    analyzer: ComprehensiveAnalyzer,
+    store: UploadStore
+) -> Optional[Dict[str, Any]]:
+    sha256, options = key
+    try:
+        result = await analyzer.analyze(analysis_data)
+    except Exception as e:
+        print(f"Analysis failed for {sha256}: {str(e)}")
+        return None
+    if result.get("verdict") == "ERROR":
+        return None
+    await asyncio.to_thread(store.put_analysis, sha256, options, result)
+    return result
+
+async def ingest_upload(
+    upload: UploadFile,
+    upload_type: str,
+    allowed_types: List[str],
+    analyzer: ComprehensiveAnalyzer,
+    store: UploadStore
+) -> UploadResponse:
+    """Store an upload by content and analyze it unless its blob already was"""
+    stored = await store_upload(upload, store.temp_path(), allowed_types)
+    return await finish_upload(stored, upload.filename, upload_type, analyzer, store)
+
+async def finish_upload(
+    stored: StoredUpload,
+    filename: Optional[str],
+    upload_type: str,
+    analyzer: ComprehensiveAnalyzer,
+    store: UploadStore
+) -> UploadResponse:
+    """Move a staged upload into the store and analyze it"""
+    file_id = str(uuid.uuid4())
+    upload_time = datetime.now().isoformat()
+    blob_path, created = await asyncio.to_thread(
+        store.commit, stored.file_path, stored.sha256, stored.file_size, stored.content_type,
+        {"file_id": file_id, "filename": filename, "upload_type": upload_type, "upload_time": upload_time}
+    )
+    
+    # Small files stay in memory and are analyzed directly, larger ones
+    # are mapped from the stored blob
+    analysis = await analyze_blob(stored.sha256, {
+        "type": upload_type,
+        "data": stored.content if upload_type == "image" else None,
+        "sha256": stored.sha256,
+        "file_path": blob_path,
+        "filename": filename,
+        "content_type": stored.content_type
+    }, analyzer, store)
+    
+    return UploadResponse(
+        file_id=file_id,
+        filename=filename,
+        file_type=stored.content_type,
+        file_size=stored.file_size,
+        upload_time=upload_time,
+        analysis_ready=analysis is not None,
+        sha256=stored.sha256,
+        duplicate=not created,
+        analysis=analysis
+    )
 
 @router.post("/upload/image", response_model=UploadResponse)
 async def upload_image(
     image: UploadFile = File(...),
-    analyzer: ComprehensiveAnalyzer = Depends()
+    analyzer: ComprehensiveAnalyzer = Depends(),
+    store: UploadStore = Depends(get_upload_store)
 ):
     """
     Upload and analyze an image file
@@ -43,52 +254,18 @@ async def upload_image(
                 detail=f"File type {image.content_type} not allowed. Allowed types: {ALLOWED_IMAGE_TYPES}"
             )
         
-        # Generate unique filename
-        file_id = str(uuid.uuid4())
-        file_extension = image.filename.split('.')[-1] if '.' in image.filename else 'jpg'
-        filename = f"{file_id}.{file_extension}"
-        file_path = os.path.join(UPLOAD_DIR, filename)
-        
-        # Save file
-        async with aiofiles.open(file_path, 'wb') as f:
-            content = await image.read()
-            await f.write(content)
-        
-        # Get file size
-        file_size = len(content)
-        
-        # Prepare analysis data
-        analysis_data = {
-            "type": "image",
-            "file_path": file_path,
-            "filename": image.filename,
-            "content_type": image.content_type
-        }
-        
-        # Run analysis
-        try:
-            result = await analyzer.analyze(analysis_data)
-            analysis_ready = True
-        except Exception as e:
-            print(f"Analysis failed for {filename}: {str(e)}")
-            analysis_ready = False
-        
-        return UploadResponse(
-            file_id=file_id,
-            filename=image.filename,
-            file_type=image.content_type,
-            file_size=file_size,
-            upload_time=datetime.now().isoformat(),
-            analysis_ready=analysis_ready
-        )
+        return await ingest_upload(image, "image", ALLOWED_IMAGE_TYPES, analyzer, store)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 @router.post("/upload/document", response_model=UploadResponse)
 async def upload_document(
     document: UploadFile = File(...),
-    analyzer: ComprehensiveAnalyzer = Depends()
+    analyzer: ComprehensiveAnalyzer = Depends(),
+    store: UploadStore = Depends(get_upload_store)
 ):
     """
     Upload and analyze a document file
@@ -101,163 +278,178 @@ async def upload_document(
                 detail=f"File type {document.content_type} not allowed. Allowed types: {ALLOWED_DOCUMENT_TYPES}"
             )
         
-        # Generate unique filename
-        file_id = str(uuid.uuid4())
-        file_extension = document.filename.split('.')[-1] if '.' in document.filename else 'txt'
-        filename = f"{file_id}.{file_extension}"
-        file_path = os.path.join(UPLOAD_DIR, filename)
-        
-        # Save file
-        async with aiofiles.open(file_path, 'wb') as f:
-            content = await document.read()
-            await f.write(content)
-        
-        # Get file size
-        file_size = len(content)
-        
-        # Prepare analysis data
-        analysis_data = {
-            "type": "document",
-            "file_path": file_path,
-            "filename": document.filename,
-            "content_type": document.content_type
-        }
-        
-        # Run analysis
-        try:
-            result = await analyzer.analyze(analysis_data)
-            analysis_ready = True
-        except Exception as e:
-            print(f"Analysis failed for {filename}: {str(e)}")
-            analysis_ready = False
-        
-        return UploadResponse(
-            file_id=file_id,
-            filename=document.filename,
-            file_type=document.content_type,
-            file_size=file_size,
-            upload_time=datetime.now().isoformat(),
-            analysis_ready=analysis_ready
-        )
+        return await ingest_upload(document, "document", ALLOWED_DOCUMENT_TYPES, analyzer, store)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 @router.post("/upload/batch")
 async def upload_batch(
     files: List[UploadFile] = File(...),
-    analyzer: ComprehensiveAnalyzer = Depends()
+    concurrency: int = Query(BATCH_CONCURRENCY, ge=1, le=MAX_BATCH_CONCURRENCY),
+    analyzer: ComprehensiveAnalyzer = Depends(),
+    store: UploadStore = Depends(get_upload_store)
 ):
     """
     Upload multiple files for batch analysis
+    
+    Files are processed ``concurrency`` at a time and the response is
+    NDJSON: one line per file as it completes, tagged with its position
+    in the request, then a summary line with the batch throughput.
     """
-    try:
-        results = []
-        
-        for file in files:
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_FILES} files per batch")
+    
+    # Every body is staged before the response starts; the request's
+    # upload files are closed once the handler returns
+    staged = []
+    for file in files:
+        if file.content_type in ALLOWED_IMAGE_TYPES:
+            upload_type, allowed_types = "image", ALLOWED_IMAGE_TYPES
+        elif file.content_type in ALLOWED_DOCUMENT_TYPES:
+            upload_type, allowed_types = "document", ALLOWED_DOCUMENT_TYPES
+        else:
+            staged.append((file.filename, None, f"File type {file.content_type} not supported"))
+            continue
+        try:
+            stored = await store_upload(file, store.temp_path(), allowed_types)
+            # Held bodies would add up across the batch; analysis maps
+            # the stored blob instead
+            stored.content = None
+            staged.append((file.filename, upload_type, stored))
+        except Exception as e:
+            staged.append((file.filename, None, e.detail if isinstance(e, HTTPException) else str(e)))
+    
+    return StreamingResponse(
+        _process_batch(staged, concurrency, analyzer, store),
+        media_type="application/x-ndjson"
+    )
+
+async def _process_batch(staged: list, concurrency: int, analyzer: ComprehensiveAnalyzer, store: UploadStore):
+    semaphore = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+    
+    async def process(index: int, filename: Optional[str], upload_type: Optional[str], item) -> Dict[str, Any]:
+        if upload_type is None:
+            return {"index": index, "filename": filename, "error": item}
+        # A failing file is reported on its own line; the rest carry on
+        async with semaphore:
             try:
-                # Determine file type and route accordingly
-                if file.content_type in ALLOWED_IMAGE_TYPES:
-                    result = await upload_image(file, analyzer)
-                elif file.content_type in ALLOWED_DOCUMENT_TYPES:
-                    result = await upload_document(file, analyzer)
-                else:
-                    result = {
-                        "error": f"File type {file.content_type} not supported",
-                        "filename": file.filename
-                    }
-                
-                results.append(result)
-                
+                response = await finish_upload(item, filename, upload_type, analyzer, store)
+                return {"index": index, **response.model_dump()}
             except Exception as e:
-                results.append({
-                    "error": str(e),
-                    "filename": file.filename
-                })
-        
-        return {
-            "message": f"Processed {len(files)} files",
-            "results": results
-        }
+                return {"index": index, "filename": filename, "error": str(e)}
+    
+    tasks = [
+        asyncio.ensure_future(process(index, filename, upload_type, item))
+        for index, (filename, upload_type, item) in enumerate(staged)
+    ]
+    failed = 0
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            result = await next_result
+            failed += "error" in result
+            yield json.dumps(result, default=str) + "\n"
         
+        elapsed = time.perf_counter() - start
+        yield json.dumps({"summary": {
+            "files": len(tasks),
+            "succeeded": len(tasks) - failed,
+            "failed": failed,
+            "concurrency": concurrency,
+            "elapsed_seconds": round(elapsed, 3),
+            "files_per_second": round(len(tasks) / elapsed, 2) if elapsed > 0 else None
+        }}) + "\n"
+    finally:
+        # The client went away: stop the remaining work and drop the
+        # staged files that never reached the store
+        for task in tasks:
+            task.cancel()
+        for _, upload_type, item in staged:
+            if upload_type is not None and os.path.exists(item.file_path):
+                os.remove(item.file_path)
+
+@router.get("/upload/list")
+async def list_uploads(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    file_type: Optional[str] = Query(None, pattern="^(image|document)$"),
+    store: UploadStore = Depends(get_upload_store)
+):
+    """
+    List uploaded files, newest first
+    
+    Pass the returned ``next_cursor`` back as ``cursor`` for the next page.
+    """
+    try:
+        refs, next_cursor = await asyncio.to_thread(store.list_refs, limit, cursor, file_type)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Batch upload failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to list uploads: {str(e)}")
+    
+    files = [
+        {
+            "file_id": ref["file_id"],
+            "filename": ref["filename"],
+            "file_size": ref["file_size"],
+            "upload_time": ref["upload_time"],
+            "file_type": ref["upload_type"]
+        }
+        for ref in refs
+    ]
+    
+    return {
+        "files": files,
+        "count": len(files),
+        "next_cursor": next_cursor
+    }
 
 @router.get("/upload/{file_id}")
-async def get_upload_status(file_id: str):
+async def get_upload_status(file_id: str, store: UploadStore = Depends(get_upload_store)):
     """
     Get upload status and analysis results
     """
     try:
-        # Check if file exists
-        file_path = os.path.join(UPLOAD_DIR, f"{file_id}.*")
-        import glob
-        matching_files = glob.glob(file_path)
-        
-        if not matching_files:
+        ref = await asyncio.to_thread(store.get_ref, file_id)
+        if ref is None:
             raise HTTPException(status_code=404, detail="File not found")
         
-        actual_file_path = matching_files[0]
-        filename = os.path.basename(actual_file_path)
-        
-        # Get file stats
-        stat = os.stat(actual_file_path)
+        # The analysis run at upload time, with the analyzer's default options
+        options = analysis_options({"type": ref["upload_type"]})
+        analysis = await asyncio.to_thread(store.get_analysis, ref["sha256"], options)
         
         return {
             "file_id": file_id,
-            "filename": filename,
-            "file_size": stat.st_size,
-            "upload_time": datetime.fromtimestamp(stat.st_ctime).isoformat(),
-            "status": "uploaded"
+            "filename": ref["filename"],
+            "file_type": ref["content_type"],
+            "file_size": ref["file_size"],
+            "sha256": ref["sha256"],
+            "upload_time": ref["upload_time"],
+            "status": "analyzed" if analysis is not None else "uploaded",
+            "analysis": analysis
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get upload status: {str(e)}")
 
 @router.delete("/upload/{file_id}")
-async def delete_upload(file_id: str):
+async def delete_upload(file_id: str, store: UploadStore = Depends(get_upload_store)):
     """
     Delete uploaded file
     """
     try:
-        # Find and delete file
-        file_path = os.path.join(UPLOAD_DIR, f"{file_id}.*")
-        import glob
-        matching_files = glob.glob(file_path)
-        
-        if not matching_files:
+        # The stored bytes are removed with their last reference
+        if not await asyncio.to_thread(store.release, file_id):
             raise HTTPException(status_code=404, detail="File not found")
         
-        for file_path in matching_files:
-            os.remove(file_path)
-        
         return {"message": "File deleted successfully"}
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete file: {str(e)}")
-
-@router.get("/upload/list")
-async def list_uploads():
-    """
-    List all uploaded files
-    """
-    try:
-        files = []
-        for filename in os.listdir(UPLOAD_DIR):
-            file_path = os.path.join(UPLOAD_DIR, filename)
-            stat = os.stat(file_path)
-            
-            files.append({
-                "filename": filename,
-                "file_size": stat.st_size,
-                "upload_time": datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                "file_type": "image" if filename.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp')) else "document"
-            })
-        
-        return {
-            "files": files,
-            "total": len(files)
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to list uploads: {str(e)}")
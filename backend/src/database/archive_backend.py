@@ -0,0 +1,361 @@
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+import base64
+import json
+import re
+import uuid
+
+# Fields indexed for search, and the cap on tokens stored per document
+SEARCH_FIELDS = ("title", "content", "ai_analysis")
+MAX_SEARCH_TOKENS = 500
+# Terms per analysis counted in the suggestion dictionary; tokens come
+# in order of first appearance, so the title's are always included.
+# Single characters are searchable but never suggested.
+MAX_SUGGESTION_TERMS = 100
+MIN_SUGGESTION_LENGTH = 2
+
+RISK_LEVELS = ("high", "medium", "low")
+# Rollups count analyses per hour and per day along these fields
+ROLLUP_GRANULARITIES = ("hour", "day")
+ROLLUP_DIMENSIONS = ("verdict", "risk_level", "analysis_type")
+# Dashboard charts are hourly up to this range, daily beyond it
+DASHBOARD_HOURLY_RANGE = timedelta(days=2)
+RECENT_ACTIVITY = 5
+VERDICT_COUNTS = {
+    "FALSE INFORMATION": "false_information_count",
+    "MISLEADING": "misleading_count",
+    "TRUE INFORMATION": "true_count",
+    "UNVERIFIED": "unverified_count"
+}
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_PHRASE_RE = re.compile(r'"([^"]*)"?')
+
+
+def risk_bucket(score: Any) -> str:
+    """Risk level stored with each analysis: high >= 80, medium >= 60"""
+    try:
+        score = float(score)
+    except (TypeError, ValueError):
+        score = 0
+    if score >= 80:
+        return "high"
+    if score >= 60:
+        return "medium"
+    return "low"
+
+
+def search_tokens(*texts: Any) -> List[str]:
+    """Distinct lowercase word tokens, in order of first appearance"""
+    tokens: Dict[str, None] = {}
+    for text in texts:
+        if isinstance(text, str):
+            for token in _TOKEN_RE.findall(text.lower()):
+                tokens.setdefault(token)
+                if len(tokens) >= MAX_SEARCH_TOKENS:
+                    return list(tokens)
+    return list(tokens)
+
+
+def parse_search(text: Any) -> Tuple[List[List[str]], List[str]]:
+    """
+    Quoted phrases of a search, as token lists, and its other terms;
+    ``"leaked video" minister`` is one phrase and one term.
+    """
+    if not isinstance(text, str):
+        return [], []
+    phrases = [_TOKEN_RE.findall(phrase.lower()) for phrase in _PHRASE_RE.findall(text)]
+    terms = search_tokens(_PHRASE_RE.sub(" ", text))
+    return [phrase for phrase in phrases if phrase], terms
+
+
+def contains_phrase(data: Dict[str, Any], phrase: List[str]) -> bool:
+    """Whether the words of a phrase appear consecutively in a searched field"""
+    needle = f" {' '.join(phrase)} "
+    return any(
+        needle in f" {' '.join(_TOKEN_RE.findall(data[field].lower()))} "
+        for field in SEARCH_FIELDS if isinstance(data.get(field), str)
+    )
+
+
+def suggestion_terms(data: Dict[str, Any]) -> List[str]:
+    terms = search_tokens(*(data.get(field) for field in SEARCH_FIELDS))
+    return [term for term in terms if len(term) >= MIN_SUGGESTION_LENGTH][:MAX_SUGGESTION_TERMS]
+
+
+def split_suggestion_query(query: str) -> Tuple[str, str]:
+    """The completed words of a partial query and the prefix being typed"""
+    words = _TOKEN_RE.findall(query.lower()) if query.rstrip() == query else []
+    if not words:
+        return "", ""
+    return " ".join(words[:-1]), words[-1]
+
+
+def encode_cursor(analysis: Dict[str, Any], sort_key: str = "created_at") -> str:
+    position = json.dumps([analysis.get(sort_key, ""), analysis.get("id", "")])
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    """The position encoded by encode_cursor; ValueError if it is malformed"""
+    try:
+        position, analysis_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(analysis_id, str) or not isinstance(position, (str, int, float)):
+        raise ValueError("Invalid cursor")
+    return position, analysis_id
+
+
+def parse_time_range(time_range: str) -> timedelta:
+    """``6h``, ``7d``, ``2w`` or ``1y``; anything else is 7 days"""
+    units = {"h": timedelta(hours=1), "d": timedelta(days=1), "w": timedelta(weeks=1), "y": timedelta(days=365)}
+    try:
+        return int(time_range[:-1]) * units[time_range[-1]]
+    except (KeyError, ValueError, IndexError):
+        return timedelta(days=7)
+
+
+def day_after(date: str) -> str:
+    """Exclusive upper bound of an inclusive ``date_to`` filter"""
+    return (datetime.fromisoformat(date[:10]) + timedelta(days=1)).date().isoformat()
+
+
+def trend_period(created_at: str, granularity: str) -> str:
+    """Start of the hour (``2024-05-01T13``), day or ISO week of a timestamp"""
+    if granularity == "hour":
+        return created_at[:13]
+    if granularity == "week":
+        day = datetime.fromisoformat(created_at[:10])
+        return (day - timedelta(days=day.weekday())).date().isoformat()
+    return created_at[:10]
+
+
+def rollup_bucket(created_at: str, granularity: str) -> str:
+    """``2024-05-01T13`` for an hour, ``2024-05-01`` for a day"""
+    return created_at[:13] if granularity == "hour" else created_at[:10]
+
+
+def rollup_values(analysis: Dict[str, Any]) -> Dict[str, str]:
+    """The value an analysis is counted under in each rollup dimension"""
+    return {
+        "verdict": analysis.get("verdict") or "UNVERIFIED",
+        "risk_level": risk_bucket(analysis.get("risk_score")),
+        "analysis_type": analysis.get("analysis_type") or "unknown"
+    }
+
+
+def rollup_ranges(time_range: str, now: Optional[datetime] = None) -> Tuple[str, str, str]:
+    """
+    Buckets covering a time range ending now: hourly buckets from
+    ``hour_from`` up to ``hour_to`` (the first midnight), then daily
+    buckets from ``day_from``. The range starts on the hour, so at most
+    24 hourly and one daily bucket per day are read.
+    """
+    start = ((now or datetime.now()) - parse_time_range(time_range)).replace(minute=0, second=0, microsecond=0)
+    midnight = start.replace(hour=0)
+    first_day = midnight if start == midnight else midnight + timedelta(days=1)
+    return start.isoformat()[:13], first_day.isoformat()[:13], first_day.date().isoformat()
+
+
+def empty_rollup() -> Dict[str, Any]:
+    return {"total": 0, "risk_sum": 0.0, **{dimension: {} for dimension in ROLLUP_DIMENSIONS}}
+
+
+def merge_rollup(into: Dict[str, Any], rollup: Dict[str, Any]) -> Dict[str, Any]:
+    into["total"] += rollup.get("total", 0)
+    into["risk_sum"] += rollup.get("risk_sum", 0)
+    for dimension in ROLLUP_DIMENSIONS:
+        counts = into[dimension]
+        for value, count in rollup.get(dimension, {}).items():
+            counts[value] = counts.get(value, 0) + count
+    return into
+
+
+def statistics_from_rollup(rollup: Dict[str, Any]) -> Dict[str, Any]:
+    stats = empty_statistics()
+    stats["total_analyses"] = rollup["total"]
+    if not rollup["total"]:
+        return stats
+    for level in RISK_LEVELS:
+        stats[f"{level}_risk_count"] = rollup["risk_level"].get(level, 0)
+    for verdict, name in VERDICT_COUNTS.items():
+        stats[name] = rollup["verdict"].get(verdict, 0)
+    stats["average_risk_score"] = rollup["risk_sum"] / rollup["total"]
+    stats["analysis_types"] = {name: count for name, count in rollup["analysis_type"].items() if count > 0}
+    return stats
+
+
+def trend_point(period: str, rollup: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "period": period,
+        "total": rollup["total"],
+        "high_risk_count": rollup["risk_level"].get("high", 0),
+        "verdicts": {verdict: count for verdict, count in rollup["verdict"].items() if count > 0},
+        "average_risk_score": rollup["risk_sum"] / rollup["total"] if rollup["total"] else 0
+    }
+
+
+def trends_from_rollups(buckets: Iterable[Tuple[str, Dict[str, Any]]], granularity: str) -> List[Dict[str, Any]]:
+    """Trend points from (bucket, rollup) pairs; days are merged into weeks"""
+    periods: Dict[str, Dict[str, Any]] = {}
+    for bucket, rollup in buckets:
+        period = trend_period(bucket, granularity) if granularity == "week" else bucket
+        merge_rollup(periods.setdefault(period, empty_rollup()), rollup)
+    return [trend_point(period, periods[period]) for period in sorted(periods) if periods[period]["total"] > 0]
+
+
+def prepare_analysis(analysis_data: Dict[str, Any]) -> Dict[str, Any]:
+    """An analysis as stored: id and timestamps filled in"""
+    now = datetime.now().isoformat()
+    return {
+        **analysis_data,
+        "id": analysis_data.get("id") or f"analysis_{uuid.uuid4().hex}",
+        "created_at": analysis_data.get("created_at") or now,
+        "updated_at": now
+    }
+
+
+def empty_statistics() -> Dict[str, Any]:
+    return {
+        "total_analyses": 0,
+        "high_risk_count": 0,
+        "medium_risk_count": 0,
+        "low_risk_count": 0,
+        **{name: 0 for name in VERDICT_COUNTS.values()},
+        "average_risk_score": 0,
+        "analysis_types": {}
+    }
+
+
+class ArchiveBackend(ABC):
+    """
+    Storage for archived analyses.
+
+    Analyses are dicts keyed by ``id`` with at least ``created_at``
+    (ISO timestamp), ``verdict``, ``analysis_type`` and ``risk_score``.
+    Listings are newest first, or best match first where a backend
+    ranks searches, and paged by an opaque cursor over the sort key and
+    id. Searches match word tokens; quoted phrases match consecutive
+    words.
+    """
+
+    @abstractmethod
+    async def save_analysis(self, analysis_data: Dict[str, Any]) -> bool:
+        ...
+
+    async def save_analyses(self, analyses: List[Dict[str, Any]]) -> int:
+        """Save many analyses; backends override this to batch the writes"""
+        saved = 0
+        for analysis in analyses:
+            saved += await self.save_analysis(analysis)
+        return saved
+
+    @abstractmethod
+    async def get_analysis_by_id(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    async def get_analyses(self, filters: Dict[str, Any], limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        analyses, _ = await self.get_analyses_page(filters, limit, offset=offset)
+        return analyses
+
+    @abstractmethod
+    async def get_analyses_page(
+        self,
+        filters: Dict[str, Any],
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        offset: int = 0
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of analyses, newest first, and the cursor of the next"""
+
+    @abstractmethod
+    async def update_analysis(self, analysis_id: str, update_data: Dict[str, Any]) -> bool:
+        ...
+
+    @abstractmethod
+    async def delete_analysis(self, analysis_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def read_rollups(self, granularity: str, bucket_from: str, bucket_to: Optional[str] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        (bucket, rollup) pairs of one granularity with ``bucket_from <=
+        bucket < bucket_to``. A rollup counts the analyses created in its
+        bucket in total and by each of ROLLUP_DIMENSIONS, and sums their
+        risk scores; backends keep them current on every write.
+        """
+
+    async def get_statistics(self, time_range: str = "7d") -> Dict[str, Any]:
+        """Counts over a time range, summed from at most 24 hourly and one
+        daily rollup per day whatever the number of analyses"""
+        hour_from, hour_to, day_from = rollup_ranges(time_range)
+        total = empty_rollup()
+        for _, rollup in await self.read_rollups("hour", hour_from, hour_to):
+            merge_rollup(total, rollup)
+        for _, rollup in await self.read_rollups("day", day_from):
+            merge_rollup(total, rollup)
+        return statistics_from_rollup(total)
+
+    async def get_trends(self, time_range: str = "30d", granularity: str = "day") -> Dict[str, Any]:
+        hour_from, _, _ = rollup_ranges(time_range)
+        if granularity == "hour":
+            buckets = await self.read_rollups("hour", hour_from)
+        else:
+            buckets = await self.read_rollups("day", hour_from[:10])
+        return {
+            "time_range": time_range,
+            "granularity": granularity,
+            "data_points": trends_from_rollups(buckets, granularity)
+        }
+
+    async def get_dashboard_metrics(self, time_range: str = "7d") -> Dict[str, Any]:
+        """Summary, charts and latest analyses in the shape of the dashboard page"""
+        stats = await self.get_statistics(time_range)
+        granularity = "hour" if parse_time_range(time_range) <= DASHBOARD_HOURLY_RANGE else "day"
+        trends = await self.get_trends(time_range, granularity)
+        recent, _ = await self.get_analyses_page({}, RECENT_ACTIVITY)
+        return {
+            "timeRange": time_range,
+            "totalAnalyses": stats["total_analyses"],
+            "highRiskContent": stats["high_risk_count"],
+            "verifiedContent": stats["true_count"],
+            "averageRiskScore": stats["average_risk_score"],
+            "analysisTypes": stats["analysis_types"],
+            "chartData": [
+                {"date": point["period"], "analyses": point["total"], "highRisk": point["high_risk_count"]}
+                for point in trends["data_points"]
+            ],
+            "riskDistribution": [
+                {"name": "Low", "value": stats["low_risk_count"]},
+                {"name": "Medium", "value": stats["medium_risk_count"]},
+                {"name": "High", "value": stats["high_risk_count"]}
+            ],
+            "recentActivity": [_activity(analysis) for analysis in recent]
+        }
+
+    @abstractmethod
+    async def get_search_suggestions(self, query: str, limit: int = 10) -> List[str]:
+        """Completions of the last word of a query, most common first"""
+
+    def close(self):
+        pass
+
+
+def _activity(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    risk_level = risk_bucket(analysis.get("risk_score"))
+    if risk_level == "high":
+        icon, color = "high-risk", "#ff4757"
+    elif analysis.get("verdict") == "TRUE INFORMATION":
+        icon, color = "verified", "#2ed573"
+    else:
+        icon, color = "analysis", "#667eea"
+    return {
+        "id": analysis.get("id"),
+        "icon": icon,
+        "color": color,
+        "title": analysis.get("title") or "Untitled Analysis",
+        "description": f"{analysis.get('verdict') or 'UNVERIFIED'} · {risk_level} risk ({analysis.get('risk_score') or 0})",
+        "time": analysis.get("created_at", "")
+    }
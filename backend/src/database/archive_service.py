@@ -1,69 +1,83 @@
-from typing import Dict, Any, List, Optional
-from datetime import datetime
-import firebase_admin
-from firebase_admin import credentials, firestore
+from typing import Dict, Any, List, Optional, Tuple
 
-# Path to your Firebase credentials JSON
-FIREBASE_CRED_PATH = "backend/firebase_credentials.json"
+from utils.config import get_settings
+from .archive_backend import ArchiveBackend, decode_cursor
+from .firestore_backend import FirestoreBackend
+from .sqlite_backend import SQLiteBackend
+
+_backend: Optional[ArchiveBackend] = None
+
+
+def get_archive_backend() -> ArchiveBackend:
+    """The storage backend named by the ``archive_backend`` setting"""
+    global _backend
+    if _backend is None:
+        settings = get_settings()
+        if settings.archive_backend == "sqlite":
+            _backend = SQLiteBackend(settings.archive_db_path)
+        elif settings.archive_backend == "firestore":
+            _backend = FirestoreBackend()
+        else:
+            raise ValueError(f"Unknown archive backend: {settings.archive_backend}")
+    return _backend
+
+
+def close_archive_backend():
+    global _backend
+    if _backend is not None:
+        _backend.close()
+        _backend = None
 
-if not firebase_admin._apps:
-    cred = credentials.Certificate(FIREBASE_CRED_PATH)
-    firebase_admin.initialize_app(cred)
-db = firestore.client()
 
 class ArchiveService:
+    """
+    Archived analyses, kept in the configured storage backend.
+
+    Instances are cheap: they share the process-wide backend, so routes
+    can depend on ``ArchiveService`` directly.
+    """
+
     def __init__(self):
-        self.collection = db.collection("analyses")
+        self.backend = get_archive_backend()
 
     async def save_analysis(self, analysis_data: Dict[str, Any]) -> bool:
-        try:
-            analysis_id = analysis_data.get("id", f"analysis_{int(datetime.now().timestamp())}")
-            doc_ref = self.collection.document(analysis_id)
-            data = {
-                **analysis_data,
-                "id": analysis_id,
-                "created_at": analysis_data.get("created_at", datetime.now().isoformat()),
-                "updated_at": datetime.now().isoformat()
-            }
-            doc_ref.set(data)
-            return True
-        except Exception as e:
-            print(f"Error saving analysis to Firestore: {str(e)}")
-            return False
+        return await self.backend.save_analysis(analysis_data)
+
+    async def save_analyses(self, analyses: List[Dict[str, Any]]) -> int:
+        return await self.backend.save_analyses(analyses)
 
     async def get_analysis_by_id(self, analysis_id: str) -> Optional[Dict[str, Any]]:
-        try:
-            doc = self.collection.document(analysis_id).get()
-            if doc.exists:
-                return doc.to_dict()
-            return None
-        except Exception as e:
-            print(f"Error getting analysis by id from Firestore: {str(e)}")
-            return None
+        return await self.backend.get_analysis_by_id(analysis_id)
 
     async def get_analyses(self, filters: Dict[str, Any], limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
-        try:
-            query = self.collection
-            # Filtering (basic demo, can be expanded)
-            if "verdict" in filters and filters["verdict"]:
-                query = query.where("verdict", "==", filters["verdict"])
-            if "analysis_type" in filters and filters["analysis_type"]:
-                query = query.where("analysis_type", "==", filters["analysis_type"])
-            # Fetch all docs (Firestore doesn't support offset efficiently)
-            docs = query.stream()
-            analyses = [doc.to_dict() for doc in docs]
-            # Search and risk_level filtering in Python
-            if "search" in filters and filters["search"]:
-                analyses = [a for a in analyses if filters["search"].lower() in a.get("ai_analysis", "").lower()]
-            if "risk_level" in filters and filters["risk_level"]:
-                def risk_bucket(score):
-                    if score >= 80: return "high"
-                    if score >= 60: return "medium"
-                    return "low"
-                analyses = [a for a in analyses if risk_bucket(a.get("risk_score", 0)) == filters["risk_level"]]
-            # Sort and paginate
-            analyses.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-            return analyses[offset:offset+limit]
-        except Exception as e:
-            print(f"Error getting analyses from Firestore: {str(e)}")
-            return []
+        return await self.backend.get_analyses(filters, limit, offset)
+
+    async def get_analyses_page(
+        self,
+        filters: Dict[str, Any],
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        offset: int = 0
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Raises ValueError for a malformed cursor, whichever the backend"""
+        if cursor:
+            decode_cursor(cursor)
+        return await self.backend.get_analyses_page(filters, limit, cursor, offset)
+
+    async def update_analysis(self, analysis_id: str, update_data: Dict[str, Any]) -> bool:
+        return await self.backend.update_analysis(analysis_id, update_data)
+
+    async def delete_analysis(self, analysis_id: str) -> bool:
+        return await self.backend.delete_analysis(analysis_id)
+
+    async def get_statistics(self, time_range: str = "7d") -> Dict[str, Any]:
+        return await self.backend.get_statistics(time_range)
+
+    async def get_trends(self, time_range: str = "30d", granularity: str = "day") -> Dict[str, Any]:
+        return await self.backend.get_trends(time_range, granularity)
+
+    async def get_dashboard_metrics(self, time_range: str = "7d") -> Dict[str, Any]:
+        return await self.backend.get_dashboard_metrics(time_range)
+
+    async def get_search_suggestions(self, query: str, limit: int = 10) -> List[str]:
+        return await self.backend.get_search_suggestions(query, limit)
@@ -0,0 +1,377 @@
+from typing import Dict, Any, List, Optional, Tuple
+import os
+
+try:
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+except ImportError:  # only the Firestore backend needs firebase_admin
+    firebase_admin = None
+
+from .archive_backend import (
+    ArchiveBackend, SEARCH_FIELDS, ROLLUP_GRANULARITIES, ROLLUP_DIMENSIONS,
+    risk_bucket, search_tokens, encode_cursor, decode_cursor, day_after,
+    prepare_analysis, parse_search, contains_phrase, suggestion_terms,
+    split_suggestion_query, rollup_bucket, rollup_values, empty_rollup, merge_rollup
+)
+
+# Path to your Firebase credentials JSON
+FIREBASE_CRED_PATH = os.getenv("FIREBASE_CRED_PATH", "backend/firebase_credentials.json")
+
+# Longer search terms are rarer, so they are matched by the query itself;
+# pages are over-fetched by this factor while checking the remaining terms
+SEARCH_OVERFETCH = 3
+SEARCH_MAX_BATCHES = 5
+# Term dictionary for suggestions: one document per term, keyed by the
+# term, counting the analyses that contain it. A prefix is completed by
+# ranking at most SUGGESTION_SCAN of its terms in term order.
+TERMS_COLLECTION = "search_terms"
+SUGGESTION_SCAN = 200
+# One rollup document per hour or day, keyed by its bucket, with the
+# counts of archive_backend.ROLLUP_DIMENSIONS as maps
+ROLLUP_COLLECTIONS = {"hour": "analysis_rollups_hourly", "day": "analysis_rollups_daily"}
+ROLLUP_FIELDS = ["created_at", "risk_score", "verdict", "analysis_type"]
+# Firestore allows at most 500 writes per batch
+WRITE_BATCH_SIZE = 400
+
+
+def get_firestore_client():
+    """Initialise the Firebase app on first use"""
+    if firebase_admin is None:
+        raise RuntimeError("The Firestore archive backend requires the firebase-admin package")
+    if not firebase_admin._apps:
+        cred = credentials.Certificate(FIREBASE_CRED_PATH)
+        firebase_admin.initialize_app(cred)
+    return firestore.client()
+
+
+class FirestoreBackend(ArchiveBackend):
+    def __init__(self, collection: str = "analyses"):
+        self.db = get_firestore_client()
+        self.collection = self.db.collection(collection)
+        self.terms = self.db.collection(TERMS_COLLECTION)
+        self.rollups = {
+            granularity: self.db.collection(name) for granularity, name in ROLLUP_COLLECTIONS.items()
+        }
+
+    async def save_analysis(self, analysis_data: Dict[str, Any]) -> bool:
+        return await self.save_analyses([analysis_data]) == 1
+
+    async def save_analyses(self, analyses: List[Dict[str, Any]]) -> int:
+        try:
+            documents = [prepare_analysis(analysis_data) for analysis_data in analyses]
+            refs = [self.collection.document(data["id"]) for data in documents]
+            # Replaced analyses give back their terms and rollup counts
+            previous = {doc.id: doc.to_dict() for doc in self.db.get_all(refs) if doc.exists}
+            batch, pending = self.db.batch(), 0
+            for doc_ref, data in zip(refs, documents):
+                data.update(self._query_fields(data))
+                replaced = previous.get(data["id"], {})
+                writes = self._term_writes(replaced, data) + self._rollup_writes(replaced, data)
+                if pending + len(writes) + 1 > WRITE_BATCH_SIZE:
+                    batch.commit()
+                    batch, pending = self.db.batch(), 0
+                batch.set(doc_ref, data)
+                for ref, fields in writes:
+                    batch.set(ref, fields, merge=True)
+                pending += len(writes) + 1
+                previous[data["id"]] = data
+            batch.commit()
+            return len(documents)
+        except Exception as e:
+            print(f"Error saving analyses to Firestore: {str(e)}")
+            return 0
+
+    async def get_analysis_by_id(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            doc = self.collection.document(analysis_id).get()
+            if doc.exists:
+                return doc.to_dict()
+            return None
+        except Exception as e:
+            print(f"Error getting analysis by id from Firestore: {str(e)}")
+            return None
+
+    async def get_analyses_page(
+        self,
+        filters: Dict[str, Any],
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        offset: int = 0
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of analyses, newest first, and the cursor of the next.
+
+        Every filter is part of the Firestore query, so a page reads about
+        ``limit`` documents whatever the collection size. ``cursor`` (from
+        the previous page) should be preferred over ``offset``, which
+        Firestore still reads through and bills.
+        """
+        try:
+            query = self.collection
+            if filters.get("verdict"):
+                query = query.where("verdict", "==", filters["verdict"])
+            if filters.get("analysis_type"):
+                query = query.where("analysis_type", "==", filters["analysis_type"])
+            if filters.get("risk_level"):
+                query = query.where("risk_level", "==", filters["risk_level"])
+            if filters.get("date_from"):
+                query = query.where("created_at", ">=", filters["date_from"])
+            if filters.get("date_to"):
+                # Dates are inclusive; created_at is an ISO timestamp
+                query = query.where("created_at", "<", day_after(filters["date_to"]))
+
+            # Only one array-contains is allowed per query; the longest term
+            # narrows the most and the other terms and the phrases (as word
+            # sequences) are checked on the results. Firestore cannot rank,
+            # so matches stay newest first.
+            phrases, terms = parse_search(filters.get("search"))
+            terms = search_tokens(" ".join(terms + [word for phrase in phrases for word in phrase]))
+            terms.sort(key=len, reverse=True)
+            if terms:
+                query = query.where("search_tokens", "array_contains", terms[0])
+
+            query = query.order_by("created_at", direction=firestore.Query.DESCENDING)
+            query = query.order_by("id", direction=firestore.Query.DESCENDING)
+            if cursor:
+                created_at, analysis_id = decode_cursor(cursor)
+                query = query.start_after({"created_at": created_at, "id": analysis_id})
+            elif offset:
+                query = query.offset(offset)
+
+            # One document beyond the page tells whether another page exists
+            batch_size = (limit + 1) * (SEARCH_OVERFETCH if len(terms) > 1 or phrases else 1)
+            analyses: List[Dict[str, Any]] = []
+            for _ in range(SEARCH_MAX_BATCHES):
+                docs = [doc.to_dict() for doc in query.limit(batch_size).stream()]
+                for analysis in docs:
+                    if all(term in analysis.get("search_tokens", ()) for term in terms[1:]) and \
+                            all(contains_phrase(analysis, phrase) for phrase in phrases):
+                        analyses.append(analysis)
+                        if len(analyses) > limit:
+                            return analyses[:limit], encode_cursor(analyses[limit - 1])
+                if len(docs) < batch_size:
+                    return analyses, None
+                query = query.start_after({"created_at": docs[-1].get("created_at"), "id": docs[-1].get("id")}).offset(0)
+
+            # Rare term combinations: return a short page that resumes
+            # after the last document scanned rather than read on unbounded
+            return analyses, encode_cursor(docs[-1])
+        except Exception as e:
+            print(f"Error getting analyses from Firestore: {str(e)}")
+            return [], None
+
+    async def update_analysis(self, analysis_id: str, update_data: Dict[str, Any]) -> bool:
+        try:
+            doc_ref = self.collection.document(analysis_id)
+            doc = doc_ref.get()
+            if not doc.exists:
+                return False
+            previous = doc.to_dict()
+            data = {**previous, **update_data}
+            batch = self.db.batch()
+            batch.update(doc_ref, {**update_data, **self._query_fields(data)})
+            for ref, fields in self._term_writes(previous, data) + self._rollup_writes(previous, data):
+                batch.set(ref, fields, merge=True)
+            batch.commit()
+            return True
+        except Exception as e:
+            print(f"Error updating analysis in Firestore: {str(e)}")
+            return False
+
+    async def delete_analysis(self, analysis_id: str) -> bool:
+        try:
+            doc_ref = self.collection.document(analysis_id)
+            doc = doc_ref.get()
+            if not doc.exists:
+                return False
+            batch = self.db.batch()
+            batch.delete(doc_ref)
+            previous = doc.to_dict()
+            for ref, fields in self._term_writes(previous, {}) + self._rollup_writes(previous, {}):
+                batch.set(ref, fields, merge=True)
+            batch.commit()
+            return True
+        except Exception as e:
+            print(f"Error deleting analysis from Firestore: {str(e)}")
+            return False
+
+    async def read_rollups(self, granularity: str, bucket_from: str, bucket_to: Optional[str] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        try:
+            query = self.rollups[granularity].where("bucket", ">=", bucket_from)
+            if bucket_to is not None:
+                query = query.where("bucket", "<", bucket_to)
+            buckets = []
+            for doc in query.order_by("bucket").stream():
+                data = doc.to_dict()
+                buckets.append((data["bucket"], merge_rollup(empty_rollup(), data)))
+            return buckets
+        except Exception as e:
+            print(f"Error reading rollups from Firestore: {str(e)}")
+            return []
+
+    async def rebuild_rollups(self, batch_size: int = WRITE_BATCH_SIZE) -> int:
+        """Recount the rollups from the stored analyses; returns the number of buckets"""
+        rollups: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for doc in self.collection.select(ROLLUP_FIELDS).stream():
+            analysis = doc.to_dict()
+            if not analysis.get("created_at"):
+                continue
+            score = _score(analysis)
+            for granularity in ROLLUP_GRANULARITIES:
+                key = (granularity, rollup_bucket(analysis["created_at"], granularity))
+                rollup = rollups.setdefault(key, empty_rollup())
+                rollup["total"] += 1
+                rollup["risk_sum"] += score
+                for dimension, value in rollup_values(analysis).items():
+                    rollup[dimension][value] = rollup[dimension].get(value, 0) + 1
+
+        batch, pending = self.db.batch(), 0
+        for granularity, collection in self.rollups.items():
+            for doc in collection.stream():
+                if (granularity, doc.id) not in rollups:
+                    batch.delete(doc.reference)
+                    pending += 1
+                if pending == batch_size:
+                    batch.commit()
+                    batch, pending = self.db.batch(), 0
+        for (granularity, bucket), rollup in rollups.items():
+            batch.set(self.rollups[granularity].document(bucket), {"bucket": bucket, **rollup})
+            pending += 1
+            if pending == batch_size:
+                batch.commit()
+                batch, pending = self.db.batch(), 0
+        if pending:
+            batch.commit()
+        return len(rollups)
+
+    async def get_search_suggestions(self, query: str, limit: int = 10) -> List[str]:
+        head, prefix = split_suggestion_query(query)
+        if not prefix:
+            return []
+        matches = (
+            self.terms
+            .where("term", ">=", prefix)
+            .where("term", "<", prefix + "\uf8ff")
+            .order_by("term")
+            .limit(SUGGESTION_SCAN)
+        )
+        counts = {}
+        for doc in matches.stream():
+            entry = doc.to_dict()
+            if entry.get("documents", 0) > 0:
+                counts[entry["term"]] = entry["documents"]
+        terms = sorted(counts, key=lambda term: (-counts[term], term))[:limit]
+        return [f"{head} {term}" if head else term for term in terms]
+
+    async def rebuild_search_terms(self, batch_size: int = WRITE_BATCH_SIZE) -> int:
+        """
+        Recount the term dictionary from the stored analyses; returns the
+        number of distinct terms.
+        """
+        counts: Dict[str, int] = {}
+        for doc in self.collection.select(list(SEARCH_FIELDS)).stream():
+            for term in suggestion_terms(doc.to_dict()):
+                if _valid_term(term):
+                    counts[term] = counts.get(term, 0) + 1
+
+        batch, pending = self.db.batch(), 0
+        for doc in self.terms.stream():
+            if doc.id not in counts:
+                batch.delete(doc.reference)
+                pending += 1
+            if pending == batch_size:
+                batch.commit()
+                batch, pending = self.db.batch(), 0
+        for term, documents in counts.items():
+            batch.set(self.terms.document(term), {"term": term, "documents": documents})
+            pending += 1
+            if pending == batch_size:
+                batch.commit()
+                batch, pending = self.db.batch(), 0
+        if pending:
+            batch.commit()
+        return len(counts)
+
+    async def backfill_query_fields(self, batch_size: int = WRITE_BATCH_SIZE) -> int:
+        """
+        Add or refresh risk_level and search_tokens on analyses saved
+        before they were stored as now; returns the number of documents
+        updated.
+        """
+        updated = 0
+        batch = self.db.batch()
+        pending = 0
+        for doc in self.collection.stream():
+            data = doc.to_dict()
+            fields = self._query_fields(data)
+            if all(data.get(name) == value for name, value in fields.items()):
+                continue
+            batch.update(doc.reference, fields)
+            pending += 1
+            if pending == batch_size:
+                batch.commit()
+                updated += pending
+                batch, pending = self.db.batch(), 0
+        if pending:
+            batch.commit()
+            updated += pending
+        return updated
+
+    def _term_writes(self, previous: Dict[str, Any], current: Dict[str, Any]):
+        """Increments of the term dictionary for an analysis changing
+        from ``previous`` to ``current`` ({} when absent)"""
+        deltas: Dict[str, int] = {}
+        for term in suggestion_terms(previous):
+            deltas[term] = deltas.get(term, 0) - 1
+        for term in suggestion_terms(current):
+            deltas[term] = deltas.get(term, 0) + 1
+        return [
+            (self.terms.document(term), {"term": term, "documents": firestore.Increment(delta)})
+            for term, delta in deltas.items() if delta and _valid_term(term)
+        ]
+
+    def _rollup_writes(self, previous: Dict[str, Any], current: Dict[str, Any]):
+        """Increments of the hourly and daily rollups for an analysis
+        changing from ``previous`` to ``current`` ({} when absent)"""
+        def counted(analysis):
+            if not analysis.get("created_at"):
+                return None
+            return analysis["created_at"], _score(analysis), rollup_values(analysis)
+
+        before, after = counted(previous), counted(current)
+        if before == after:
+            return []
+        writes = []
+        for sign, state in ((-1, before), (1, after)):
+            if state is None:
+                continue
+            created_at, score, values = state
+            for granularity in ROLLUP_GRANULARITIES:
+                bucket = rollup_bucket(created_at, granularity)
+                fields = {
+                    "bucket": bucket,
+                    "total": firestore.Increment(sign),
+                    "risk_sum": firestore.Increment(sign * score),
+                    **{dimension: {values[dimension]: firestore.Increment(sign)} for dimension in ROLLUP_DIMENSIONS}
+                }
+                writes.append((self.rollups[granularity].document(bucket), fields))
+        return writes
+
+    def _query_fields(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Derived fields that let filters run inside Firestore"""
+        return {
+            "risk_level": risk_bucket(data.get("risk_score", 0)),
+            "search_tokens": search_tokens(*(data.get(field) for field in SEARCH_FIELDS))
+        }
+
+
+def _score(analysis: Dict[str, Any]) -> float:
+    try:
+        return float(analysis.get("risk_score") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _valid_term(term: str) -> bool:
+    # Document ids of the form __name__ are reserved
+    return not (term.startswith("__") and term.endswith("__"))
@@ -0,0 +1,423 @@
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+
+from .archive_backend import (
+    ArchiveBackend, ROLLUP_GRANULARITIES, risk_bucket, encode_cursor, decode_cursor,
+    day_after, prepare_analysis, parse_search, suggestion_terms,
+    split_suggestion_query, empty_rollup
+)
+
+ARCHIVE_DB_PATH = os.path.join("data", "archive.db")
+
+ARCHIVE_COLUMNS = (
+    "id", "created_at", "updated_at", "verdict", "analysis_type",
+    "risk_score", "risk_level", "title", "content", "ai_analysis", "data"
+)
+TEXT_COLUMNS = ("title", "content", "ai_analysis")
+# Rows written per transaction by save_analyses
+WRITE_BATCH_SIZE = 1000
+# bm25 weight of each text column; a title match outranks a body match
+SEARCH_WEIGHTS = (5.0, 1.0, 1.0)
+
+UPSERT_ANALYSIS = (
+    f"INSERT INTO analyses ({', '.join(ARCHIVE_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(ARCHIVE_COLUMNS))}) "
+    f"ON CONFLICT (id) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in ARCHIVE_COLUMNS[1:])}"
+)
+
+# Bucket and dimension values of a row, as SQL over the ``{row}`` alias;
+# these match archive_backend.rollup_bucket and rollup_values
+ROLLUP_BUCKETS = {"hour": "substr({row}.created_at, 1, 13)", "day": "substr({row}.created_at, 1, 10)"}
+ROLLUP_VALUES = {
+    "total": "''",
+    "verdict": "COALESCE(NULLIF({row}.verdict, ''), 'UNVERIFIED')",
+    "risk_level": "{row}.risk_level",
+    "analysis_type": "COALESCE(NULLIF({row}.analysis_type, ''), 'unknown')"
+}
+ROLLUP_FIELDS = ("created_at", "verdict", "analysis_type", "risk_score")
+
+
+class SQLiteBackend(ArchiveBackend):
+    """
+    Archive of analyses in a local SQLite database.
+
+    Each analysis is one row: the fields it is filtered on as columns
+    and the whole document as JSON. Every listing filter has an index
+    ending in (created_at, id), so a filtered page is a single index
+    range scan in the order it is returned. The database runs in WAL
+    mode so reads are not blocked by a write in progress.
+
+    Statistics and trends are summed from ``archive_rollups``: per hour
+    and per day, the number of analyses in total and by verdict, risk
+    level and analysis type, with their risk score sums. Triggers update
+    the rollups in the same transaction as every insert, update and
+    delete, so they never drift from the rows.
+
+    Searches go through an FTS5 index of the text columns, kept in step
+    by triggers, and are ranked by bm25. Suggestions come from
+    ``search_terms``, a dictionary of terms and the number of analyses
+    containing them maintained on every write; its primary key is
+    sorted, so completing a prefix reads one key range.
+    """
+
+    def __init__(self, db_path: str = ARCHIVE_DB_PATH):
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS analyses (
+                id TEXT PRIMARY KEY,
+                created_at TEXT NOT NULL,
+                updated_at TEXT,
+                verdict TEXT,
+                analysis_type TEXT,
+                risk_score REAL NOT NULL,
+                risk_level TEXT NOT NULL,
+                title TEXT,
+                content TEXT,
+                ai_analysis TEXT,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_analyses_created ON analyses (created_at, id);
+            CREATE INDEX IF NOT EXISTS idx_analyses_verdict ON analyses (verdict, created_at, id);
+            CREATE INDEX IF NOT EXISTS idx_analyses_type ON analyses (analysis_type, created_at, id);
+            CREATE INDEX IF NOT EXISTS idx_analyses_risk ON analyses (risk_level, created_at, id);
+            CREATE TABLE IF NOT EXISTS search_terms (
+                term TEXT PRIMARY KEY,
+                documents INTEGER NOT NULL
+            ) WITHOUT ROWID;
+        """)
+        rolled_up = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'archive_rollups'"
+        ).fetchone() is not None
+        self._conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS archive_rollups (
+                granularity TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                dimension TEXT NOT NULL,
+                value TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                risk_sum REAL NOT NULL,
+                PRIMARY KEY (granularity, bucket, dimension, value)
+            ) WITHOUT ROWID;
+            CREATE TRIGGER IF NOT EXISTS analyses_rollup_insert AFTER INSERT ON analyses BEGIN
+                {_rollup_statement("new", 1)}
+            END;
+            CREATE TRIGGER IF NOT EXISTS analyses_rollup_delete AFTER DELETE ON analyses BEGIN
+                {_rollup_statement("old", -1)}
+            END;
+            CREATE TRIGGER IF NOT EXISTS analyses_rollup_update AFTER UPDATE OF {', '.join(ROLLUP_FIELDS)} ON analyses
+            WHEN {' OR '.join(f'old.{field} IS NOT new.{field}' for field in ROLLUP_FIELDS)} BEGIN
+                {_rollup_statement("old", -1)}
+                {_rollup_statement("new", 1)}
+            END;
+        """)
+        if not rolled_up:
+            self.rebuild_rollups()
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(analyses)")}
+        if "ai_analysis" not in columns:
+            # Databases created before search indexing
+            self._conn.execute("ALTER TABLE analyses ADD COLUMN ai_analysis TEXT")
+            self._conn.execute(
+                "UPDATE analyses SET ai_analysis = json_extract(data, '$.ai_analysis') "
+                "WHERE json_type(data, '$.ai_analysis') = 'text'"
+            )
+            self._conn.commit()
+        indexed = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'analyses_fts'"
+        ).fetchone() is not None
+        self._conn.executescript("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS analyses_fts USING fts5 (
+                title, content, ai_analysis,
+                content = 'analyses',
+                tokenize = 'unicode61 remove_diacritics 2'
+            );
+            CREATE TRIGGER IF NOT EXISTS analyses_fts_insert AFTER INSERT ON analyses BEGIN
+                INSERT INTO analyses_fts (rowid, title, content, ai_analysis)
+                VALUES (new.rowid, new.title, new.content, new.ai_analysis);
+            END;
+            CREATE TRIGGER IF NOT EXISTS analyses_fts_delete AFTER DELETE ON analyses BEGIN
+                INSERT INTO analyses_fts (analyses_fts, rowid, title, content, ai_analysis)
+                VALUES ('delete', old.rowid, old.title, old.content, old.ai_analysis);
+            END;
+            CREATE TRIGGER IF NOT EXISTS analyses_fts_update AFTER UPDATE OF title, content, ai_analysis ON analyses BEGIN
+                INSERT INTO analyses_fts (analyses_fts, rowid, title, content, ai_analysis)
+                VALUES ('delete', old.rowid, old.title, old.content, old.ai_analysis);
+                INSERT INTO analyses_fts (rowid, title, content, ai_analysis)
+                VALUES (new.rowid, new.title, new.content, new.ai_analysis);
+            END;
+        """)
+        if not indexed:
+            self.rebuild_search_index()
+
+    async def save_analysis(self, analysis_data: Dict[str, Any]) -> bool:
+        try:
+            return await asyncio.to_thread(self._save, [analysis_data]) == 1
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print(f"Error saving analysis to SQLite: {str(e)}")
+            return False
+
+    async def save_analyses(self, analyses: List[Dict[str, Any]]) -> int:
+        return await asyncio.to_thread(self._save, analyses)
+
+    async def get_analysis_by_id(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._get, analysis_id)
+
+    async def get_analyses_page(
+        self,
+        filters: Dict[str, Any],
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        offset: int = 0
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return await asyncio.to_thread(self._page, filters, limit, cursor, offset)
+
+    async def update_analysis(self, analysis_id: str, update_data: Dict[str, Any]) -> bool:
+        return await asyncio.to_thread(self._update, analysis_id, update_data)
+
+    async def delete_analysis(self, analysis_id: str) -> bool:
+        return await asyncio.to_thread(self._delete, analysis_id)
+
+    async def read_rollups(self, granularity: str, bucket_from: str, bucket_to: Optional[str] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        return await asyncio.to_thread(self._read_rollups, granularity, bucket_from, bucket_to)
+
+    def rebuild_rollups(self) -> int:
+        """Recount the rollups from the stored analyses; returns the number of rows"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM archive_rollups")
+                for granularity in ROLLUP_GRANULARITIES:
+                    bucket = ROLLUP_BUCKETS[granularity].format(row="a")
+                    for dimension, value in ROLLUP_VALUES.items():
+                        self._conn.execute(
+                            "INSERT INTO archive_rollups (granularity, bucket, dimension, value, count, risk_sum) "
+                            f"SELECT ?, {bucket}, ?, {value.format(row='a')}, COUNT(*), SUM(a.risk_score) "
+                            "FROM analyses a GROUP BY 2, 4",
+                            (granularity, dimension)
+                        )
+                return self._conn.execute("SELECT COUNT(*) FROM archive_rollups").fetchone()[0]
+
+    async def get_search_suggestions(self, query: str, limit: int = 10) -> List[str]:
+        return await asyncio.to_thread(self._suggestions, query, limit)
+
+    def rebuild_search_index(self) -> int:
+        """
+        Recreate the full-text index and term dictionary from the stored
+        analyses; returns the number of distinct terms.
+        """
+        counts: Dict[str, int] = {}
+        with self._lock:
+            with self._conn:
+                self._conn.execute("INSERT INTO analyses_fts (analyses_fts) VALUES ('rebuild')")
+                for texts in self._conn.execute(f"SELECT {', '.join(TEXT_COLUMNS)} FROM analyses"):
+                    for term in _terms(texts):
+                        counts[term] = counts.get(term, 0) + 1
+                self._conn.execute("DELETE FROM search_terms")
+                self._conn.executemany("INSERT INTO search_terms (term, documents) VALUES (?, ?)", counts.items())
+        return len(counts)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _save(self, analyses: List[Dict[str, Any]]) -> int:
+        rows = [self._row(prepare_analysis(analysis)) for analysis in analyses]
+        text_slice = slice(ARCHIVE_COLUMNS.index("title"), ARCHIVE_COLUMNS.index("ai_analysis") + 1)
+        for start in range(0, len(rows), WRITE_BATCH_SIZE):
+            batch = rows[start:start + WRITE_BATCH_SIZE]
+            with self._lock:
+                with self._conn:
+                    # Texts being replaced, so their terms can be uncounted
+                    ids = list({row[0] for row in batch})
+                    previous = {
+                        row[0]: row[1:]
+                        for row in self._conn.execute(
+                            f"SELECT id, {', '.join(TEXT_COLUMNS)} FROM analyses "
+                            f"WHERE id IN ({', '.join('?' * len(ids))})",
+                            ids
+                        )
+                    }
+                    deltas: Dict[str, int] = {}
+                    for row in batch:
+                        texts = row[text_slice]
+                        for term in _terms(previous.get(row[0], ())):
+                            deltas[term] = deltas.get(term, 0) - 1
+                        for term in _terms(texts):
+                            deltas[term] = deltas.get(term, 0) + 1
+                        previous[row[0]] = texts
+                    self._conn.executemany(UPSERT_ANALYSIS, batch)
+                    self._count_terms(deltas)
+        return len(rows)
+
+    def _count_terms(self, deltas: Dict[str, int]):
+        changed = [(term, delta) for term, delta in deltas.items() if delta]
+        self._conn.executemany(
+            "INSERT INTO search_terms (term, documents) VALUES (?, ?) "
+            "ON CONFLICT (term) DO UPDATE SET documents = documents + excluded.documents",
+            changed
+        )
+        removed = [(term,) for term, delta in changed if delta < 0]
+        if removed:
+            self._conn.executemany("DELETE FROM search_terms WHERE term = ? AND documents <= 0", removed)
+
+    def _page(self, filters: Dict[str, Any], limit: int, cursor: Optional[str], offset: int):
+        clauses, params = [], []
+        for column in ("verdict", "analysis_type", "risk_level"):
+            if filters.get(column):
+                clauses.append(f"a.{column} = ?")
+                params.append(filters[column])
+        if filters.get("date_from"):
+            clauses.append("a.created_at >= ?")
+            params.append(filters["date_from"])
+        if filters.get("date_to"):
+            clauses.append("a.created_at < ?")
+            params.append(day_after(filters["date_to"]))
+
+        # Searches are ranked by bm25 (lower is better) instead of date
+        match = _match_expression(filters.get("search"))
+        if match:
+            source = "analyses_fts JOIN analyses a ON a.rowid = analyses_fts.rowid"
+            clauses.insert(0, "analyses_fts MATCH ?")
+            params.insert(0, match)
+            sort_key = f"bm25(analyses_fts, {', '.join(map(str, SEARCH_WEIGHTS))})"
+            order = "score, a.id"
+            after = "(score, a.id) > (?, ?)"
+        else:
+            source = "analyses a"
+            sort_key = "a.created_at"
+            order = "a.created_at DESC, a.id DESC"
+            after = "(a.created_at, a.id) < (?, ?)"
+        if cursor:
+            clauses.append(after.replace("score", sort_key))
+            params.extend(decode_cursor(cursor))
+            offset = 0
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT a.data, {sort_key} AS score FROM {source} {where} ORDER BY {order} LIMIT ? OFFSET ?",
+                (*params, limit + 1, offset)
+            ).fetchall()
+        analyses = [json.loads(row[0]) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = encode_cursor({"id": analyses[-1]["id"], "score": rows[limit - 1][1]}, "score")
+        return analyses, next_cursor
+
+    def _get(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM analyses WHERE id = ?", (analysis_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _delete(self, analysis_id: str) -> bool:
+        with self._lock:
+            with self._conn:
+                texts = self._conn.execute(
+                    f"SELECT {', '.join(TEXT_COLUMNS)} FROM analyses WHERE id = ?", (analysis_id,)
+                ).fetchone()
+                if texts is None:
+                    return False
+                self._conn.execute("DELETE FROM analyses WHERE id = ?", (analysis_id,))
+                self._count_terms({term: -1 for term in _terms(texts)})
+        return True
+
+    def _read_rollups(self, granularity: str, bucket_from: str, bucket_to: Optional[str]) -> List[Tuple[str, Dict[str, Any]]]:
+        clauses, params = ["granularity = ?", "bucket >= ?"], [granularity, bucket_from]
+        if bucket_to is not None:
+            clauses.append("bucket < ?")
+            params.append(bucket_to)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT bucket, dimension, value, count, risk_sum FROM archive_rollups "
+                f"WHERE {' AND '.join(clauses)} ORDER BY bucket",
+                params
+            ).fetchall()
+
+        rollups: Dict[str, Dict[str, Any]] = {}
+        for bucket, dimension, value, count, risk_sum in rows:
+            rollup = rollups.setdefault(bucket, empty_rollup())
+            if dimension == "total":
+                rollup["total"] = count
+                rollup["risk_sum"] = risk_sum
+            else:
+                rollup[dimension][value] = count
+        return list(rollups.items())
+
+    def _suggestions(self, query: str, limit: int) -> List[str]:
+        head, prefix = split_suggestion_query(query)
+        if not prefix:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT term FROM search_terms WHERE term >= ? AND term < ? "
+                "ORDER BY documents DESC, term LIMIT ?",
+                (prefix, prefix + "\U0010ffff", limit)
+            ).fetchall()
+        return [f"{head} {row[0]}" if head else row[0] for row in rows]
+
+    def _update(self, analysis_id: str, update_data: Dict[str, Any]) -> bool:
+        with self._lock:
+            with self._conn:
+                row = self._conn.execute("SELECT data FROM analyses WHERE id = ?", (analysis_id,)).fetchone()
+                if row is None:
+                    return False
+                previous = json.loads(row[0])
+                data = {**previous, **update_data, "id": analysis_id}
+                self._conn.execute(UPSERT_ANALYSIS, self._row(data))
+                deltas = {term: -1 for term in suggestion_terms(previous)}
+                for term in suggestion_terms(data):
+                    deltas[term] = deltas.get(term, 0) + 1
+                self._count_terms(deltas)
+        return True
+
+    def _row(self, data: Dict[str, Any]) -> tuple:
+        score = data.get("risk_score") or 0
+        return (
+            data["id"],
+            data["created_at"],
+            data.get("updated_at"),
+            data.get("verdict"),
+            data.get("analysis_type"),
+            score,
+            risk_bucket(score),
+            *(_text(data.get(column)) for column in TEXT_COLUMNS),
+            json.dumps(data, default=str)
+        )
+
+
+def _rollup_statement(row: str, sign: int) -> str:
+    """Trigger statement adding a row (1) to its rollups or removing it (-1)"""
+    risk = "{row}.risk_score" if sign > 0 else "-{row}.risk_score"
+    values = [
+        f"('{granularity}', {ROLLUP_BUCKETS[granularity]}, '{dimension}', {value}, {sign}, {risk})".format(row=row)
+        for granularity in ROLLUP_GRANULARITIES
+        for dimension, value in ROLLUP_VALUES.items()
+    ]
+    return (
+        "INSERT INTO archive_rollups (granularity, bucket, dimension, value, count, risk_sum) "
+        f"VALUES {', '.join(values)} "
+        "ON CONFLICT (granularity, bucket, dimension, value) "
+        "DO UPDATE SET count = count + excluded.count, risk_sum = risk_sum + excluded.risk_sum;"
+    )
+
+
+def _text(value: Any) -> Optional[str]:
+    return value if isinstance(value, str) else None
+
+
+def _terms(texts) -> List[str]:
+    return suggestion_terms(dict(zip(TEXT_COLUMNS, texts)))
+
+
+def _match_expression(search: Any) -> Optional[str]:
+    """An FTS5 query requiring every phrase and term of a search"""
+    phrases, terms = parse_search(search)
+    parts = [f'"{" ".join(phrase)}"' for phrase in phrases] + [f'"{term}"' for term in terms]
+    return " AND ".join(parts) or None
@@ -0,0 +1,263 @@
+from typing import Dict, Any, List, Optional, Tuple
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+
+CATALOG_COLUMNS = ("file_id", "sha256", "filename", "content_type", "upload_type", "file_size", "upload_time")
+
+
+class UploadStore:
+    """
+    Content-addressed storage for uploaded files.
+
+    Each distinct file is stored once as ``blobs/ab/cd/<sha256>``; every
+    upload of it is a small JSON reference in ``refs/<file_id>.json``.
+    Blob reference counts live in SQLite and a blob is deleted with its
+    last reference. Analyses of a blob are stored per set of analysis
+    options, so later uploads of the same bytes analysed the same way
+    reuse them.
+
+    Upload metadata is served from an indexed SQLite catalog. The
+    reference files remain the source of truth: the catalog is rebuilt
+    from them when it is found empty, or on demand with ``rebuild()``.
+    """
+
+    def __init__(self, root: str = UPLOAD_DIR):
+        self.root = root
+        self.blob_dir = os.path.join(root, "blobs")
+        self.ref_dir = os.path.join(root, "refs")
+        self.tmp_dir = os.path.join(root, "tmp")
+        for directory in (self.blob_dir, self.ref_dir, self.tmp_dir):
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(root, "uploads.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                sha256 TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                content_type TEXT NOT NULL,
+                refcount INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS blob_analyses (
+                sha256 TEXT NOT NULL,
+                options TEXT NOT NULL,
+                analysis TEXT NOT NULL,
+                PRIMARY KEY (sha256, options)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS uploads (
+                file_id TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                filename TEXT,
+                content_type TEXT NOT NULL,
+                upload_type TEXT NOT NULL,
+                file_size INTEGER NOT NULL,
+                upload_time TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_uploads_time ON uploads (upload_time, file_id);
+            CREATE INDEX IF NOT EXISTS idx_uploads_type_time ON uploads (upload_type, upload_time, file_id);
+            CREATE INDEX IF NOT EXISTS idx_uploads_sha256 ON uploads (sha256);
+        """)
+
+        empty = self._conn.execute("SELECT 1 FROM uploads LIMIT 1").fetchone() is None
+        if empty and os.listdir(self.ref_dir):
+            self.rebuild()
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.blob_dir, sha256[:2], sha256[2:4], sha256)
+
+    def temp_path(self) -> str:
+        """A staging path on the same filesystem, so commit is a rename"""
+        return os.path.join(self.tmp_dir, f"{uuid.uuid4()}.part")
+
+    def commit(self, temp_path: str, sha256: str, size: int, content_type: str, ref: Dict[str, Any]) -> Tuple[str, bool]:
+        """
+        Move a staged upload into the store and record a reference to it.
+
+        Returns the blob path and whether the blob is new; for a file
+        already stored the staged copy is discarded.
+        """
+        path = self.blob_path(sha256)
+        with self._lock:
+            with self._conn:
+                updated = self._conn.execute(
+                    "UPDATE blobs SET refcount = refcount + 1 WHERE sha256 = ?", (sha256,)
+                ).rowcount
+                if updated and os.path.exists(path):
+                    os.remove(temp_path)
+                else:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(temp_path, path)
+                    if not updated:
+                        self._conn.execute(
+                            "INSERT INTO blobs (sha256, size, content_type, refcount, created_at) "
+                            "VALUES (?, ?, ?, 1, ?)",
+                            (sha256, size, content_type, time.time())
+                        )
+                ref = {**ref, "sha256": sha256, "file_size": size, "content_type": content_type}
+                self._write_ref(ref)
+                self._catalog(ref)
+        return path, not updated
+
+    def get_ref(self, file_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(CATALOG_COLUMNS)} FROM uploads WHERE file_id = ?", (file_id,)
+            ).fetchone()
+        return dict(zip(CATALOG_COLUMNS, row)) if row else None
+
+    def list_refs(self, limit: int = 50, cursor: Optional[str] = None, upload_type: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Newest uploads first, one page at a time.
+
+        Pages are keyed on (upload_time, file_id) rather than an offset,
+        so each page is a single index range scan; the returned cursor
+        is None on the last page.
+        """
+        clauses, params = [], []
+        if upload_type:
+            clauses.append("upload_type = ?")
+            params.append(upload_type)
+        if cursor:
+            upload_time, file_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+            clauses.append("(upload_time, file_id) < (?, ?)")
+            params.extend([upload_time, file_id])
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(CATALOG_COLUMNS)} FROM uploads {where} "
+                "ORDER BY upload_time DESC, file_id DESC LIMIT ?",
+                (*params, limit + 1)
+            ).fetchall()
+        refs = [dict(zip(CATALOG_COLUMNS, row)) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = refs[-1]
+            next_cursor = base64.urlsafe_b64encode(f"{last['upload_time']}|{last['file_id']}".encode()).decode()
+        return refs, next_cursor
+
+    def rebuild(self) -> int:
+        """
+        Recreate the catalog and blob reference counts from the files on
+        disk. Reference files whose blob is missing are dropped.
+        """
+        refs = []
+        for name in os.listdir(self.ref_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.ref_dir, name)) as f:
+                    ref = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if os.path.exists(self.blob_path(ref["sha256"])):
+                refs.append(ref)
+
+        counts: Dict[str, int] = {}
+        for ref in refs:
+            counts[ref["sha256"]] = counts.get(ref["sha256"], 0) + 1
+
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM uploads")
+                for ref in refs:
+                    self._catalog(ref)
+                self._conn.execute("UPDATE blobs SET refcount = 0")
+                for ref in refs:
+                    sha256 = ref["sha256"]
+                    self._conn.execute(
+                        "INSERT INTO blobs (sha256, size, content_type, refcount, created_at) VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT (sha256) DO UPDATE SET refcount = excluded.refcount",
+                        (sha256, ref["file_size"], ref["content_type"], counts[sha256], time.time())
+                    )
+                self._conn.execute("DELETE FROM blobs WHERE refcount = 0")
+                self._conn.execute("DELETE FROM blob_analyses WHERE sha256 NOT IN (SELECT sha256 FROM blobs)")
+        return len(refs)
+
+    def release(self, file_id: str) -> bool:
+        """Drop an upload's reference, deleting the blob with its last one"""
+        with self._lock:
+            row = self._conn.execute("SELECT sha256 FROM uploads WHERE file_id = ?", (file_id,)).fetchone()
+            if row is None:
+                return False
+            sha256 = row[0]
+            with self._conn:
+                self._conn.execute("UPDATE blobs SET refcount = refcount - 1 WHERE sha256 = ?", (sha256,))
+                row = self._conn.execute("SELECT refcount FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+                if row is None or row[0] <= 0:
+                    self._conn.execute("DELETE FROM blobs WHERE sha256 = ?", (sha256,))
+                    self._conn.execute("DELETE FROM blob_analyses WHERE sha256 = ?", (sha256,))
+                    try:
+                        os.remove(self.blob_path(sha256))
+                    except FileNotFoundError:
+                        pass
+                self._conn.execute("DELETE FROM uploads WHERE file_id = ?", (file_id,))
+                try:
+                    os.remove(self._ref_path(file_id))
+                except FileNotFoundError:
+                    pass
+        return True
+
+    def get_analysis(self, sha256: str, options: str) -> Optional[Dict[str, Any]]:
+        """The analysis of a blob run with the given options"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT analysis FROM blob_analyses WHERE sha256 = ? AND options = ?", (sha256, options)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_analysis(self, sha256: str, options: str, analysis: Dict[str, Any]):
+        value = json.dumps(analysis, default=str)
+        with self._lock:
+            with self._conn:
+                # Only blobs still stored keep analyses
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO blob_analyses (sha256, options, analysis) "
+                    "SELECT sha256, ?, ? FROM blobs WHERE sha256 = ?",
+                    (options, value, sha256)
+                )
+
+    def _ref_path(self, file_id: str) -> str:
+        # file_id arrives from the URL; only uuid-shaped ids map to a path
+        return os.path.join(self.ref_dir, f"{uuid.UUID(file_id)}.json")
+
+    def _catalog(self, ref: Dict[str, Any]):
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO uploads ({', '.join(CATALOG_COLUMNS)}) VALUES ({', '.join('?' * len(CATALOG_COLUMNS))})",
+            tuple(ref.get(column) for column in CATALOG_COLUMNS)
+        )
+
+    def _write_ref(self, ref: Dict[str, Any]):
+        path = self._ref_path(ref["file_id"])
+        staged = f"{path}.tmp"
+        with open(staged, "w") as f:
+            json.dump(ref, f)
+        os.replace(staged, path)
+
+
+_store: Optional[UploadStore] = None
+
+
+def get_upload_store() -> UploadStore:
+    global _store
+    if _store is None:
+        _store = UploadStore()
+    return _store
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] != ["rebuild"]:
+        print("Usage: python -m database.upload_store rebuild")
+        sys.exit(1)
+    print(f"Catalogued {get_upload_store().rebuild()} uploads")
@@ -10,7 +10,9 @@ from api.routes import fact_check, upload, report, archive
 from api.middleware.cors import setup_cors
 from api.middleware.auth import get_current_user
 from analysis_engine.comprehensive_analysis import ComprehensiveAnalyzer
-from database.archive_service import ArchiveService
+from analysis_engine.url_fetcher import close_url_fetcher
+from analysis_engine.forensics_pool import shutdown_forensics_pool
+from database.archive_service import ArchiveService, close_archive_backend
 from database.report_service import ReportService
 from utils.config import get_settings
 
@@ -40,6 +42,9 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     print("🛑 Shutting down TruthLens API...")
+    await close_url_fetcher()
+    shutdown_forensics_pool()
+    close_archive_backend()
 
 # Create FastAPI app
 app = FastAPI(
@@ -14,6 +14,9 @@ class Settings(BaseSettings):
     
     # Database
     firestore_project_id: Optional[str] = None
+    # Archive storage: "firestore" or "sqlite" (a local file, no external service)
+    archive_backend: str = "firestore"
+    archive_db_path: str = "data/archive.db"
     
     # Email
     smtp_server: str = "smtp.gmail.com"
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules import each other as top-level packages (analysis_engine, database, ...)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
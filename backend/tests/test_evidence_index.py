@@ -0,0 +1,76 @@
+from analysis_engine.evidence_index import EvidenceIndex, tokenize
+
+RECORDS = [
+    {
+        "title": "Moon landing footage is authentic",
+        "text": "Independent analysis of the Apollo 11 footage confirms the moon landing was filmed on the moon.",
+        "url": "https://example.org/apollo",
+        "publisher": "Example Science",
+    },
+    {
+        "claim": "Drinking bleach cures viral infections",
+        "text": "Health agencies warn that drinking bleach is poisonous and cures nothing.",
+        "url": "https://factcheck.example/bleach",
+        "publisher": "Example Checks",
+        "rating": "False",
+    },
+    {
+        "title": "Local bakery wins award",
+        "text": "The bakery on main street won the regional bread award this year.",
+        "url": "https://news.example/bakery",
+    },
+]
+
+
+def test_tokenize_drops_stopwords_and_single_characters():
+    assert tokenize("The Moon is a rock, 1 of many") == ["moon", "rock", "many"]
+
+
+def test_search_ranks_matching_document_first():
+    index = EvidenceIndex()
+    assert index.add_documents(RECORDS) == 3
+
+    results = index.search("does bleach cure infections?")
+
+    assert results[0]["url"] == "https://factcheck.example/bleach"
+    assert results[0]["description"] == "Example Checks rating: False"
+    assert all(result["url"] != "https://news.example/bakery" for result in results)
+
+
+def test_records_without_url_or_text_are_skipped():
+    index = EvidenceIndex()
+    assert index.add_documents([{"title": "No link", "text": "bread"}, {"url": "https://x.example"}]) == 0
+    assert index.num_docs == 0
+    assert index.search("bread") == []
+
+
+def test_saved_index_matches_in_memory_index(tmp_path):
+    index = EvidenceIndex()
+    index.add_documents(RECORDS)
+    before = index.search("moon landing footage")
+
+    index.save(str(tmp_path))
+    reloaded = EvidenceIndex(str(tmp_path))
+
+    assert reloaded.num_docs == 3
+    assert reloaded.search("moon landing footage") == before
+    reloaded.close()
+    index.close()
+
+
+def test_delta_segment_is_searched_with_saved_segment(tmp_path):
+    index = EvidenceIndex()
+    index.add_documents(RECORDS[:2])
+    index.save(str(tmp_path))
+
+    index.add_documents(RECORDS[2:])
+    assert index.num_docs == 3
+    assert index.search("bakery bread award")[0]["url"] == "https://news.example/bakery"
+    assert index.search("moon footage")[0]["url"] == "https://example.org/apollo"
+
+    # Saving merges the delta into the on-disk segment
+    index.save()
+    reloaded = EvidenceIndex(str(tmp_path))
+    assert reloaded.search("bakery bread award")[0]["url"] == "https://news.example/bakery"
+    reloaded.close()
+    index.close()
@@ -0,0 +1,87 @@
+import cv2
+import numpy as np
+import pytest
+
+from analysis_engine import forensic_stages
+
+REAL_PHOTOS = ["camera", "astronaut", "coffee", "chelsea", "rocket", "brick", "grass", "text", "page"]
+
+
+def _gray(image: np.ndarray) -> np.ndarray:
+    return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY) if image.ndim == 3 else image
+
+
+def _jpeg(image: np.ndarray, quality: int = 90) -> np.ndarray:
+    _, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return cv2.imdecode(encoded, cv2.IMREAD_GRAYSCALE)
+
+
+def _clone(image: np.ndarray) -> np.ndarray:
+    height, width = image.shape
+    size = height // 4
+    forged = image.copy()
+    forged[height // 2:height // 2 + size, width // 2:width // 2 + size] = \
+        image[height // 10:height // 10 + size, width // 10:width // 10 + size]
+    return _jpeg(forged)
+
+
+def _synthetic_photo(height: int = 600, width: int = 800) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    texture = rng.normal(128, 40, (height // 4, width // 4)).astype(np.float32)
+    texture = cv2.resize(texture, (width, height), interpolation=cv2.INTER_CUBIC)
+    image = cv2.GaussianBlur(texture, (0, 0), 1.5) + rng.normal(0, 3, (height, width))
+    return _jpeg(np.clip(image, 0, 255).astype(np.uint8))
+
+
+@pytest.mark.parametrize("name", REAL_PHOTOS)
+def test_real_photos_are_not_flagged(name):
+    data = pytest.importorskip("skimage.data")
+    result = forensic_stages.detect_manipulation(_gray(getattr(data, name)()))
+
+    assert not result["manipulated"]
+    assert result["cloned_regions"] == []
+
+
+@pytest.mark.parametrize("name", ["coffee", "chelsea"])
+def test_clone_in_real_photo_is_located_but_not_decisive_alone(name):
+    data = pytest.importorskip("skimage.data")
+    result = forensic_stages.detect_manipulation(_clone(_gray(getattr(data, name)())))
+
+    assert result["duplicate_regions"] > 0.01
+    source, target = result["cloned_regions"][:2]
+    assert source[:2] == pytest.approx([0.1, 0.1], abs=0.02)
+    assert target[:2] == pytest.approx([0.5, 0.5], abs=0.02)
+    assert not result["manipulated"]
+
+
+def test_rendered_text_has_no_cloned_regions():
+    screenshot = np.full((900, 1400), 250, np.uint8)
+    for line in range(30):
+        cv2.putText(
+            screenshot, "The quick brown fox jumps over the lazy dog 0123456789",
+            (20, 30 + line * 29), cv2.FONT_HERSHEY_SIMPLEX, 0.9, 20, 2
+        )
+
+    for image in (screenshot, _jpeg(screenshot, 85)):
+        assert forensic_stages.find_duplicate_regions(image) == (0.0, [])
+
+
+def test_regular_texture_has_no_cloned_regions():
+    rng = np.random.default_rng(0)
+    tile = rng.normal(128, 40, (32, 32))
+    texture = np.tile(tile, (30, 40)) + rng.normal(0, 2, (960, 1280))
+
+    assert forensic_stages.find_duplicate_regions(np.clip(texture, 0, 255).astype(np.uint8)) == (0.0, [])
+
+
+def test_clone_is_found_and_corroborated_by_overlapping_region():
+    clean = _synthetic_photo()
+    assert forensic_stages.find_duplicate_regions(clean) == (0.0, [])
+
+    fraction, regions = forensic_stages.find_duplicate_regions(_clone(clean))
+    assert fraction > 0.01
+    assert len(regions) == 2
+
+    target = regions[1]
+    assert forensic_stages.regions_overlap(regions, [[target[0] + 0.02, target[1] + 0.02, target[2], target[3]]])
+    assert not forensic_stages.regions_overlap(regions, [[0.8, 0.8, 0.95, 0.95]])
@@ -0,0 +1,89 @@
+import cv2
+import numpy as np
+import pytest
+
+from analysis_engine import image_hash_index
+from analysis_engine.image_hash_index import ImageHashIndex, dhash, hamming, phash
+
+
+def _photo(seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    image = cv2.resize(rng.normal(128, 50, (24, 32)).astype(np.float32), (640, 480), interpolation=cv2.INTER_CUBIC)
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+
+def _random_hashes(rng, count):
+    return [int(value) for value in rng.integers(0, 1 << 64, count, dtype=np.uint64)]
+
+
+def _flip_bits(value: int, rng, bits: int) -> int:
+    for position in rng.choice(64, bits, replace=False):
+        value ^= 1 << int(position)
+    return value
+
+
+def test_hashes_survive_resize_and_recompression():
+    image = _photo(0)
+    _, encoded = cv2.imencode(".jpg", cv2.resize(image, (320, 240)), [cv2.IMWRITE_JPEG_QUALITY, 60])
+    copy = cv2.imdecode(encoded, cv2.IMREAD_GRAYSCALE)
+    other = _photo(1)
+
+    assert hamming(phash(image), phash(copy)) <= 4
+    assert hamming(dhash(image), dhash(copy)) <= 8
+    assert hamming(phash(image), phash(other)) > 16
+
+
+def test_search_finds_near_duplicates_and_flags_debunked(tmp_path):
+    index = ImageHashIndex(str(tmp_path / "hashes.db"))
+    image = _photo(0)
+    index.add("a" * 64, phash(image), dhash(image), source="fact_check", verdict="False", url="https://x.example")
+    other = _photo(1)
+    index.add("b" * 64, phash(other), dhash(other))
+
+    small = cv2.resize(image, (320, 240), interpolation=cv2.INTER_AREA)
+    results = index.search(phash(small), dhash(small))
+
+    assert [result["sha256"] for result in results] == ["a" * 64]
+    assert results[0]["debunked"]
+    assert results[0]["url"] == "https://x.example"
+
+
+def test_readding_an_image_updates_its_record(tmp_path):
+    index = ImageHashIndex(str(tmp_path / "hashes.db"))
+    image = _photo(0)
+    first = index.add("a" * 64, phash(image), dhash(image))
+    second = index.add("a" * 64, phash(image), dhash(image), verdict="MANIPULATED", title="Doctored")
+
+    assert first == second
+    assert len(index) == 1
+    record = index.search(phash(image), dhash(image))[0]
+    assert (record["verdict"], record["title"], record["debunked"]) == ("MANIPULATED", "Doctored", True)
+
+
+@pytest.mark.parametrize("merge_threshold", [1, 10_000])
+def test_chunk_tables_match_brute_force(tmp_path, monkeypatch, merge_threshold):
+    # A threshold of 1 merges every insert into the sorted tables; a large
+    # one keeps everything in the linearly scanned delta segment
+    monkeypatch.setattr(image_hash_index, "MERGE_THRESHOLD", merge_threshold)
+    rng = np.random.default_rng(7)
+    index = ImageHashIndex(str(tmp_path / "hashes.db"))
+    query = _random_hashes(rng, 1)[0]
+    stored = _random_hashes(rng, 300) + [_flip_bits(query, rng, bits) for bits in range(10)]
+    for number, value in enumerate(stored):
+        index.add(f"{number:064x}", value, query)
+
+    found = {int(result["sha256"], 16) for result in index.search(query, query, limit=100)}
+    expected = {number for number, value in enumerate(stored) if hamming(value, query) <= image_hash_index.MAX_DISTANCE}
+
+    assert found == expected
+    assert len(expected) >= 8
+
+
+def test_records_persist_across_instances(tmp_path):
+    path = str(tmp_path / "hashes.db")
+    high_bit = (1 << 63) | 0x1234
+    ImageHashIndex(path).add("a" * 64, high_bit, high_bit)
+
+    reloaded = ImageHashIndex(path)
+    assert len(reloaded) == 1
+    assert reloaded.search(high_bit, high_bit)[0]["phash_distance"] == 0
@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta
+import asyncio
+
+import pytest
+
+from database.sqlite_backend import SQLiteBackend
+
+ANALYSES = [
+    {
+        "id": "a1", "created_at": "2024-03-01T09:15:00", "verdict": "FALSE INFORMATION",
+        "analysis_type": "text", "risk_score": 90, "title": "Vaccine microchip claim",
+        "content": "Claims that vaccines contain microchips are false."
+    },
+    {
+        "id": "a2", "created_at": "2024-03-01T10:30:00", "verdict": "MISLEADING",
+        "analysis_type": "url", "risk_score": 65, "title": "Election turnout figures",
+        "content": "The turnout chart omits postal votes."
+    },
+    {
+        "id": "a3", "created_at": "2024-03-02T08:00:00", "verdict": "TRUE INFORMATION",
+        "analysis_type": "image", "risk_score": 10, "title": "Vaccine rollout photo",
+        "ai_analysis": "The photo is authentic and unaltered."
+    },
+]
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "archive.db"))
+    assert asyncio.run(backend.save_analyses(ANALYSES)) == 3
+    yield backend
+    backend.close()
+
+
+def _search_terms(backend):
+    return dict(backend._conn.execute("SELECT term, documents FROM search_terms"))
+
+
+def _search(backend, text):
+    analyses, _ = asyncio.run(backend.get_analyses_page({"search": text}))
+    return [analysis["id"] for analysis in analyses]
+
+
+def assert_search_terms_consistent(backend):
+    maintained = _search_terms(backend)
+    backend.rebuild_search_index()
+    assert maintained == _search_terms(backend)
+
+
+def test_search_follows_updates_and_deletes(backend):
+    assert sorted(_search(backend, "vaccine")) == ["a1", "a3"]
+    assert _search(backend, '"postal votes"') == ["a2"]
+
+    assert asyncio.run(backend.update_analysis("a1", {"title": "Microchip rumour", "content": "Debunked."}))
+    assert _search(backend, "vaccine") == ["a3"]
+    assert _search(backend, "rumour") == ["a1"]
+
+    assert asyncio.run(backend.delete_analysis("a3"))
+    assert _search(backend, "vaccine") == []
+    assert not asyncio.run(backend.delete_analysis("a3"))
+
+
+def test_term_dictionary_matches_a_rebuild_after_every_write(backend):
+    assert_search_terms_consistent(backend)
+    assert _search_terms(backend)["vaccine"] == 2
+
+    asyncio.run(backend.update_analysis("a1", {"title": "Microchip rumour"}))
+    assert_search_terms_consistent(backend)
+
+    # Saving an existing id replaces its texts
+    asyncio.run(backend.save_analysis({**ANALYSES[2], "title": "Rollout photo", "ai_analysis": None}))
+    assert_search_terms_consistent(backend)
+    assert "vaccine" not in _search_terms(backend)
+
+    asyncio.run(backend.delete_analysis("a2"))
+    assert_search_terms_consistent(backend)
+    assert "turnout" not in _search_terms(backend)
+
+
+def test_suggestions_complete_the_last_word(backend):
+    assert asyncio.run(backend.get_search_suggestions("vac")) == ["vaccine", "vaccines"]
+    assert asyncio.run(backend.get_search_suggestions("election tur")) == ["election turnout"]
+    assert asyncio.run(backend.get_search_suggestions("vaccine ")) == []
+
+
+def _rollups(backend):
+    return {
+        row[:4]: (row[4], round(row[5], 6))
+        for row in backend._conn.execute("SELECT * FROM archive_rollups WHERE count != 0")
+    }
+
+
+def assert_rollups_consistent(backend):
+    maintained = _rollups(backend)
+    backend.rebuild_rollups()
+    assert maintained == _rollups(backend)
+
+
+def test_rollups_match_a_recount_after_every_write(backend):
+    assert_rollups_consistent(backend)
+
+    # Moves a1 to another verdict, risk level and hour
+    asyncio.run(backend.update_analysis("a1", {
+        "verdict": "MISLEADING", "risk_score": 70, "created_at": "2024-03-01T11:00:00"
+    }))
+    assert_rollups_consistent(backend)
+
+    # Text-only changes leave the counts alone
+    asyncio.run(backend.update_analysis("a2", {"title": "Turnout"}))
+    assert_rollups_consistent(backend)
+
+    asyncio.run(backend.save_analysis({**ANALYSES[2], "risk_score": 85, "analysis_type": None}))
+    assert_rollups_consistent(backend)
+
+    asyncio.run(backend.delete_analysis("a2"))
+    assert_rollups_consistent(backend)
+
+
+def test_read_rollups_sums_each_bucket(backend):
+    asyncio.run(backend.update_analysis("a1", {"verdict": "MISLEADING", "risk_score": 70}))
+    asyncio.run(backend.delete_analysis("a3"))
+
+    days = dict(asyncio.run(backend.read_rollups("day", "2024-03-01")))
+    assert days["2024-03-01"]["total"] == 2
+    assert days["2024-03-01"]["risk_sum"] == pytest.approx(135)
+    assert days["2024-03-01"]["verdict"].get("MISLEADING") == 2
+    assert not days["2024-03-01"]["verdict"].get("FALSE INFORMATION")
+    assert days["2024-03-01"]["risk_level"].get("medium") == 2
+    assert not days.get("2024-03-02", {"total": 0})["total"]
+
+    hours = dict(asyncio.run(backend.read_rollups("hour", "2024-03-01T10", "2024-03-01T11")))
+    assert list(hours) == ["2024-03-01T10"]
+    assert hours["2024-03-01T10"]["analysis_type"] == {"url": 1}
+
+
+def test_statistics_come_from_the_rollups(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "archive.db"))
+    now = datetime.now()
+    asyncio.run(backend.save_analyses([
+        {**analysis, "created_at": (now - timedelta(days=days)).isoformat()}
+        for analysis, days in zip(ANALYSES, (0, 1, 30))
+    ]))
+
+    stats = asyncio.run(backend.get_statistics("7d"))
+
+    assert stats["total_analyses"] == 2
+    assert stats["false_information_count"] == 1
+    assert stats["high_risk_count"] == 1
+    assert stats["analysis_types"] == {"text": 1, "url": 1}
+    backend.close()
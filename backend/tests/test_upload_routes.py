@@ -0,0 +1,75 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from analysis_engine.comprehensive_analysis import ComprehensiveAnalyzer
+from api.routes import upload
+from database.upload_store import UploadStore, get_upload_store
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+
+class RecordingAnalyzer:
+    """Stands in for the analyzers; records the requests it is given"""
+
+    calls = []
+
+    async def analyze(self, analysis_data):
+        self.calls.append(analysis_data)
+        return {"verdict": "UNVERIFIED", "language": analysis_data.get("language", "en")}
+
+
+@pytest.fixture
+def client(tmp_path):
+    RecordingAnalyzer.calls = []
+    store = UploadStore(str(tmp_path))
+    app = FastAPI()
+    app.include_router(upload.router, prefix="/api")
+    app.dependency_overrides[get_upload_store] = lambda: store
+    app.dependency_overrides[ComprehensiveAnalyzer] = RecordingAnalyzer
+    return TestClient(app)
+
+
+def _upload(client, data=PNG, content_type="image/png"):
+    return client.post("/api/upload/image", files={"image": ("photo.png", data, content_type)})
+
+
+def test_upload_returns_and_stores_its_analysis(client):
+    response = _upload(client)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["analysis_ready"] and not body["duplicate"]
+    assert body["analysis"]["verdict"] == "UNVERIFIED"
+
+    status = client.get(f"/api/upload/{body['file_id']}")
+    assert status.status_code == 200
+    assert status.json()["status"] == "analyzed"
+    assert status.json()["analysis"] == body["analysis"]
+
+
+def test_duplicate_upload_reuses_the_stored_analysis(client):
+    first = _upload(client).json()
+    second = _upload(client).json()
+
+    assert second["duplicate"]
+    assert second["sha256"] == first["sha256"]
+    assert second["analysis"] == first["analysis"]
+    assert len(RecordingAnalyzer.calls) == 1
+
+
+def test_content_is_checked_against_its_signature(client):
+    response = _upload(client, data=b"plain text, not a picture")
+    assert response.status_code == 400
+
+
+def test_list_rejects_malformed_cursor(client):
+    _upload(client)
+    assert client.get("/api/upload/list", params={"cursor": "not a cursor"}).status_code == 400
+
+
+def test_deleted_upload_is_gone(client):
+    file_id = _upload(client).json()["file_id"]
+
+    assert client.delete(f"/api/upload/{file_id}").status_code == 200
+    assert client.get(f"/api/upload/{file_id}").status_code == 404
+    assert client.delete(f"/api/upload/{file_id}").status_code == 404
@@ -0,0 +1,127 @@
+import os
+
+import pytest
+
+from database.upload_store import UploadStore
+
+FILE_IDS = [
+    "00000000-0000-4000-8000-000000000001",
+    "00000000-0000-4000-8000-000000000002",
+    "00000000-0000-4000-8000-000000000003",
+]
+
+
+def _stage(store: UploadStore, data: bytes) -> str:
+    path = store.temp_path()
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def _commit(store: UploadStore, file_id: str, sha256: str, data: bytes = b"bytes", upload_type: str = "image",
+            upload_time: str = "2024-01-01T00:00:00"):
+    return store.commit(_stage(store, data), sha256, len(data), "image/png", {
+        "file_id": file_id, "filename": f"{file_id}.png", "upload_type": upload_type, "upload_time": upload_time
+    })
+
+
+@pytest.fixture
+def store(tmp_path):
+    return UploadStore(str(tmp_path))
+
+
+def test_identical_uploads_share_one_blob(store):
+    path, created = _commit(store, FILE_IDS[0], "ab" * 32)
+    second_path, second_created = _commit(store, FILE_IDS[1], "ab" * 32)
+
+    assert created and not second_created
+    assert path == second_path == store.blob_path("ab" * 32)
+    with open(path, "rb") as f:
+        assert f.read() == b"bytes"
+    # The duplicate's staged copy is discarded
+    assert os.listdir(store.tmp_dir) == []
+    assert store.get_ref(FILE_IDS[1])["sha256"] == "ab" * 32
+
+
+def test_blob_and_analyses_go_with_the_last_reference(store):
+    path, _ = _commit(store, FILE_IDS[0], "ab" * 32)
+    _commit(store, FILE_IDS[1], "ab" * 32)
+    store.put_analysis("ab" * 32, "image:en:11", {"verdict": "TRUE"})
+
+    assert store.release(FILE_IDS[0])
+    assert os.path.exists(path)
+    assert store.get_analysis("ab" * 32, "image:en:11") == {"verdict": "TRUE"}
+
+    assert store.release(FILE_IDS[1])
+    assert not os.path.exists(path)
+    assert store.get_ref(FILE_IDS[1]) is None
+    assert store.get_analysis("ab" * 32, "image:en:11") is None
+    assert not store.release(FILE_IDS[1])
+
+
+def test_analyses_are_kept_per_options(store):
+    _commit(store, FILE_IDS[0], "ab" * 32)
+    store.put_analysis("ab" * 32, "image:en:11", {"language": "en"})
+    store.put_analysis("ab" * 32, "image:fr:11", {"language": "fr"})
+
+    assert store.get_analysis("ab" * 32, "image:en:11") == {"language": "en"}
+    assert store.get_analysis("ab" * 32, "image:fr:11") == {"language": "fr"}
+    assert store.get_analysis("ab" * 32, "image:en:00") is None
+
+
+def test_analysis_of_a_released_blob_is_not_stored(store):
+    _commit(store, FILE_IDS[0], "ab" * 32)
+    store.release(FILE_IDS[0])
+    store.put_analysis("ab" * 32, "image:en:11", {"verdict": "TRUE"})
+
+    assert store.get_analysis("ab" * 32, "image:en:11") is None
+
+
+def test_missing_blob_is_restored_by_the_next_upload(store):
+    path, _ = _commit(store, FILE_IDS[0], "ab" * 32)
+    os.remove(path)
+
+    _, created = _commit(store, FILE_IDS[1], "ab" * 32)
+
+    assert not created
+    assert os.path.exists(path)
+
+
+def test_list_refs_pages_newest_first(store):
+    for number, file_id in enumerate(FILE_IDS):
+        _commit(store, file_id, f"{number:064x}", data=file_id.encode(),
+                upload_type="document" if number == 1 else "image", upload_time=f"2024-01-0{number + 1}T00:00:00")
+
+    first, cursor = store.list_refs(limit=2)
+    second, last_cursor = store.list_refs(limit=2, cursor=cursor)
+
+    assert [ref["file_id"] for ref in first + second] == FILE_IDS[::-1]
+    assert last_cursor is None
+    images, _ = store.list_refs(upload_type="image")
+    assert [ref["file_id"] for ref in images] == [FILE_IDS[2], FILE_IDS[0]]
+
+
+def test_malformed_cursor_raises_value_error(store):
+    with pytest.raises(ValueError):
+        store.list_refs(cursor="not a cursor")
+
+
+def test_catalog_is_rebuilt_from_reference_files(tmp_path):
+    store = UploadStore(str(tmp_path))
+    path, _ = _commit(store, FILE_IDS[0], "ab" * 32)
+    _commit(store, FILE_IDS[1], "ab" * 32)
+    _commit(store, FILE_IDS[2], "cd" * 32)
+    os.remove(store.blob_path("cd" * 32))
+    store._conn.execute("DELETE FROM uploads")
+    store._conn.commit()
+
+    # An empty catalog is rebuilt on open; refs without a blob are dropped
+    reopened = UploadStore(str(tmp_path))
+    assert reopened.get_ref(FILE_IDS[0])["sha256"] == "ab" * 32
+    assert reopened.get_ref(FILE_IDS[2]) is None
+
+    # Reference counts are rebuilt too
+    reopened.release(FILE_IDS[0])
+    assert os.path.exists(path)
+    reopened.release(FILE_IDS[1])
+    assert not os.path.exists(path)
@@ -89,7 +89,7 @@ export const getArchivedReports = async (filters = {}) => {
 // Dashboard API
 export const getDashboardData = async (timeRange = '7d') => {
   try {
-  const response = await api.get(`/api/archive/stats?time_range=${timeRange}`);
+  const response = await api.get(`/api/dashboard?time_range=${timeRange}`);
     return response.data;
   } catch (error) {
     console.error('Dashboard error:', error);